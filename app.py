@@ -1,31 +1,164 @@
 import os
+import re
 import json
-from flask import Flask, request, jsonify
+import base64
+import zlib
+import time
+import logging
+import threading
+from flask import Flask, Response, request, jsonify, stream_with_context, g
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
-import openai
+from sqlalchemy import event, inspect, type_coerce
+from werkzeug.routing import BaseConverter
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from functools import partial
 from dotenv import load_dotenv
+from intent_engine import IntentEngine
+from title_index import TitleIndex
+from search import TodoSearch
+from todo_stats import TodoStats
+from fallback_cache import FallbackCache
+from parse_cache import ParseCache
+from llm_client import LLMClient, CircuitBreaker
+from chat_jobs import ChatJobs, ChatJobsFull
+from write_behind import WriteBehindQueue
+from change_follower import ChangeFollower
+import storage
+from response_cache import VersionedResponseCache
+from event_hub import EventHub, HubFull
+from todo_serializer import TODO_FIELDS, DATETIME_FIELDS, format_datetime, rows_to_dicts, dumps as encode_json
+from tenants import DEFAULT_TENANT, TENANT_ID_PATTERN, PerTenant
+from reminders import DueDateIndex, ReminderScheduler, DUE_RANGES, due_range_bounds, parse_due_date
+from structured_logging import configure_logging
+from metrics import Registry, span, start_request_timing, current_timing, end_request_timing
 
 # Load environment variables
 load_dotenv()
 
+# Configured by the entry points (structured_logging.configure_logging);
+# LOG_LEVEL=DEBUG shows the Claude replies, WARNING quiets the hot path
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app)
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///todos.db'
+# Database URI (DATABASE_URL) and connection pool sizing
+storage.configure_app(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Cache of parsed Claude fallback replies; set FALLBACK_CACHE_PATH to persist it
+app.config['FALLBACK_CACHE_SIZE'] = int(os.getenv('FALLBACK_CACHE_SIZE', '1000'))
+app.config['FALLBACK_CACHE_TTL'] = int(os.getenv('FALLBACK_CACHE_TTL', str(24 * 3600)))
+app.config['FALLBACK_CACHE_PATH'] = os.getenv('FALLBACK_CACHE_PATH')
+# Compiled rule-based parses of repeated chat messages (0 = off)
+app.config['PARSE_CACHE_SIZE'] = int(os.getenv('PARSE_CACHE_SIZE', '1024'))
+# Claude fallback client: per-call deadline, concurrency cap, retries, breaker
+app.config['ANTHROPIC_BASE_URL'] = os.getenv('ANTHROPIC_BASE_URL')
+app.config['LLM_TIMEOUT'] = float(os.getenv('LLM_TIMEOUT', '10'))
+app.config['LLM_DEADLINE'] = float(os.getenv('LLM_DEADLINE', '20'))
+app.config['LLM_MAX_CONCURRENCY'] = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+app.config['LLM_MAX_RETRIES'] = int(os.getenv('LLM_MAX_RETRIES', '2'))
+app.config['LLM_BREAKER_THRESHOLD'] = int(os.getenv('LLM_BREAKER_THRESHOLD', '5'))
+app.config['LLM_BREAKER_RESET'] = float(os.getenv('LLM_BREAKER_RESET', '30'))
+# Background fallback jobs for async chat requests
+app.config['CHAT_JOB_WORKERS'] = int(os.getenv('CHAT_JOB_WORKERS', str(app.config['LLM_MAX_CONCURRENCY'])))
+app.config['CHAT_JOB_MAX_PENDING'] = int(os.getenv('CHAT_JOB_MAX_PENDING', '100'))
+app.config['CHAT_JOB_TTL'] = int(os.getenv('CHAT_JOB_TTL', '600'))
+# Push of todo changes: per-subscriber queue bound, subscriber cap, SSE heartbeat
+app.config['EVENT_QUEUE_SIZE'] = int(os.getenv('EVENT_QUEUE_SIZE', '256'))
+app.config['EVENT_MAX_SUBSCRIBERS'] = int(os.getenv('EVENT_MAX_SUBSCRIBERS', '1000'))
+app.config['SSE_HEARTBEAT'] = float(os.getenv('SSE_HEARTBEAT', '15'))
+# Answer requests sent with "X-Request-Timing: 1" with a Server-Timing header
+app.config['SERVER_TIMING_ENABLED'] = os.getenv('SERVER_TIMING_ENABLED', '1') == '1'
+# Set when the app runs in several worker processes (gunicorn.conf.py does): each
+# worker then follows the change log and async chat jobs are kept in the database
+app.config['MULTI_PROCESS'] = os.getenv('MULTI_PROCESS', '0') == '1'
+app.config['CHANGE_POLL_INTERVAL'] = float(os.getenv('CHANGE_POLL_INTERVAL', '0.5'))
+# Change log housekeeping, at most every CHANGE_LOG_PRUNE_INTERVAL seconds:
+# entries superseded by a newer one for the same todo are always dropped, and
+# entries older than CHANGE_LOG_RETENTION_HOURS (0 = keep) too; clients whose
+# cursor is older than that are told to reload the list
+app.config['CHANGE_LOG_RETENTION_HOURS'] = float(os.getenv('CHANGE_LOG_RETENTION_HOURS', '168'))
+app.config['CHANGE_LOG_PRUNE_INTERVAL'] = float(os.getenv('CHANGE_LOG_PRUNE_INTERVAL', '600'))
+# How chat resolves todo names: 'index' (in-memory title index) or 'fts' (SQLite full-text index)
+app.config['CHAT_NAME_LOOKUP'] = os.getenv('CHAT_NAME_LOOKUP', 'index')
+app.config['REMINDERS_ENABLED'] = os.getenv('REMINDERS_ENABLED', '1') == '1'
+app.config['REMINDER_LEAD_MINUTES'] = float(os.getenv('REMINDER_LEAD_MINUTES', '60'))
+app.config['REMINDER_HORIZON_HOURS'] = float(os.getenv('REMINDER_HORIZON_HOURS', '24'))
+# Tenants whose title indexes and list response caches are kept in memory
+app.config['TENANT_CACHE_SIZE'] = int(os.getenv('TENANT_CACHE_SIZE', '1000'))
+# Write-behind for PUT /api/todos/<id>: updates are queued, merged per todo and
+# committed together every WRITE_BEHIND_INTERVAL seconds, or as soon as
+# WRITE_BEHIND_MAX_PENDING todos are waiting
+app.config['WRITE_BEHIND_ENABLED'] = os.getenv('WRITE_BEHIND_ENABLED', '0') == '1'
+app.config['WRITE_BEHIND_INTERVAL'] = float(os.getenv('WRITE_BEHIND_INTERVAL', '0.05'))
+app.config['WRITE_BEHIND_MAX_PENDING'] = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '500'))
+
+# Database; bound to the app (and the engine created) in create_app()
+db = SQLAlchemy()
+
+# Metrics, served in the Prometheus text format from GET /metrics
+metrics_registry = Registry()
+request_latency = metrics_registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route', ('method', 'route', 'status'))
+db_queries = metrics_registry.counter('db_queries_total', 'SQL statements executed')
+db_query_latency = metrics_registry.histogram('db_query_duration_seconds', 'SQL statement execution time')
+chat_messages = metrics_registry.counter(
+    'chat_messages_total', 'Chat messages by what resolved them (rules, fallback_cache, fallback, help)',
+    ('resolved_by',))
+fallback_latency = metrics_registry.histogram(
+    'chat_fallback_duration_seconds', 'Claude fallback call time', ('kind',))
+serialization_latency = metrics_registry.histogram(
+    'serialization_duration_seconds', 'Time spent building and encoding response bodies', ('endpoint',))
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
 
-# Initialize database
-db = SQLAlchemy(app)
+def _discard_query_timer(exception_context):
+    # A statement that raised never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_started'):
+        conn.info['query_started'].pop()
 
-# OpenAI API key will be loaded from environment variables
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    db_queries.inc()
+    db_query_latency.observe(elapsed)
+    timing = current_timing()
+    if timing is not None:
+        timing.db_queries += 1
+        timing.add('db', elapsed)
+
+@app.before_request
+def _start_request_metrics():
+    start_request_timing()
+
+@app.after_request
+def _record_request_metrics(response):
+    timing = current_timing()
+    if timing is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_latency.observe(time.perf_counter() - timing.started,
+                                request.method, route, str(response.status_code))
+        if app.config['SERVER_TIMING_ENABLED'] and request.headers.get('X-Request-Timing'):
+            response.headers['Server-Timing'] = timing.server_timing()
+    return response
+
+@app.teardown_request
+def _end_request_metrics(exc):
+    end_request_timing()
 
 # Todo Model
+# Every todo belongs to a tenant, and every query is scoped to one, so the
+# indexes all lead with tenant_id: a tenant's page, filter or sort is a range
+# scan over that tenant's rows only. Ids are never reused (AUTOINCREMENT on
+# SQLite), so a change log entry can't end up pointing at a newer todo.
 class Todo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.String(40), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=True)
     completed = db.Column(db.Boolean, default=False)
@@ -34,6 +167,15 @@ class Todo(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_todo_tenant_id', 'tenant_id', 'id'),
+        db.Index('ix_todo_tenant_completed', 'tenant_id', 'completed', 'id'),
+        db.Index('ix_todo_tenant_priority', 'tenant_id', 'priority'),
+        db.Index('ix_todo_tenant_due_date', 'tenant_id', 'due_date', 'id'),
+        db.Index('ix_todo_tenant_updated_at', 'tenant_id', 'updated_at', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -46,298 +188,858 @@ class Todo(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
+# Tenants: every /api route is also served under /api/tenants/<tenant_id>
+# (see the end of the routes); plain /api is the default tenant
+class TenantIdConverter(BaseConverter):
+    regex = TENANT_ID_PATTERN
+
+app.url_map.converters['tenant'] = TenantIdConverter
+
+@app.url_value_preprocessor
+def _pull_tenant_id(endpoint, values):
+    if values and 'tenant_id' in values:
+        g.tenant_id = values.pop('tenant_id')
+
+def current_tenant():
+    return g.get('tenant_id', DEFAULT_TENANT)
+
+def tenant_api_prefix(tenant_id):
+    """URL prefix of a tenant's API"""
+    return '/api' if tenant_id == DEFAULT_TENANT else f'/api/tenants/{tenant_id}'
+
+def tenant_todos(tenant_id=None):
+    """Todo query scoped to a tenant (the request's by default)"""
+    return Todo.query.filter(Todo.tenant_id == (tenant_id or current_tenant()))
+
+# Version of each tenant's todo collection: bumped in the same transaction as
+# every write, so any process can tell whether the list changed with one
+# primary key lookup
+TODO_COLLECTION = 'todos'
+
+def todo_collection(tenant_id):
+    """collection_state name of a tenant's todos"""
+    return f"{TODO_COLLECTION}/{tenant_id}"
+
+class CollectionState(db.Model):
+    __tablename__ = 'collection_state'
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Change log: one row per todo create/update/delete, written in the same
+# transaction as the change. seq is the cursor of GET /api/todos/changes.
+# Pruning (prune_todo_changes) always keeps the newest row, so seqs only grow.
+class TodoChange(db.Model):
+    __tablename__ = 'todo_change'
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    tenant_id = db.Column(db.String(40), nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
+    todo_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # create, update, delete
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_todo_change_tenant_seq', 'tenant_id', 'seq'),
+        db.Index('ix_todo_change_tenant_todo', 'tenant_id', 'todo_id', 'seq'),
+    )
+
+class ChatJob(db.Model):
+    """Async chat job record, shared by worker processes (see ChatJobs store)"""
+    __tablename__ = 'chat_job'
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(16), nullable=False)
+    record = db.Column(db.Text, nullable=False)  # the job record as JSON
+    submitted_at = db.Column(db.Float, nullable=False, index=True)
+
+# Todo change tracking
+# Writes are collected per session and tenant as they are flushed and handed
+# to todo_change_listeners once the transaction commits, as
+# listener(tenant_id, changes) for each tenant written to. Each change is an
+# (op, todo) pair: op is 'create', 'update' or 'delete'. todo is the to_dict()
+# snapshot for creates, the id plus at least the changed fields for updates,
+# and just {'id': ...} for deletes.
+todo_change_listeners = []
+
+def record_todo_changes(session, changes, tenant_id):
+    """Queue a tenant's changes made outside the ORM unit of work (e.g. bulk statements)"""
+    if not changes:
+        return
+    session.info.setdefault('todo_changes', {}).setdefault(tenant_id, []).extend(changes)
+    _bump_collection_version(session, tenant_id)
+    _log_todo_changes(session, changes, tenant_id)
+
+def _log_todo_changes(session, changes, tenant_id):
+    """Write changes to the change log and remember their seqs for the push hub"""
+    now = datetime.utcnow()
+    table = TodoChange.__table__
+    connection = session.connection()
+
+    if connection.dialect.name != 'sqlite':
+        rows = [{'tenant_id': tenant_id, 'todo_id': todo['id'], 'op': op, 'changed_at': now} for op, todo in changes]
+        result = connection.execute(table.insert().returning(table.c.seq, sort_by_parameter_order=True), rows)
+        seqs = [row.seq for row in result]
+    elif len(changes) == 1:
+        op, todo = changes[0]
+        seqs = [connection.execute(table.insert(), {'tenant_id': tenant_id, 'todo_id': todo['id'], 'op': op,
+                                                    'changed_at': now}).inserted_primary_key[0]]
+    else:
+        # Pre-bound tuples straight to the driver, as in _bulk_insert_todos
+        # The transaction holds SQLite's write lock, so the new rows have
+        # consecutive seqs ending at the current maximum
+        dialect = connection.dialect
+        stamp = table.c.changed_at.type.dialect_impl(dialect).bind_processor(dialect)(now)
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} (tenant_id, todo_id, op, changed_at) VALUES (?, ?, ?, ?)",
+            [(tenant_id, todo['id'], op, stamp) for op, todo in changes]
+        )
+        last_seq = connection.execute(db.select(db.func.max(table.c.seq))).scalar()
+        seqs = range(last_seq - len(changes) + 1, last_seq + 1)
+    session.info.setdefault('todo_change_seqs', {}).setdefault(tenant_id, []).extend(seqs)
+
+def _bump_collection_version(session, tenant_id):
+    """Bump a tenant's collection version once per transaction, inside that transaction"""
+    bumped = session.info.setdefault('todo_versions_bumped', set())
+    if tenant_id in bumped:
+        return
+    table = CollectionState.__table__
+    name = todo_collection(tenant_id)
+    now = datetime.utcnow()
+    connection = session.connection()
+    result = connection.execute(
+        table.update()
+        .where(table.c.name == name)
+        .values(version=table.c.version + 1, updated_at=now)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(name=name, version=1, updated_at=now))
+    bumped.add(tenant_id)
+
+def latest_change_seq():
+    """Cursor for GET /api/todos/changes covering every change made so far"""
+    return db.session.execute(db.select(db.func.max(TodoChange.seq))).scalar() or 0
+
+def get_collection_version(tenant_id):
+    """(version, last write time) of a tenant's todo collection"""
+    row = db.session.execute(
+        db.select(CollectionState.version, CollectionState.updated_at)
+        .where(CollectionState.name == todo_collection(tenant_id))
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+def _group_by_tenant(pairs):
+    """(tenant_id, item) pairs as {tenant_id: [item, ...]}, in order"""
+    groups = {}
+    for tenant_id, item in pairs:
+        groups.setdefault(tenant_id, []).append(item)
+    return groups
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_todo_changes(session, flush_context):
+    changes = [(obj.tenant_id, ('create', obj.to_dict())) for obj in session.new if isinstance(obj, Todo)]
+    changes += [(obj.tenant_id, ('update', obj.to_dict())) for obj in session.dirty
+                if isinstance(obj, Todo) and session.is_modified(obj)]
+    changes += [(obj.tenant_id, ('delete', {'id': obj.id})) for obj in session.deleted if isinstance(obj, Todo)]
+    for tenant_id, tenant_changes in _group_by_tenant(changes).items():
+        record_todo_changes(session, tenant_changes, tenant_id)
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_todo_changes(session):
+    session.info.pop('todo_versions_bumped', None)
+    seqs = session.info.pop('todo_change_seqs', None)
+    changes = session.info.pop('todo_changes', None)
+    if changes:
+        for tenant_id, tenant_changes in changes.items():
+            for listener in todo_change_listeners:
+                listener(tenant_id, tenant_changes)
+        if change_follower.running:
+            # Published from the log in seq order along with other workers' changes
+            change_follower.poke()
+        else:
+            _publish_in_seq_order(changes, seqs)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_todo_changes(session, previous_transaction):
+    session.info.pop('todo_versions_bumped', None)
+    session.info.pop('todo_change_seqs', None)
+    session.info.pop('todo_changes', None)
+
+# Push channel for committed changes (GET /api/todos/events and long-polls)
+todo_event_hub = EventHub(
+    max_queue=app.config['EVENT_QUEUE_SIZE'],
+    max_subscribers=app.config['EVENT_MAX_SUBSCRIBERS']
+)
+
+def _fetch_logged_changes(after_seq):
+    with app.app_context():
+        changes, has_more = list_todo_changes(after_seq, MAX_PAGE_SIZE)
+        return changes
+
+def _apply_logged_changes(changes):
+    """Hand changes read from the log to the listeners and push subscribers"""
+    by_tenant = _group_by_tenant((change['tenant_id'], change) for change in changes)
+    for tenant_id, tenant_changes in by_tenant.items():
+        # Log entries carry the todo as it is now: a full snapshot, or None once deleted
+        snapshots = [('delete', {'id': change['id']}) if change['todo'] is None else ('update', change['todo'])
+                     for change in tenant_changes]
+        for listener in todo_change_listeners:
+            listener(tenant_id, snapshots)
+        todo_event_hub.publish([(change['seq'], change['op'], change['todo'] or {'id': change['id']})
+                                for change in tenant_changes], topic=tenant_id)
+
+# Highest seq handed to the event hub by this process (single process only;
+# the change follower does it with MULTI_PROCESS)
+_event_publish_lock = threading.Lock()
+_event_published_seq = None
+
+def _change_events(seqs, changes):
+    return [(seq, op, todo) for seq, (op, todo) in zip(seqs, changes)]
+
+def _publish_in_seq_order(changes, seqs):
+    """Hand a commit's changes ({tenant_id: [(op, todo), ...]}, seqs alike) to the event hub in seq order.
+
+    after_commit runs on each committing thread once the write lock is
+    released, so two threads can get here in the opposite order of their
+    seqs; a stream that saw the higher seq first would skip the lower one.
+    Instead, under one lock, everything committed since the last seq
+    published is read back from the log, as the change follower does. That
+    is only needed when something committed in between: a commit whose seqs
+    come right after the last published (the usual case), or one with no one
+    subscribed to order for, just publishes its own events, which also wakes
+    long-polls. Events are only built for tenants someone is subscribed to.
+    """
+    global _event_published_seq
+    first = min(tenant_seqs[0] for tenant_seqs in seqs.values())
+    last = max(tenant_seqs[-1] for tenant_seqs in seqs.values())
+    count = sum(len(tenant_seqs) for tenant_seqs in seqs.values())
+    with _event_publish_lock:
+        if _event_published_seq is None:
+            _event_published_seq = first - 1
+        next_in_order = first == _event_published_seq + 1 and last - first + 1 == count
+        if next_in_order or not todo_event_hub.stats()['subscribers']:
+            for tenant_id, tenant_changes in changes.items():
+                tenant_seqs = seqs[tenant_id]
+                todo_event_hub.publish_built(tenant_seqs[-1], len(tenant_seqs),
+                                             partial(_change_events, tenant_seqs, tenant_changes), topic=tenant_id)
+            _event_published_seq = max(_event_published_seq, last)
+            return
+        while True:
+            changes = _fetch_logged_changes(_event_published_seq)
+            if not changes:
+                return
+            for tenant_id, tenant_changes in _group_by_tenant((change['tenant_id'], change)
+                                                              for change in changes).items():
+                todo_event_hub.publish([(change['seq'], change['op'], change['todo'] or {'id': change['id']})
+                                        for change in tenant_changes], topic=tenant_id)
+            _event_published_seq = changes[-1]['seq']
+
+# Keeps this worker's indexes, caches and event streams current with changes
+# committed by the other workers (MULTI_PROCESS only)
+change_follower = ChangeFollower(_fetch_logged_changes, _apply_logged_changes,
+                                 interval=app.config['CHANGE_POLL_INTERVAL'])
+
+@app.before_request
+def _start_change_follower():
+    # Before anything loads an index, so no change between load and start is missed
+    if app.config['MULTI_PROCESS']:
+        if not change_follower.running:
+            change_follower.start(latest_change_seq())
+    elif _event_published_seq is None:
+        _start_event_publishing(latest_change_seq())
+
+def _start_event_publishing(seq):
+    """Publish changes after seq from now on (the first request; a commit outside one starts at its own seqs)"""
+    global _event_published_seq
+    with _event_publish_lock:
+        if _event_published_seq is None:
+            _event_published_seq = seq
+
+# Serialized GET /api/todos bodies for each tenant's current collection version
+todo_list_caches = PerTenant(
+    lambda: VersionedResponseCache(max_entries=int(os.getenv('TODO_LIST_CACHE_SIZE', '256'))),
+    max_tenants=app.config['TENANT_CACHE_SIZE']
+)
+
+# Full-text search over titles and descriptions (FTS5 on SQLite, kept in sync by triggers)
+todo_search = TodoSearch(Todo.__table__)
+
+# Counts for GET /api/todos/stats (trigger-maintained counters on SQLite, GROUP BY elsewhere)
+todo_stats = TodoStats(Todo.__table__)
+
+# Per-tenant title indexes used for name-based lookups in chat, each built on
+# first use and kept current from committed changes
+title_indexes = PerTenant(TitleIndex, max_tenants=app.config['TENANT_CACHE_SIZE'])
+
+def get_title_index(tenant_id):
+    return title_indexes.get(tenant_id).ensure_loaded(
+        lambda: db.session.execute(
+            db.select(Todo.id, Todo.title, Todo.completed).where(Todo.tenant_id == tenant_id)
+        )
+    )
+
+def _update_title_index(tenant_id, changes):
+    index = title_indexes.peek(tenant_id)
+    if index is not None:
+        index.apply_changes(changes)
+
+todo_change_listeners.append(_update_title_index)
+
+# Cached Claude fallback replies, dropped when a todo they refer to changes
+fallback_cache = FallbackCache(
+    max_entries=app.config['FALLBACK_CACHE_SIZE'],
+    ttl=app.config['FALLBACK_CACHE_TTL'],
+    path=app.config['FALLBACK_CACHE_PATH']
+)
+
+def _invalidate_fallback_cache(tenant_id, changes):
+    fallback_cache.invalidate_todos([todo['id'] for op, todo in changes if op != 'create'])
+
+todo_change_listeners.append(_invalidate_fallback_cache)
+
+# Compiled rule-based parses by message; they don't refer to todos, so changes don't touch them
+parse_cache = ParseCache(max_entries=app.config['PARSE_CACHE_SIZE'])
+
+# Due dates of every tenant in order, for the reminder timer (chat range
+# queries read the tenant's rows through ix_todo_tenant_due_date instead)
+due_index = DueDateIndex()
+
+def get_due_index():
+    return due_index.ensure_loaded(
+        lambda: db.session.execute(
+            db.select(Todo.id, Todo.due_date, Todo.completed)
+            .where(Todo.due_date.isnot(None))
+            .order_by(Todo.due_date, Todo.id)
+        )
+    )
+
+reminders_sent = metrics_registry.counter('reminders_sent_total', 'Due-date reminders sent', ('kind',))
+
+def _send_reminder(kind, todo_id, due_date):
+    """Push an upcoming/overdue reminder to event stream clients (scheduler thread)"""
+    with app.app_context():
+        todo = db.session.get(Todo, todo_id)
+        if todo is None or todo.completed:
+            return
+        payload = {'kind': kind, 'todo': todo.to_dict()}
+        tenant_id = todo.tenant_id
+    reminders_sent.inc(kind)
+    logger.info("Reminder", extra={'todo_id': todo_id, 'kind': kind, 'due': due_date.isoformat()})
+    todo_event_hub.notify('reminder', payload, topic=tenant_id)
+
+reminder_scheduler = ReminderScheduler(
+    due_index, _send_reminder,
+    lead=timedelta(minutes=app.config['REMINDER_LEAD_MINUTES']),
+    horizon=timedelta(hours=app.config['REMINDER_HORIZON_HOURS'])
+)
+
+def _update_due_dates(tenant_id, changes):
+    # A new todo without a due date is in neither
+    changes = [(op, todo) for op, todo in changes if op != 'create' or todo['due_date'] is not None]
+    due_index.apply_changes(changes)
+    reminder_scheduler.reschedule(todo['id'] for op, todo in changes)
+
+todo_change_listeners.append(_update_due_dates)
+
+@app.before_request
+def _start_reminders():
+    # On the first request rather than at import, so each worker process runs its own timer
+    if app.config['REMINDERS_ENABLED'] and not reminder_scheduler.running:
+        get_due_index()
+        reminder_scheduler.start()
+
+# One pooled client shared by every request thread
+llm_client = LLMClient(
+    api_key=os.getenv('ANTHROPIC_API_KEY'),
+    base_url=app.config['ANTHROPIC_BASE_URL'],
+    timeout=app.config['LLM_TIMEOUT'],
+    deadline=app.config['LLM_DEADLINE'],
+    max_concurrency=app.config['LLM_MAX_CONCURRENCY'],
+    max_retries=app.config['LLM_MAX_RETRIES'],
+    breaker=CircuitBreaker(
+        failure_threshold=app.config['LLM_BREAKER_THRESHOLD'],
+        reset_timeout=app.config['LLM_BREAKER_RESET']
+    )
+)
+
+class DatabaseChatJobStore:
+    """Chat job records in the chat_job table, so any worker can answer a poll"""
+
+    table = ChatJob.__table__
+
+    def save(self, job):
+        values = {'status': job['status'], 'record': json.dumps(job), 'submitted_at': job['submitted_at']}
+        with app.app_context(), db.engine.begin() as connection:
+            updated = connection.execute(
+                self.table.update().where(self.table.c.id == job['job_id']).values(**values)
+            ).rowcount
+            if not updated:
+                connection.execute(self.table.insert().values(id=job['job_id'], **values))
+
+    def load(self, job_id):
+        with app.app_context(), db.engine.connect() as connection:
+            record = connection.execute(
+                db.select(self.table.c.record).where(self.table.c.id == job_id)
+            ).scalar()
+        return json.loads(record) if record is not None else None
+
+    def prune(self, expires_before):
+        with app.app_context(), db.engine.begin() as connection:
+            connection.execute(self.table.delete().where(
+                self.table.c.submitted_at < expires_before, self.table.c.status != 'pending'
+            ))
+
+# Fallback calls for async chat requests run here instead of in the request
+chat_jobs = ChatJobs(
+    max_workers=app.config['CHAT_JOB_WORKERS'],
+    max_pending=app.config['CHAT_JOB_MAX_PENDING'],
+    ttl=app.config['CHAT_JOB_TTL'],
+    store=DatabaseChatJobStore() if app.config['MULTI_PROCESS'] else None
+)
+
+# Trigger phrases for the rule-based parser, compiled once into a single scanner.
+# Within each category the order matters: earlier phrases win.
+INTENT_VOCABULARY = {
+    # CREATE todo patterns
+    'create': ['add ', 'create ', 'new ', 'make ', 'todo ', 'task ', 'remind me to ', 'i need to '],
+    # UPDATE/COMPLETE patterns
+    'complete': ['complete ', 'finish ', 'done ', 'mark ', 'check off ', 'finished '],
+    # DELETE patterns
+    'delete': ['delete ', 'remove ', 'cancel ', 'erase ', 'get rid of '],
+    # LIST/SHOW patterns
+    'list': ['show ', 'list ', 'display ', 'what ', 'see ', 'view ', 'get '],
+    # PRIORITY patterns
+    'priority_high': ['urgent', 'important', 'critical', 'asap', 'priority', 'high'],
+    'priority_medium': ['normal', 'medium', 'regular', 'standard'],
+    'priority_low': ['low', 'later', 'someday', 'eventually', 'when possible'],
+    # LIST filters
+    'pending_filter': ['pending', 'incomplete', 'unfinished', 'not done'],
+    'completed_filter': ['completed', 'finished', 'done'],
+    # Positional references
+    'position': ['first', 'last'],
+    'greeting': ['hello', 'hi', 'hey', 'help', 'what can you do'],
+    # Due-date ranges, answered from the due-date index
+    'due_range': ['overdue', 'past due', 'due today', 'due tomorrow', 'due this week', 'due next week'],
+}
+# Priority categories in the order they are checked, mapped to the priority they set
+PRIORITY_CATEGORIES = {
+    'priority_high': 'high',
+    'priority_medium': 'medium',
+    'priority_low': 'low',
+}
+# Due-date range phrases mapped to the range they ask for
+DUE_RANGE_PHRASES = {
+    'overdue': 'overdue',
+    'past due': 'overdue',
+    'due today': 'today',
+    'due tomorrow': 'tomorrow',
+    'due this week': 'this_week',
+    'due next week': 'next_week',
+}
+INTENT_ENGINE = IntentEngine(INTENT_VOCABULARY)
+
+# Extracts a JSON object from LLM replies wrapped in other text
+JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+# Todo context for the chat parser
+# The parser only asks for what a command needs: whether any todos exist, the
+# first/last id, a name lookup or a small sample for the LLM prompt.
+class TodoSnapshot:
+    """Parser context backed by a list of todo dicts in id order"""
+
+    def __init__(self, todos, index=None, tenant_id=DEFAULT_TENANT):
+        self.todos = todos
+        self._index = index
+        self.tenant_id = tenant_id
+
+    def __bool__(self):
+        return bool(self.todos)
+
+    def first_id(self):
+        return self.todos[0]['id']
+
+    def last_id(self):
+        return self.todos[-1]['id']
+
+    def find_by_name(self, name, pending_only=False):
+        if self._index is None:
+            self._index = TitleIndex.from_todos(self.todos)
+        return self._index.find(name, pending_only=pending_only)
+
+    def sample(self, limit):
+        return self.todos[:limit]
+
+
+# Todos ranked when checking whether a name lookup in chat was ambiguous
+MAX_NAME_CANDIDATES = 20
+
+class DatabaseTodoContext:
+    """Parser context that queries one tenant's todos lazily, one lookup at a time"""
+
+    def __init__(self, tenant_id=None):
+        self.tenant_id = tenant_id or current_tenant()
+        self._has_todos = None
+        self._name_lookup = None
+
+    def _ids(self, column):
+        return db.select(column).where(Todo.tenant_id == self.tenant_id)
+
+    def __bool__(self):
+        if self._has_todos is None:
+            self._has_todos = db.session.execute(self._ids(Todo.id).limit(1)).first() is not None
+        return self._has_todos
+
+    def first_id(self):
+        return db.session.execute(self._ids(db.func.min(Todo.id))).scalar()
+
+    def last_id(self):
+        return db.session.execute(self._ids(db.func.max(Todo.id))).scalar()
+
+    def find_by_name(self, name, pending_only=False):
+        connection = db.session.connection() if app.config['CHAT_NAME_LOOKUP'] == 'fts' else None
+        if connection is not None and todo_search.uses_fts(connection):
+            todo_id = todo_search.find_id(connection, name, self.tenant_id, pending_only=pending_only)
+        else:
+            todo_id = get_title_index(self.tenant_id).find(name, pending_only=pending_only)
+        self._name_lookup = (name, pending_only) if todo_id else None
+        return todo_id
+
+    def other_matches(self, todo_id, limit=3):
+        """Todos the last name lookup matched as well as it did todo_id (the same pass), best first"""
+        if self._name_lookup is None:
+            return []
+        name, pending_only = self._name_lookup
+        ranked = get_title_index(self.tenant_id).candidates(name, pending_only=pending_only, limit=MAX_NAME_CANDIDATES)
+        levels = {candidate_id: int(score) for candidate_id, score in ranked}
+        if todo_id not in levels:
+            return []
+        ids = [candidate_id for candidate_id, score in ranked
+               if candidate_id != todo_id and int(score) == levels[todo_id]][:limit]
+        titles = dict(db.session.execute(db.select(Todo.id, Todo.title).where(Todo.id.in_(ids))).all()) if ids else {}
+        return [{'id': candidate_id, 'title': titles[candidate_id]} for candidate_id in ids if candidate_id in titles]
+
+    def sample(self, limit):
+        return [todo.to_dict() for todo in tenant_todos(self.tenant_id).order_by(Todo.id).limit(limit)]
+
 # AI Assistant for natural language processing
 class AIAssistant:
     @staticmethod
-    def process_natural_language(user_input, existing_todos):
+    def process_natural_language(user_input, todos):
         """
         Process natural language input using a rule-based approach
         This is more reliable than API calls and works offline
+
+        todos is a parser context (TodoSnapshot or DatabaseTodoContext) or a
+        plain list of todo dicts
         """
+        if isinstance(todos, list):
+            todos = TodoSnapshot(todos)
+        
+        result = AIAssistant.parse_with_rules(user_input, todos)
+        if result:
+            return result
+        
+        return AIAssistant.resolve_with_fallback(user_input, todos)
+    
+    @staticmethod
+    def parse_with_rules(user_input, todos):
+        """Rule-based step only: the action, or None if the fallback is needed"""
         user_input = user_input.lower().strip()
+        if isinstance(todos, list):
+            todos = TodoSnapshot(todos)
         
-        # Try rule-based processing first
         try:
-            result = AIAssistant._rule_based_parser(user_input, existing_todos)
-            if result:
-                return result
+            # Repeated messages reuse their compiled plan; only the todo lookups run again
+            plan = parse_cache.get_or_compile(user_input, AIAssistant._compile_rules)
+            result = AIAssistant._run_plan(plan, todos)
         except Exception as e:
-            print(f"Rule-based parsing error: {e}")
+            logger.warning("Rule-based parsing error", extra={'error': e})
+            return None
+        if result:
+            chat_messages.inc('rules')
+        return result
+    
+    @staticmethod
+    def resolve_with_fallback(user_input, todos):
+        """Fallback step: ask Claude, or return the help message if that fails"""
+        user_input = user_input.lower().strip()
+        if isinstance(todos, list):
+            todos = TodoSnapshot(todos)
         
         # Fallback to Claude API if available and rule-based fails
         try:
-            return AIAssistant._claude_fallback(user_input, existing_todos)
+            return AIAssistant._claude_fallback(user_input, todos)
         except Exception as e:
-            print(f"Claude API fallback error: {e}")
-            return {
-                "action": "response", 
-                "message": f"I understood '{user_input}' but couldn't process it fully. Try phrases like:\n• 'add [task name]'\n• 'complete task [number]'\n• 'show tasks'\n• 'delete task [number]'\n• 'add [task] with high priority'"
-            }
+            logger.info("Claude API fallback unavailable, sending help", extra={'error': e})
+            chat_messages.inc('help')
+            return AIAssistant.help_response(user_input)
+    
+    @staticmethod
+    def help_response(user_input):
+        return {
+            "action": "response", 
+            "message": f"I understood '{user_input}' but couldn't process it fully. Try phrases like:\n• 'add [task name]'\n• 'complete task [number]'\n• 'show tasks'\n• 'delete task [number]'\n• 'add [task] with high priority'"
+        }
     
     @staticmethod
-    def _rule_based_parser(user_input, existing_todos):
+    def _rule_based_parser(user_input, todos):
         """Enhanced rule-based natural language parser"""
+        return AIAssistant._run_plan(AIAssistant._compile_rules(user_input), todos)
+    
+    @staticmethod
+    def _compile_rules(user_input):
+        """Compile a lowercased message into a plan: the steps of its parse that don't depend on the todos
+
+        Each step is ('result', action), which finishes the parse, or
+        ('resolve', action, pending_only, task_id, position, name): look up
+        the todo a complete/delete command refers to and finish if one is
+        found, else go on with the next step. No step left means no match.
+        """
         
-        # CREATE todo patterns
-        create_patterns = [
-            'add ', 'create ', 'new ', 'make ', 'todo ', 'task ', 'remind me to ', 'i need to '
-        ]
-        
-        # UPDATE/COMPLETE patterns
-        complete_patterns = [
-            'complete ', 'finish ', 'done ', 'mark ', 'check off ', 'finished '
-        ]
-        
-        # DELETE patterns
-        delete_patterns = [
-            'delete ', 'remove ', 'cancel ', 'erase ', 'get rid of '
-        ]
-        
-        # LIST/SHOW patterns
-        list_patterns = [
-            'show ', 'list ', 'display ', 'what ', 'see ', 'view ', 'get '
-        ]
-        
-        # PRIORITY patterns
-        priority_words = {
-            'high': ['urgent', 'important', 'critical', 'asap', 'priority', 'high'],
-            'medium': ['normal', 'medium', 'regular', 'standard'],
-            'low': ['low', 'later', 'someday', 'eventually', 'when possible']
-        }
+        # One pass over the input finds every trigger phrase
+        scan = INTENT_ENGINE.scan(user_input)
         
         # Extract priority from input
-        detected_priority = 'medium'  # default
-        for priority, keywords in priority_words.items():
-            if any(keyword in user_input for keyword in keywords):
-                detected_priority = priority
-                break
+        detected_priority = PRIORITY_CATEGORIES.get(scan.first_category(PRIORITY_CATEGORIES), 'medium')
         
         # Check if this is a complete/update command first (higher priority)
-        is_complete_command = any(pattern in user_input for pattern in complete_patterns)
-        is_delete_command = any(pattern in user_input for pattern in delete_patterns)
-        is_list_command = any(pattern in user_input for pattern in list_patterns)
+        is_complete_command = scan.has('complete')
+        is_delete_command = scan.has('delete')
+        is_list_command = scan.has('list')
         
         # CREATE TODO (only if not a complete/delete/list command)
         if not (is_complete_command or is_delete_command or is_list_command):
-            for pattern in create_patterns:
-                if pattern in user_input:
-                    # Extract title after the pattern
-                    title_start = user_input.find(pattern) + len(pattern)
-                    title = user_input[title_start:].strip()
-                    
-                    # Clean up common words
-                    title = title.replace(' to my list', '').replace(' to the list', '')
-                    title = title.replace(' with high priority', '').replace(' with low priority', '')
-                    title = title.replace(' with medium priority', '')
-                    
-                    if title:
-                        return {
-                            "action": "create",
-                            "title": title.capitalize(),
-                            "description": "",
-                            "priority": detected_priority
-                        }
-        
-        # COMPLETE/UPDATE TODO
-        for pattern in complete_patterns:
-            if pattern in user_input:
-                # Look for task number or reference
-                import re
-                
-                # Extract task ID (e.g., "task 1", "first task", "task number 2")
-                task_match = re.search(r'task (\d+)', user_input)
-                number_match = re.search(r'\b(\d+)\b', user_input)
+            for pattern in scan.matches('create'):
+                # Extract title after the pattern
+                title_start = scan.position(pattern) + len(pattern)
+                title = user_input[title_start:].strip()
                 
-                task_id = None
+                # Clean up common words
+                title = title.replace(' to my list', '').replace(' to the list', '')
+                title = title.replace(' with high priority', '').replace(' with low priority', '')
+                title = title.replace(' with medium priority', '')
                 
-                # First try to match by ID/number
-                if task_match:
-                    task_id = int(task_match.group(1))
-                elif number_match:
-                    task_id = int(number_match.group(1))
-                elif 'first' in user_input and existing_todos:
-                    task_id = existing_todos[0]['id']
-                elif 'last' in user_input and existing_todos:
-                    task_id = existing_todos[-1]['id']
-                
-                # If no ID found, try to match by task title/name
-                if not task_id and existing_todos:
-                    # Remove the completion pattern from the input to get the task name
-                    task_name_part = user_input.replace(pattern, '').strip()
-                    
-                    # Remove common words
-                    task_name_part = task_name_part.replace('the ', '').replace('my ', '').replace('task ', '')
-                    task_name_part = task_name_part.replace('called ', '').replace('named ', '').replace('about ', '')
-                    
-                    # Find matching task by title with improved matching logic
-                    incomplete_todos = [todo for todo in existing_todos if not todo['completed']]
-                    
-                    # First pass: Look for exact match (case insensitive)
-                    for todo in incomplete_todos:
-                        todo_title = todo['title'].lower()
-                        if task_name_part.lower() == todo_title:
-                            task_id = todo['id']
-                            break
-                    
-                    # Second pass: Look for exact substring match
-                    if not task_id:
-                        for todo in incomplete_todos:
-                            todo_title = todo['title'].lower()
-                            if task_name_part.lower() in todo_title:
-                                task_id = todo['id']
-                                break
-                    
-                    # Third pass: Look for word-by-word match (all words must be present)
-                    if not task_id:
-                        task_words = [word for word in task_name_part.lower().split() if len(word) > 2]
-                        if task_words:
-                            for todo in incomplete_todos:
-                                todo_title = todo['title'].lower()
-                                # Check if ALL significant words are present in the title
-                                if all(word in todo_title for word in task_words):
-                                    task_id = todo['id']
-                                    break
-                    
-                    # Fourth pass: Fallback to partial word match (at least 2 words match)
-                    if not task_id and len(task_words) >= 2:
-                        for todo in incomplete_todos:
-                            todo_title = todo['title'].lower()
-                            matching_words = sum(1 for word in task_words if word in todo_title)
-                            if matching_words >= min(2, len(task_words)):
-                                task_id = todo['id']
-                                break
-                
-                if task_id:
-                    return {
-                        "action": "update",
-                        "id": task_id,
-                        "completed": True
-                    }
+                if title:
+                    return (('result', {
+                        "action": "create",
+                        "title": title.capitalize(),
+                        "description": "",
+                        "priority": detected_priority
+                    }),)
         
-        # DELETE TODO
-        for pattern in delete_patterns:
-            if pattern in user_input:
-                import re
-                
-                # Extract task ID
-                task_match = re.search(r'task (\d+)', user_input)
-                number_match = re.search(r'\b(\d+)\b', user_input)
-                
-                task_id = None
-                
-                # First try to match by ID/number
-                if task_match:
-                    task_id = int(task_match.group(1))
-                elif number_match:
-                    task_id = int(number_match.group(1))
-                elif 'first' in user_input and existing_todos:
-                    task_id = existing_todos[0]['id']
-                elif 'last' in user_input and existing_todos:
-                    task_id = existing_todos[-1]['id']
-                
-                # If no ID found, try to match by task title/name
-                if not task_id and existing_todos:
-                    # Remove the delete pattern from the input to get the task name
-                    task_name_part = user_input.replace(pattern, '').strip()
-                    
-                    # Remove common words
-                    task_name_part = task_name_part.replace('the ', '').replace('my ', '').replace('task ', '')
-                    task_name_part = task_name_part.replace('called ', '').replace('named ', '').replace('about ', '')
-                    
-                    # Find matching task by title with improved matching logic
-                    # First pass: Look for exact match (case insensitive)
-                    for todo in existing_todos:
-                        todo_title = todo['title'].lower()
-                        if task_name_part.lower() == todo_title:
-                            task_id = todo['id']
-                            break
-                    
-                    # Second pass: Look for exact substring match
-                    if not task_id:
-                        for todo in existing_todos:
-                            todo_title = todo['title'].lower()
-                            if task_name_part.lower() in todo_title:
-                                task_id = todo['id']
-                                break
-                    
-                    # Third pass: Look for word-by-word match (all words must be present)
-                    if not task_id:
-                        task_words = [word for word in task_name_part.lower().split() if len(word) > 2]
-                        if task_words:
-                            for todo in existing_todos:
-                                todo_title = todo['title'].lower()
-                                # Check if ALL significant words are present in the title
-                                if all(word in todo_title for word in task_words):
-                                    task_id = todo['id']
-                                    break
-                    
-                    # Fourth pass: Fallback to partial word match (at least 2 words match)
-                    if not task_id and len(task_words) >= 2:
-                        for todo in existing_todos:
-                            todo_title = todo['title'].lower()
-                            matching_words = sum(1 for word in task_words if word in todo_title)
-                            if matching_words >= min(2, len(task_words)):
-                                task_id = todo['id']
-                                break
-                
-                if task_id:
-                    return {
-                        "action": "delete",
-                        "id": task_id
-                    }
+        steps = []
+        
+        # COMPLETE/UPDATE TODO, then DELETE TODO
+        for category, action, pending_only in (('complete', 'update', True), ('delete', 'delete', False)):
+            for pattern in scan.matches(category):
+                step = AIAssistant._task_step(scan, user_input, pattern, action, pending_only)
+                steps.append(step)
+                if step[0] == 'result':
+                    return tuple(steps)
+        
+        # DUE-DATE RANGES ("what's due this week", "anything overdue?")
+        due_phrases = scan.matches('due_range')
+        if due_phrases and (is_list_command or not scan.has('create')):
+            filter_type = "pending"
+            if not scan.has('pending_filter') and scan.has('completed_filter'):
+                filter_type = "completed"
+            steps.append(('result', {
+                "action": "list",
+                "filter": filter_type,
+                "due": DUE_RANGE_PHRASES[due_phrases[0]]
+            }))
         
         # LIST/SHOW TODO
-        for pattern in list_patterns:
-            if pattern in user_input:
-                filter_type = "all"
-                
-                if any(word in user_input for word in ['pending', 'incomplete', 'unfinished', 'not done']):
-                    filter_type = "pending"
-                elif any(word in user_input for word in ['completed', 'finished', 'done']):
-                    filter_type = "completed"
-                elif any(word in user_input for word in ['high priority', 'urgent', 'important']):
-                    filter_type = "all"
-                
-                return {
-                    "action": "list",
-                    "filter": filter_type
-                }
+        elif is_list_command:
+            filter_type = "all"
+            
+            if scan.has('pending_filter'):
+                filter_type = "pending"
+            elif scan.has('completed_filter'):
+                filter_type = "completed"
+            
+            steps.append(('result', {
+                "action": "list",
+                "filter": filter_type
+            }))
         
         # GREETINGS AND HELP
-        greetings = ['hello', 'hi', 'hey', 'help', 'what can you do']
-        if any(greeting in user_input for greeting in greetings):
-            return {
+        elif scan.has('greeting'):
+            steps.append(('result', {
                 "action": "response",
                 "message": "Hello! I can help you manage your todos. Try saying:\n• 'Add buy groceries'\n• 'Complete task 1'\n• 'Show all tasks'\n• 'Delete task 2'\n• 'Add urgent meeting with high priority'"
-            }
+            }))
         
-        # If no pattern matches, return None to try fallback
+        # If no pattern matches, the plan runs out and the fallback is tried
+        return tuple(steps)
+    
+    @staticmethod
+    def _task_step(scan, user_input, pattern, action, pending_only):
+        """Plan step for a complete/delete command: by number, else by position or name at run time"""
+        # First try to match by ID/number (e.g., "task 1", "first task", "task number 2")
+        task_id = scan.task_id
+        if task_id is None:
+            task_id = scan.number
+        if task_id:
+            return ('result', AIAssistant._task_action(action, task_id))
+        
+        position = None
+        if task_id is None and ('first' in scan or 'last' in scan):
+            position = 'first' if 'first' in scan else 'last'
+        
+        # If no ID found, try to match by task title/name
+        # Remove the command pattern from the input to get the task name
+        task_name_part = user_input.replace(pattern, '').strip()
+        
+        # Remove common words
+        task_name_part = task_name_part.replace('the ', '').replace('my ', '').replace('task ', '')
+        task_name_part = task_name_part.replace('called ', '').replace('named ', '').replace('about ', '')
+        return ('resolve', action, pending_only, task_id, position, task_name_part)
+    
+    @staticmethod
+    def _task_action(action, task_id):
+        if action == 'delete':
+            return {"action": "delete", "id": task_id}
+        return {"action": "update", "id": task_id, "completed": True}
+    
+    @staticmethod
+    def _run_plan(plan, todos):
+        """Finish a compiled parse against the todos; returns a new action dict or None"""
+        for step in plan:
+            if step[0] == 'result':
+                return dict(step[1])
+            action, pending_only, task_id, position, name = step[1:]
+            if position and todos:
+                task_id = todos.first_id() if position == 'first' else todos.last_id()
+            # Exact, substring, all-words, then partial-words match; only pending todos can be completed
+            if not task_id and todos:
+                task_id = todos.find_by_name(name, pending_only=pending_only)
+            if task_id:
+                return AIAssistant._task_action(action, task_id)
         return None
     
     @staticmethod
-    def _claude_fallback(user_input, existing_todos):
-        """Use Anthropic Claude API for natural language processing"""
+    def _claude_fallback(user_input, todos, client=None):
+        """Use Anthropic Claude API for natural language processing
+
+        Replies are cached per phrasing and todo context, so a repeated
+        message is answered without calling the API again. client can be any
+        object with the LLMClient.complete signature (e.g. a test stub).
+        """
         try:
-            import anthropic
+            # Limit context to avoid token limits
+            existing_todos = todos.sample(5)
             
-            client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+            cache_key = FallbackCache.make_key(user_input, existing_todos, todos.tenant_id)
+            cached = fallback_cache.get(cache_key)
+            if cached is not None:
+                chat_messages.inc('fallback_cache')
+                return cached
             
-            # Create context about existing todos
-            todos_context = "\n".join([
-                f"- {todo['title']} (ID: {todo['id']}, Status: {'Completed' if todo['completed'] else 'Pending'}, Priority: {todo['priority']})"
-                for todo in existing_todos[:5]  # Limit context to avoid token limits
-            ])
+            if client is None:
+                client = llm_client
             
-            prompt = f"""You are a todo list assistant. Parse the user's request and respond with ONLY valid JSON.
-
-Current todos:
-{todos_context if todos_context else "No existing todos"}
-
-For the user request: "{user_input}"
-
-Return JSON in one of these formats:
+            prompt = AIAssistant._build_fallback_prompt(user_input, existing_todos)
+            
+            with span('fallback', fallback_latency, 'single'):
+                response_text = client.complete(
+                    prompt,
+                    model="claude-3-haiku-20240307",
+                    max_tokens=300,
+                    temperature=0.1
+                ).strip()
+            logger.debug("Claude response", extra={'reply': response_text})
+            chat_messages.inc('fallback')
+            
+            result = AIAssistant._parse_claude_reply(response_text)
+            if result is None:
+                # Fallback response
+                return {
+                    "action": "response", 
+                    "message": f"I understood '{user_input}' but had trouble processing it. Please try rephrasing your request."
+                }
+            
+            # Drop the cached reply once any todo it was based on changes
+            referenced_ids = [todo['id'] for todo in existing_todos] + [result.get('id')]
+            fallback_cache.put(cache_key, result, referenced_ids)
+            return result
+                
+        except Exception as e:
+            logger.warning("Claude API error", extra={'error': e})
+            raise  # Re-raise to trigger graceful fallback
+    
+    @staticmethod
+    def resolve_batch_with_fallback(user_inputs, todos, client=None):
+        """Fallback step for many messages: one Claude call for all of them.
 
-1. CREATE todo:
+        Returns one action per message, in order. Cached replies are reused;
+        a message Claude can't answer gets the help message.
+        """
+        user_inputs = [user_input.lower().strip() for user_input in user_inputs]
+        if isinstance(todos, list):
+            todos = TodoSnapshot(todos)
+        
+        actions = [None] * len(user_inputs)
+        try:
+            existing_todos = todos.sample(5)
+            cache_keys = [FallbackCache.make_key(user_input, existing_todos, todos.tenant_id)
+                          for user_input in user_inputs]
+            for position, cache_key in enumerate(cache_keys):
+                actions[position] = fallback_cache.get(cache_key)
+                if actions[position] is not None:
+                    chat_messages.inc('fallback_cache')
+            
+            missing = [position for position, action in enumerate(actions) if action is None]
+            if missing:
+                if client is None:
+                    client = llm_client
+                
+                prompt = AIAssistant._build_batch_fallback_prompt(
+                    [user_inputs[position] for position in missing], existing_todos
+                )
+                with span('fallback', fallback_latency, 'batch'):
+                    response_text = client.complete(
+                        prompt,
+                        model="claude-3-haiku-20240307",
+                        max_tokens=min(150 * len(missing) + 100, 4096),
+                        temperature=0.1
+                    ).strip()
+                logger.debug("Claude batch response", extra={'reply': response_text})
+                
+                replies = AIAssistant._parse_claude_batch_reply(response_text)
+                if len(replies) != len(missing):
+                    # Can't tell which action belongs to which request
+                    logger.warning("Claude batch reply doesn't match the requests",
+                                   extra={'actions': len(replies), 'requests': len(missing)})
+                    replies = []
+                for position, reply in zip(missing, replies):
+                    if reply is None:
+                        continue
+                    actions[position] = reply
+                    chat_messages.inc('fallback')
+                    referenced_ids = [todo['id'] for todo in existing_todos] + [reply.get('id')]
+                    fallback_cache.put(cache_keys[position], reply, referenced_ids)
+        except Exception as e:
+            logger.warning("Claude API batch fallback error", extra={'error': e})
+        
+        unresolved = sum(1 for action in actions if action is None)
+        if unresolved:
+            chat_messages.inc('help', amount=unresolved)
+        return [
+            action if action is not None else AIAssistant.help_response(user_input)
+            for user_input, action in zip(user_inputs, actions)
+        ]
+    
+    @staticmethod
+    def _fallback_todos_context(existing_todos):
+        # Create context about existing todos
+        todos_context = "\n".join([
+            f"- {todo['title']} (ID: {todo['id']}, Status: {'Completed' if todo['completed'] else 'Pending'}, Priority: {todo['priority']})"
+            for todo in existing_todos
+        ])
+        return todos_context if todos_context else "No existing todos"
+    
+    @staticmethod
+    def _fallback_action_formats(existing_todos):
+        return f"""1. CREATE todo:
 {{"action": "create", "title": "task title", "description": "optional description", "priority": "low|medium|high"}}
 
 2. UPDATE/COMPLETE todo:
@@ -356,65 +1058,1035 @@ Examples:
 - "add buy milk" → {{"action": "create", "title": "Buy milk", "priority": "medium"}}
 - "complete task 1" → {{"action": "update", "id": 1, "completed": true}}
 - "delete first task" → {{"action": "delete", "id": {existing_todos[0]['id'] if existing_todos else 1}}}
-- "show all tasks" → {{"action": "list", "filter": "all"}}
+- "show all tasks" → {{"action": "list", "filter": "all"}}"""
+    
+    @staticmethod
+    def _build_fallback_prompt(user_input, existing_todos):
+        prompt = f"""You are a todo list assistant. Parse the user's request and respond with ONLY valid JSON.
+
+Current todos:
+{AIAssistant._fallback_todos_context(existing_todos)}
+
+For the user request: "{user_input}"
+
+Return JSON in one of these formats:
+
+{AIAssistant._fallback_action_formats(existing_todos)}
 
 RESPOND WITH ONLY JSON - NO OTHER TEXT."""
+        return prompt
+    
+    @staticmethod
+    def _build_batch_fallback_prompt(user_inputs, existing_todos):
+        requests_list = "\n".join(
+            f"{number}. \"{user_input}\"" for number, user_input in enumerate(user_inputs, 1)
+        )
+        prompt = f"""You are a todo list assistant. Parse each of the user's numbered requests and respond with ONLY a valid JSON array holding one action object per request, in the same order.
 
-            message = client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=300,
-                temperature=0.1,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            response_text = message.content[0].text.strip()
-            print(f"Claude response: {response_text}")  # Debug log
+Current todos:
+{AIAssistant._fallback_todos_context(existing_todos)}
+
+User requests:
+{requests_list}
+
+Each action uses one of these formats:
+
+{AIAssistant._fallback_action_formats(existing_todos)}
+
+RESPOND WITH ONLY A JSON ARRAY OF {len(user_inputs)} ACTIONS - NO OTHER TEXT."""
+        return prompt
+    
+    @staticmethod
+    def _parse_claude_batch_reply(response_text):
+        """Parse the JSON array of actions in a Claude reply; bad entries become None"""
+        try:
+            replies = json.loads(response_text)
+        except json.JSONDecodeError:
+            json_match = JSON_ARRAY_RE.search(response_text)
+            if not json_match:
+                return []
+            try:
+                replies = json.loads(json_match.group())
+            except json.JSONDecodeError:
+                return []
+        
+        if not isinstance(replies, list):
+            return []
+        return [reply if isinstance(reply, dict) and 'action' in reply else None for reply in replies]
+    
+    @staticmethod
+    def _parse_claude_reply(response_text):
+        """Parse the JSON action in a Claude reply, or return None"""
+        try:
+            result = json.loads(response_text)
+        except json.JSONDecodeError as je:
+            logger.debug("Claude JSON parse error", extra={'error': je, 'reply': response_text})
             
-            # Parse JSON response
+            # Try to extract JSON from the response if it's wrapped in other text
+            json_match = JSON_OBJECT_RE.search(response_text)
+            if not json_match:
+                return None
             try:
-                return json.loads(response_text)
-            except json.JSONDecodeError as je:
-                print(f"Claude JSON parse error: {je}")
-                print(f"Raw Claude response: {response_text}")
-                
-                # Try to extract JSON from the response if it's wrapped in other text
-                import re
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    try:
-                        return json.loads(json_match.group())
-                    except:
-                        pass
-                
-                # Fallback response
-                return {
-                    "action": "response", 
-                    "message": f"I understood '{user_input}' but had trouble processing it. Please try rephrasing your request."
-                }
-                
-        except Exception as e:
-            print(f"Claude API error: {e}")
-            raise  # Re-raise to trigger graceful fallback
+                result = json.loads(json_match.group())
+            except json.JSONDecodeError:
+                return None
+        
+        return result if isinstance(result, dict) and 'action' in result else None
     
 
+# Query helpers for listing todos
+
+# Columns the list endpoint can sort (and page) by; the id is always the tie-breaker
+SORTABLE_COLUMNS = {
+    'id': Todo.id,
+    'created_at': Todo.created_at,
+    'updated_at': Todo.updated_at,
+    'due_date': Todo.due_date,
+}
+DATETIME_SORT_COLUMNS = {'created_at', 'updated_at', 'due_date'}
+MAX_PAGE_SIZE = 1000
+
+
+class QueryError(ValueError):
+    """Raised when list query parameters are invalid"""
+
+
+def _parse_bool_arg(name, value):
+    value = value.lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise QueryError(f"'{name}' must be true or false")
+
+
+def _parse_datetime_arg(name, value):
+    try:
+        return parse_due_date(value)
+    except ValueError:
+        raise QueryError(f"'{name}' must be an ISO 8601 date or datetime")
+
+
+def encode_cursor(sort_key, todo):
+    """Encode the keyset position of a todo (or row) as an opaque cursor string"""
+    value = getattr(todo, sort_key)
+    if sort_key in DATETIME_SORT_COLUMNS:
+        value = format_datetime(value)
+    payload = json.dumps([sort_key, value, todo.id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(sort_key, cursor):
+    """Decode a cursor produced by encode_cursor, returning (value, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_key, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_key != sort_key:
+            raise QueryError("'cursor' was issued for a different sort order")
+        if value is not None and sort_key in DATETIME_SORT_COLUMNS:
+            value = datetime.fromisoformat(value)
+        return value, int(last_id)
+    except QueryError:
+        raise
+    except (ValueError, TypeError):
+        raise QueryError("'cursor' is malformed")
+
+
+def parse_fields_arg(args):
+    """The todo fields requested with ?fields=a,b,c (all fields by default)"""
+    if not args.get('fields'):
+        return TODO_FIELDS
+    fields = []
+    for field in args['fields'].split(','):
+        field = field.strip()
+        if field not in TODO_FIELDS:
+            raise QueryError(f"'fields' must be a comma separated list of: {', '.join(TODO_FIELDS)}")
+        if field not in fields:
+            fields.append(field)
+    return tuple(fields)
+
+
+def todo_columns(fields):
+    """Column expressions selecting fields as a plain row.
+
+    On SQLite, datetimes come back as the raw stored strings, which
+    format_datetime turns into isoformat() without parsing them.
+    """
+    raw_datetimes = db.engine.dialect.name == 'sqlite'
+    columns = []
+    for field in fields:
+        column = Todo.__table__.c[field]
+        if raw_datetimes and field in DATETIME_FIELDS:
+            column = type_coerce(column, db.String).label(field)
+        columns.append(column)
+    return columns
+
+
+def filtered_todo_query(args):
+    """Build a query over the request tenant's todos from the completed/priority/due_date filters in args"""
+    query = tenant_todos()
+
+    if args.get('completed'):
+        query = query.filter(Todo.completed == _parse_bool_arg('completed', args['completed']))
+    if args.get('priority'):
+        priorities = [p.strip() for p in args['priority'].split(',') if p.strip()]
+        query = query.filter(Todo.priority.in_(priorities))
+    if args.get('due_after'):
+        query = query.filter(Todo.due_date >= _parse_datetime_arg('due_after', args['due_after']))
+    if args.get('due_before'):
+        query = query.filter(Todo.due_date < _parse_datetime_arg('due_before', args['due_before']))
+
+    return query
+
+
+def _keyset_condition(column, descending, value, last_id):
+    """Rows strictly after (value, last_id) in the requested order.
+
+    NULLs sort first when ascending and last when descending, on every backend.
+    """
+    if descending:
+        if value is None:
+            return db.and_(column.is_(None), Todo.id < last_id)
+        return db.or_(column < value,
+                      db.and_(column == value, Todo.id < last_id),
+                      column.is_(None))
+    if value is None:
+        return db.or_(db.and_(column.is_(None), Todo.id > last_id),
+                      column.isnot(None))
+    return db.or_(column > value, db.and_(column == value, Todo.id > last_id))
+
+
+def list_todos_page(args, fields=TODO_FIELDS):
+    """Apply filters, sorting and keyset pagination from the request args.
+
+    Returns (rows, next_cursor). Each row starts with the columns in fields,
+    followed by the id and sort column if they were not requested; pass rows
+    to rows_to_dicts. next_cursor is None on the last page or when no limit
+    was requested.
+    """
+    query = filtered_todo_query(args)
+
+    sort = args.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort_key = sort.lstrip('-')
+    if sort_key not in SORTABLE_COLUMNS:
+        raise QueryError(f"'sort' must be one of: {', '.join(SORTABLE_COLUMNS)}")
+    column = SORTABLE_COLUMNS[sort_key]
+
+    selected = list(fields) + [key for key in ('id', sort_key) if key not in fields]
+    query = query.with_entities(*todo_columns(selected))
+
+    if args.get('cursor'):
+        value, last_id = decode_cursor(sort_key, args['cursor'])
+        if sort_key == 'id':
+            query = query.filter(Todo.id < last_id if descending else Todo.id > last_id)
+        else:
+            query = query.filter(_keyset_condition(column, descending, value, last_id))
+
+    if sort_key == 'id':
+        order = [Todo.id.desc() if descending else Todo.id.asc()]
+    elif descending:
+        order = [column.desc().nullslast(), Todo.id.desc()]
+    else:
+        order = [column.asc().nullsfirst(), Todo.id.asc()]
+    query = query.order_by(*order)
+
+    limit = args.get('limit')
+    if limit is None:
+        return query.all(), None
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise QueryError("'limit' must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise QueryError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+
+    # Fetch one extra row to learn whether another page exists
+    todos = query.limit(limit + 1).all()
+    if len(todos) <= limit:
+        return todos, None
+    todos = todos[:limit]
+    return todos, encode_cursor(sort_key, todos[-1])
+
+
+# Streaming export of the todo table
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+
+
+def iter_todo_export(query, fmt='ndjson', batch_size=DEFAULT_EXPORT_BATCH_SIZE, fields=TODO_FIELDS):
+    """Yield the todos matched by query as NDJSON lines or a JSON array.
+
+    Rows are fetched from the database batch_size at a time and each batch is
+    encoded and yielded before the next one is read, so memory use does not
+    grow with the size of the table.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise QueryError(f"'format' must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    if fmt == 'json':
+        yield '['
+    separator = '\n' if fmt == 'ndjson' else ','
+    first = True
+    batch = []
+
+    rows = query.with_entities(*todo_columns(fields)).order_by(Todo.id).yield_per(batch_size)
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _join_export_batch(batch, fields, fmt, separator, first)
+            first = False
+            batch = []
+
+    if batch:
+        yield _join_export_batch(batch, fields, fmt, separator, first)
+    if fmt == 'json':
+        yield ']\n'
+
+
+def _join_export_batch(batch, fields, fmt, separator, first):
+    # Keys stay in to_dict() order, as the export has always written them
+    chunk = separator.join(
+        encode_json(todo, sort_keys=False).decode() for todo in rows_to_dicts(batch, fields)
+    )
+    if fmt == 'ndjson':
+        return chunk + '\n'
+    return chunk if first else ',' + chunk
+
+
+# Batched create/update/delete
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+TODO_WRITABLE_FIELDS = ('title', 'description', 'completed', 'priority', 'due_date')
+MAX_BATCH_OPERATIONS = 50000
+# Stay well below SQLite's bound parameter limit for IN (...) lists
+ID_CHUNK_SIZE = 500
+
+
+class BatchError(ValueError):
+    """Raised when a batch request or one of its operations is invalid"""
+
+
+def _todo_values_from_payload(data, creating):
+    """Validate a todo payload and convert it to column values"""
+    if not isinstance(data, dict):
+        raise BatchError("'data' must be an object")
+
+    values = {field: data[field] for field in TODO_WRITABLE_FIELDS if field in data}
+
+    # Checked here, per item, so a mistyped field never reaches the database (or a write-behind flush)
+    if not isinstance(values.get('title', ''), str):
+        raise BatchError("'title' must be a string")
+    if not isinstance(values.get('priority', ''), str):
+        raise BatchError("'priority' must be a string")
+    if not isinstance(values.get('description', ''), (str, type(None))):
+        raise BatchError("'description' must be a string or null")
+    if not isinstance(values.get('completed', False), bool):
+        raise BatchError("'completed' must be true or false")
+
+    if creating:
+        if not values.get('title'):
+            raise BatchError("'title' is required")
+        values.setdefault('description', '')
+        values.setdefault('priority', 'medium')
+        values.setdefault('completed', False)
+        values.setdefault('due_date', None)
+    elif 'title' in values and not values['title']:
+        raise BatchError("'title' cannot be empty")
+
+    if 'due_date' in values:
+        try:
+            values['due_date'] = parse_due_date(values['due_date'])
+        except (TypeError, ValueError):
+            raise BatchError("'due_date' must be an ISO 8601 date or datetime")
+    return values
+
+
+def parse_batch_operation(operation):
+    """Validate one batch operation, returning (op, todo_id, values)"""
+    if not isinstance(operation, dict):
+        raise BatchError('operation must be an object')
+
+    op = operation.get('op')
+    if op not in BATCH_OPERATIONS:
+        raise BatchError(f"'op' must be one of: {', '.join(BATCH_OPERATIONS)}")
+
+    if op == 'create':
+        return op, None, _todo_values_from_payload(operation.get('data'), creating=True)
+
+    todo_id = operation.get('id')
+    if not isinstance(todo_id, int) or isinstance(todo_id, bool):
+        raise BatchError("'id' must be an integer")
+    if op == 'delete':
+        return op, todo_id, None
+    return op, todo_id, _todo_values_from_payload(operation.get('data', {}), creating=False)
+
+
+def _chunked(items, size=ID_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _existing_todo_ids(todo_ids, tenant_id):
+    existing = set()
+    for chunk in _chunked(sorted(set(todo_ids))):
+        existing.update(db.session.execute(
+            db.select(Todo.id).where(Todo.tenant_id == tenant_id, Todo.id.in_(chunk))
+        ).scalars())
+    return existing
+
+
+def _bulk_insert_todos(rows, now, tenant_id):
+    """Insert a tenant's rows stamped with now using one executemany; returns the new ids in order"""
+    table = Todo.__table__
+    if db.engine.dialect.name != 'sqlite':
+        stmt = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+        return db.session.execute(stmt, [dict(row, tenant_id=tenant_id, created_at=now, updated_at=now)
+                                         for row in rows]).scalars().all()
+
+    # With SQLite's write lock held from before the last id is read, no other
+    # connection can insert in between. AUTOINCREMENT gives each row one more
+    # than the larger of the table's max id and its sqlite_sequence entry, so
+    # the new ids are the next len(rows) after that, with no read-back.
+    # Sending pre-bound tuples straight to the driver's executemany avoids
+    # both per-row RETURNING and per-row parameter processing in SQLAlchemy.
+    columns = ('tenant_id', 'title', 'description', 'completed', 'priority', 'due_date', 'created_at', 'updated_at')
+    dialect = db.engine.dialect
+    to_db_datetime = table.c.created_at.type.dialect_impl(dialect).bind_processor(dialect)
+    stamp = to_db_datetime(now)
+    params = [
+        (tenant_id, row['title'], row['description'], row['completed'], row['priority'],
+         to_db_datetime(row['due_date']) if row['due_date'] else None, stamp, stamp)
+        for row in rows
+    ]
+    connection = db.session.connection()
+    storage.hold_write_lock(connection)
+    last_id = connection.exec_driver_sql(
+        f"SELECT max(coalesce((SELECT max(id) FROM {table.name}), 0),"
+        f" coalesce((SELECT seq FROM sqlite_sequence WHERE name = ?), 0))", (table.name,)
+    ).scalar()
+    # Trigger-maintained indexes stand aside for the insert and catch up with
+    # one statement each, which is several times faster than row by row
+    index_fts = todo_search.uses_fts(connection)
+    count = todo_stats.uses_counters(connection)
+    if index_fts or count:
+        connection.exec_driver_sql(f"INSERT INTO {todo_search.bulk_table} (active) VALUES (1)")
+    try:
+        connection.exec_driver_sql(
+            f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            params
+        )
+        new_ids = range(last_id + 1, last_id + 1 + len(params))
+        if new_ids:
+            # Only this statement's rows, whatever else is in the table
+            if index_fts:
+                todo_search.index_inserted(connection, new_ids[0], new_ids[-1])
+            if count:
+                todo_stats.count_inserted(connection, new_ids[0], new_ids[-1])
+    finally:
+        if index_fts or count:
+            connection.exec_driver_sql(f"DELETE FROM {todo_search.bulk_table}")
+    return new_ids
+
+
+def _bulk_update_todos(mappings):
+    """Update rows by id with one executemany per distinct set of columns"""
+    table = Todo.__table__
+    groups = {}
+    for mapping in mappings:
+        groups.setdefault(tuple(sorted(mapping)), []).append(mapping)
+
+    for columns, group in groups.items():
+        stmt = table.update().where(table.c.id == db.bindparam('_id')).values(
+            {column: db.bindparam(column) for column in columns if column != 'id'}
+        )
+        # Parameters are only the SET columns and _id: a leftover 'id' key would add SET id = ?
+        db.session.execute(stmt, [
+            dict({column: mapping[column] for column in columns if column != 'id'}, _id=mapping['id'])
+            for mapping in group
+        ])
+
+
+def _serialize_datetimes(values):
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in values.items()}
+
+
+def _todo_snapshot(todo_id, values, stamp):
+    """The to_dict() form of a row inserted with create values at stamp (the time's isoformat())"""
+    snapshot = dict(values, id=todo_id, created_at=stamp, updated_at=stamp)
+    if values['due_date'] is not None:
+        snapshot['due_date'] = values['due_date'].isoformat()
+    return snapshot
+
+
+def _apply_batch_segment(op, items, results, tenant_id):
+    """Apply a run of a tenant's same-kind operations with a single bulk statement.
+
+    items is a list of (index, todo_id, values). Results for each item are
+    written into results; returns the number of failed items. Ids of other
+    tenants' todos count as not found.
+    """
+    if op == 'create':
+        now = datetime.utcnow()
+        new_ids = _bulk_insert_todos([values for _, _, values in items], now, tenant_id)
+        stamp = now.isoformat()
+        changes = []
+        for (index, _, values), todo_id in zip(items, new_ids):
+            results[index] = {'index': index, 'op': op, 'status': 201, 'id': todo_id}
+            changes.append(('create', _todo_snapshot(todo_id, values, stamp)))
+        record_todo_changes(db.session, changes, tenant_id)
+        return 0
+
+    existing = _existing_todo_ids([todo_id for _, todo_id, _ in items], tenant_id)
+    found = []
+    for index, todo_id, values in items:
+        if todo_id in existing:
+            found.append((index, todo_id, values))
+            results[index] = {'index': index, 'op': op, 'status': 200 if op == 'update' else 204, 'id': todo_id}
+        else:
+            results[index] = {'index': index, 'op': op, 'status': 404, 'id': todo_id, 'error': 'Todo not found'}
+
+    if op == 'update':
+        now = datetime.utcnow()
+        # Queued write-behind updates carry the time they were made
+        mappings = [{'updated_at': now, **values, 'id': todo_id} for _, todo_id, values in found]
+        _bulk_update_todos(mappings)
+        record_todo_changes(db.session, [('update', _serialize_datetimes(mapping)) for mapping in mappings],
+                            tenant_id)
+    else:
+        deleted_ids = sorted({todo_id for _, todo_id, _ in found})
+        for chunk in _chunked(deleted_ids):
+            db.session.execute(db.delete(Todo).where(Todo.id.in_(chunk)).execution_options(synchronize_session=False))
+        record_todo_changes(db.session, [('delete', {'id': todo_id}) for todo_id in deleted_ids], tenant_id)
+
+    return len(items) - len(found)
+
+
+def _rolled_back(results, parsed):
+    """Results of an atomic batch that was rolled back: nothing but the failures stands"""
+    for index, op, todo_id, values in parsed:
+        if results[index] is None or results[index]['status'] < 400:
+            results[index] = {'index': index, 'op': op, 'status': 424,
+                              'error': 'Not applied: the batch was rolled back'}
+            if op != 'create':
+                results[index]['id'] = todo_id
+    return results
+
+
+def apply_todo_batch(operations, atomic=False, tenant_id=DEFAULT_TENANT):
+    """Apply a tenant's mixed create/update/delete operations in a single transaction.
+
+    Consecutive operations of the same kind are grouped and written with one
+    executemany statement, which preserves request order while avoiding a
+    round-trip per row. In atomic mode any failed operation rolls back the
+    whole batch, and the operations that did not fail themselves get status
+    424 and no new ids. Returns (results, committed).
+    """
+    results = [None] * len(operations)
+    parsed = []
+    failures = 0
+
+    for index, operation in enumerate(operations):
+        try:
+            parsed.append((index,) + parse_batch_operation(operation))
+        except BatchError as e:
+            op = operation.get('op') if isinstance(operation, dict) else None
+            results[index] = {'index': index, 'op': op, 'status': 400, 'error': str(e)}
+            failures += 1
+
+    if failures and atomic:
+        return _rolled_back(results, parsed), False
+
+    try:
+        segment_op, segment = None, []
+        for index, op, todo_id, values in parsed:
+            if op != segment_op and segment:
+                failures += _apply_batch_segment(segment_op, segment, results, tenant_id)
+                segment = []
+            segment_op = op
+            segment.append((index, todo_id, values))
+        if segment:
+            failures += _apply_batch_segment(segment_op, segment, results, tenant_id)
+
+        if failures and atomic:
+            db.session.rollback()
+            return _rolled_back(results, parsed), False
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return results, True
+
+
+def _flush_todo_updates(updates):
+    """Commit queued updates ({(tenant_id, todo_id): values}) in one transaction; returns the todos written"""
+    by_tenant = _group_by_tenant((tenant_id, (todo_id, values)) for (tenant_id, todo_id), values in updates.items())
+    written = 0
+    with app.app_context():
+        try:
+            for tenant_id, items in by_tenant.items():
+                # Todos deleted since their update was queued are skipped
+                written += len(items) - _apply_batch_segment(
+                    'update', [(index, todo_id, values) for index, (todo_id, values) in enumerate(items)],
+                    [None] * len(items), tenant_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return written
+
+# PUT updates waiting to be committed (WRITE_BEHIND_ENABLED only)
+todo_updates = WriteBehindQueue(_flush_todo_updates, interval=app.config['WRITE_BEHIND_INTERVAL'],
+                                max_pending=app.config['WRITE_BEHIND_MAX_PENDING'])
+
+# Requests that show queued updates by overlaying them on the rows they read
+OVERLAID_ENDPOINTS = ('update_todo', 'get_todos', 'get_todo')
+
+def queued_todo_updates(tenant_id):
+    """{todo_id: fields} of the tenant's updates queued but not yet committed"""
+    return {todo_id: values for (_, todo_id), values
+            in todo_updates.overlays(lambda key: key[0] == tenant_id).items()}
+
+def _overlay_queued(todo, queued):
+    """todo (a dict) with the queued fields it has, as the response would show them after the commit"""
+    return dict(todo, **{field: value for field, value in _serialize_datetimes(queued).items() if field in todo})
+
+@app.before_request
+def _settle_queued_updates():
+    # Other API requests read or write todos in SQL, where queued updates
+    # aren't visible: commit the tenant's queue first, so the request sees
+    # them and its own writes are ordered after them. Plain reads of todos
+    # overlay the queue instead, so bursts of updates still coalesce.
+    if request.endpoint in OVERLAID_ENDPOINTS or not request.path.startswith('/api/'):
+        return
+    tenant_id = current_tenant()
+    queued_here = lambda key: key[0] == tenant_id
+    if todo_updates.has_pending(queued_here):
+        todo_updates.flush()
+        # A failed flush leaves them queued; the rows would be stale
+        if todo_updates.has_pending(queued_here):
+            response = jsonify({'error': 'Queued todo updates could not be saved yet, try again'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+
+
+def encode_json_body(obj):
+    """JSON response body for obj, byte-identical to what jsonify(obj) sends"""
+    json_provider = app.json
+    pretty = json_provider.compact is False or (json_provider.compact is None and app.debug)
+    return encode_json(obj, sort_keys=json_provider.sort_keys, pretty=pretty) + b'\n'
+
+
+def _set_list_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Clients may keep the list but must revalidate it every time
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+MAX_LONG_POLL_WAIT = 30
+
+
+def list_todo_changes(since, limit, tenant_id=None):
+    """The latest change of each of a tenant's todos changed after seq since, oldest first.
+
+    Returns (changes, has_more). A todo that changed several times is listed
+    once, with its current state; deleted todos come back with todo None.
+    With tenant_id None every tenant's changes are listed, each carrying its
+    'tenant_id' (the change follower reads the log this way).
+    """
+    latest = (
+        db.select(db.func.max(TodoChange.seq).label('seq'))
+        .where(TodoChange.seq > since)
+        .group_by(TodoChange.tenant_id, TodoChange.todo_id)
+    )
+    if tenant_id is not None:
+        latest = latest.where(TodoChange.tenant_id == tenant_id)
+    latest = latest.subquery()
+    query = (
+        db.select(TodoChange.seq, TodoChange.op, TodoChange.todo_id, TodoChange.tenant_id,
+                  *todo_columns(TODO_FIELDS))
+        .join(latest, TodoChange.seq == latest.c.seq)
+        .outerjoin(Todo, db.and_(Todo.id == TodoChange.todo_id, Todo.tenant_id == TodoChange.tenant_id))
+        .order_by(TodoChange.seq)
+        .limit(limit + 1)
+    )
+    rows = db.session.execute(query).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    todos = rows_to_dicts([row[4:] for row in rows], TODO_FIELDS)
+    changes = []
+    for row, todo in zip(rows, todos):
+        if todo['id'] is None:
+            change = {'seq': row.seq, 'op': 'delete', 'id': row.todo_id, 'todo': None}
+        else:
+            change = {'seq': row.seq, 'op': row.op, 'id': row.todo_id, 'todo': todo}
+        if tenant_id is None:
+            change['tenant_id'] = row.tenant_id
+        changes.append(change)
+    return changes, has_more
+
+
+# collection_state row holding the highest seq dropped by age; older cursors can't be served
+CHANGE_LOG_HORIZON = 'todo_changes/pruned'
+
+
+def change_log_horizon():
+    """Seq up to which the change log was pruned by age (0 if never)"""
+    return db.session.execute(
+        db.select(CollectionState.version).where(CollectionState.name == CHANGE_LOG_HORIZON)
+    ).scalar() or 0
+
+
+def prune_todo_changes(retention=None, now=None):
+    """Compact the change log and drop entries older than retention (a timedelta, None keeps them).
+
+    An entry with a newer one for the same todo is never what
+    list_todo_changes returns, for any cursor, so those go whatever their
+    age. Dropping by age removes a prefix of the log and records its last
+    seq as the horizon. The newest entry always stays, so seqs keep growing.
+    Returns the number of entries deleted.
+    """
+    table = TodoChange.__table__
+    newer = table.alias('newer')
+    deleted = 0
+    with app.app_context(), db.engine.begin() as connection:
+        storage.hold_write_lock(connection)
+        deleted += connection.execute(table.delete().where(
+            db.select(newer.c.seq).where(
+                newer.c.tenant_id == table.c.tenant_id, newer.c.todo_id == table.c.todo_id,
+                newer.c.seq > table.c.seq
+            ).exists()
+        )).rowcount
+        if retention is None:
+            return deleted
+
+        cutoff = (now or datetime.utcnow()) - retention
+        newest = connection.execute(db.select(db.func.max(table.c.seq))).scalar() or 0
+        horizon = connection.execute(
+            db.select(db.func.max(table.c.seq)).where(table.c.changed_at < cutoff, table.c.seq < newest)
+        ).scalar()
+        if horizon is None:
+            return deleted
+        deleted += connection.execute(table.delete().where(table.c.seq <= horizon)).rowcount
+        state = CollectionState.__table__
+        updated = connection.execute(
+            state.update().where(state.c.name == CHANGE_LOG_HORIZON)
+            .values(version=db.case((state.c.version > horizon, state.c.version), else_=horizon),
+                    updated_at=datetime.utcnow())
+        ).rowcount
+        if not updated:
+            connection.execute(state.insert().values(name=CHANGE_LOG_HORIZON, version=horizon,
+                                                     updated_at=datetime.utcnow()))
+    return deleted
+
+
+_change_log_pruned_at = None
+
+
+@app.before_request
+def _prune_change_log_now_and_then():
+    # On a thread of its own, so no request waits for it
+    global _change_log_pruned_at
+    now = time.monotonic()
+    if _change_log_pruned_at is not None and now - _change_log_pruned_at < app.config['CHANGE_LOG_PRUNE_INTERVAL']:
+        return
+    _change_log_pruned_at = now
+    hours = app.config['CHANGE_LOG_RETENTION_HOURS']
+    threading.Thread(target=_prune_change_log, args=(timedelta(hours=hours) if hours > 0 else None,),
+                     name='change-log-prune', daemon=True).start()
+
+
+def _prune_change_log(retention):
+    try:
+        deleted = prune_todo_changes(retention)
+    except Exception as e:
+        logger.warning("Pruning the change log failed", extra={'error': e})
+        return
+    if deleted:
+        logger.info("Pruned the change log", extra={'deleted': deleted})
+
+
+def _next_page_query(next_cursor):
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return urlencode(args)
+
+
 # API Routes
 
 @app.route('/api/todos', methods=['GET'])
 def get_todos():
-    todos = Todo.query.all()
-    return jsonify([todo.to_dict() for todo in todos])
+    # Read the version before the rows: a write racing this request can only
+    # make the body newer than its ETag, never older
+    tenant_id = current_tenant()
+    queued = queued_todo_updates(tenant_id)
+    if queued:
+        return _get_todos_with_queued_updates(queued)
+    version, last_modified = get_collection_version(tenant_id)
+    etag = f"{version}-{zlib.crc32(request.query_string):08x}"
+
+    if request.if_none_match.contains(etag):
+        return _set_list_validators(Response(status=304), etag, last_modified)
+
+    cache = todo_list_caches.get(tenant_id)
+    cached = cache.get(version, request.query_string)
+    if cached is None:
+        # Also read before the rows, so the cursor never skips a change
+        changes_cursor = latest_change_seq()
+        try:
+            fields = parse_fields_arg(request.args)
+            rows, next_cursor = list_todos_page(request.args, fields)
+        except QueryError as e:
+            return jsonify({'error': str(e)}), 400
+
+        with span('serialize', serialization_latency, 'todos'):
+            body = encode_json_body(rows_to_dicts(rows, fields))
+        # Where to start /api/todos/changes from after loading this list
+        headers = [('X-Changes-Cursor', str(changes_cursor))]
+        if next_cursor:
+            # Keep the body a plain list so existing clients are unaffected
+            headers.append(('X-Next-Cursor', next_cursor))
+            headers.append(('Link', f'<{request.path}?{_next_page_query(next_cursor)}>; rel="next"'))
+        cache.put(version, request.query_string, body, headers)
+    else:
+        body, headers = cached
+
+    response = Response(body, mimetype=app.json.mimetype, headers=list(headers))
+    return _set_list_validators(response, etag, last_modified)
+
+
+def _get_todos_with_queued_updates(queued):
+    """The list with write-behind updates overlaid; not cached and without validators, as it isn't committed yet.
+
+    Filters, sorting and paging see the committed rows.
+    """
+    changes_cursor = latest_change_seq()
+    try:
+        fields = parse_fields_arg(request.args)
+        rows, next_cursor = list_todos_page(request.args, fields)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    # Rows carry the id even when fields leave it out
+    id_column = fields.index('id') if 'id' in fields else len(fields)
+    todos = [_overlay_queued(todo, queued[row[id_column]]) if row[id_column] in queued else todo
+             for row, todo in zip(rows, rows_to_dicts(rows, fields))]
+    with span('serialize', serialization_latency, 'todos'):
+        body = encode_json_body(todos)
+    response = Response(body, mimetype=app.json.mimetype, headers=[('X-Changes-Cursor', str(changes_cursor))])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.path}?{_next_page_query(next_cursor)}>; rel="next"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.route('/api/todos/<int:todo_id>', methods=['GET'])
+def get_todo(todo_id):
+    todo = tenant_todos().filter(Todo.id == todo_id).first_or_404().to_dict()
+    queued = todo_updates.overlay((current_tenant(), todo_id))
+    return jsonify(_overlay_queued(todo, queued) if queued else todo)
+
+
+@app.route('/api/todos/changes', methods=['GET'])
+def get_todo_changes():
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', MAX_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': "'since' and 'limit' must be integers"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({'error': f"'limit' must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_LONG_POLL_WAIT)
+    except ValueError:
+        return jsonify({'error': "'wait' must be a number of seconds"}), 400
+
+    if since < change_log_horizon():
+        return jsonify({'error': "'since' is older than the change log; reload the list", 'resync': True}), 410
+
+    tenant_id = current_tenant()
+    changes, has_more = list_todo_changes(since, limit, tenant_id)
+    if not changes and wait > 0:
+        # Long-poll: end the read transaction, then sleep until one of the tenant's writes lands
+        db.session.rollback()
+        if todo_event_hub.wait_for_change(since, wait, topic=tenant_id):
+            changes, has_more = list_todo_changes(since, limit, tenant_id)
+    with span('serialize', serialization_latency, 'changes'):
+        body = encode_json_body({
+            'changes': changes,
+            'cursor': changes[-1]['seq'] if changes else since,
+            'has_more': has_more
+        })
+    return Response(body, mimetype=app.json.mimetype)
+
+
+def _sse_event(seq, op, todo):
+    return f"id: {seq}\nevent: {op}\ndata: {encode_json(todo).decode()}\n\n"
+
+
+# Seconds a client turned away for lack of a free stream should wait
+STREAM_RETRY_AFTER = 30
+
+
+@app.route('/api/todos/events', methods=['GET'])
+def stream_todo_events():
+    """Server-sent events for every committed change to the tenant's todos, plus reminders.
+
+    Event ids are change log seqs; reminder events have none. A reconnecting client (Last-Event-ID, or
+    ?since=) first gets what it missed from the change log. A client that
+    falls too far behind gets a resync event and should reload the list.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': "'Last-Event-ID' must be an integer"}), 400
+
+    tenant_id = current_tenant()
+    try:
+        subscription = todo_event_hub.subscribe(topic=tenant_id)
+    except HubFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(STREAM_RETRY_AFTER)}
+
+    # Subscribe before reading the log, so nothing committed in between is lost
+    replay = []
+    expired = since is not None and since < change_log_horizon()
+    while since is not None and not expired:
+        changes, has_more = list_todo_changes(since, MAX_PAGE_SIZE, tenant_id)
+        replay.extend(changes)
+        if changes:
+            since = changes[-1]['seq']
+        if not has_more:
+            break
+    db.session.rollback()
+    heartbeat = app.config['SSE_HEARTBEAT']
+
+    def stream():
+        sent = since or 0
+        try:
+            yield 'retry: 3000\n\n'
+            if expired:
+                # What was missed has been pruned from the log
+                yield "event: resync\ndata: {}\n\n"
+                return
+            for change in replay:
+                yield _sse_event(change['seq'], change['op'], change['todo'] or {'id': change['id']})
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if event is None:
+                    if subscription.overflowed:
+                        yield "event: resync\ndata: {}\n\n"
+                        return
+                    # Comment line keeps proxies from timing out and detects gone clients
+                    yield ': keep-alive\n\n'
+                    continue
+                if event[0] is None:
+                    # Notices such as reminders aren't changes and carry no id
+                    yield f"event: {event[1]}\ndata: {encode_json(event[2]).decode()}\n\n"
+                    continue
+                if event[0] <= sent:
+                    continue
+                sent = event[0]
+                yield _sse_event(*event)
+        finally:
+            subscription.close()
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+MAX_SEARCH_RESULTS = 100
+
+@app.route('/api/todos/search', methods=['GET'])
+def search_todos():
+    """Todos whose title or description match ?q=, best match first.
+
+    The last word also matches as a prefix. Each result carries its score and
+    the title and description with matches wrapped in <mark> tags (the text
+    itself is not HTML-escaped).
+    """
+    query = request.args.get('q', '').strip()
+    try:
+        if not query:
+            raise QueryError("'q' is required")
+        try:
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            raise QueryError("'limit' must be an integer")
+        if not 1 <= limit <= MAX_SEARCH_RESULTS:
+            raise QueryError(f"'limit' must be between 1 and {MAX_SEARCH_RESULTS}")
+        completed = None
+        if request.args.get('completed'):
+            completed = _parse_bool_arg('completed', request.args['completed'])
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    tenant_id = current_tenant()
+    hits = todo_search.search(db.session.connection(), query, tenant_id, limit, completed)
+    todos = {todo.id: todo for todo in tenant_todos(tenant_id).filter(Todo.id.in_([hit['id'] for hit in hits]))}
+    return jsonify({
+        'query': query,
+        'results': [
+            {'todo': todos[hit['id']].to_dict(), 'score': hit['score'], 'highlights': hit['highlights']}
+            for hit in hits if hit['id'] in todos
+        ]
+    })
+
+
+@app.route('/api/todos/stats', methods=['GET'])
+def get_todo_stats():
+    """Counts of the tenant's todos by status and priority, plus overdue and due this week.
+
+    Read from counters kept current by every write, so the cost does not
+    grow with the number of todos.
+    """
+    return jsonify(todo_stats.stats(db.session.connection(), current_tenant(), datetime.now()))
+
+
+@app.route('/api/todos/export', methods=['GET'])
+def export_todos():
+    fmt = request.args.get('format', 'ndjson')
+    try:
+        batch_size = int(request.args.get('batch_size', DEFAULT_EXPORT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({'error': "'batch_size' must be an integer"}), 400
+
+    try:
+        if not 1 <= batch_size <= 10000:
+            raise QueryError("'batch_size' must be between 1 and 10000")
+        if fmt not in EXPORT_FORMATS:
+            raise QueryError(f"'format' must be one of: {', '.join(EXPORT_FORMATS)}")
+        fields = parse_fields_arg(request.args)
+        query = filtered_todo_query(request.args)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return Response(
+        stream_with_context(iter_todo_export(query, fmt, batch_size, fields)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename=todos.{fmt}'}
+    )
 
 @app.route('/api/todos', methods=['POST'])
 def create_todo():
     data = request.get_json()
     
     todo = Todo(
+        tenant_id=current_tenant(),
         title=data['title'],
         description=data.get('description', ''),
         priority=data.get('priority', 'medium'),
-        due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None
+        due_date=parse_due_date(data.get('due_date'))
     )
     
     db.session.add(todo)
@@ -424,8 +2096,11 @@ def create_todo():
 
 @app.route('/api/todos/<int:todo_id>', methods=['PUT'])
 def update_todo(todo_id):
-    todo = Todo.query.get_or_404(todo_id)
     data = request.get_json()
+    if app.config['WRITE_BEHIND_ENABLED']:
+        return _queue_todo_update(todo_id, data)
+    
+    todo = tenant_todos().filter(Todo.id == todo_id).first_or_404()
     
     if 'title' in data:
         todo.title = data['title']
@@ -436,49 +2111,80 @@ def update_todo(todo_id):
     if 'priority' in data:
         todo.priority = data['priority']
     if 'due_date' in data:
-        todo.due_date = datetime.fromisoformat(data['due_date']) if data['due_date'] else None
+        todo.due_date = parse_due_date(data['due_date'])
     
     todo.updated_at = datetime.utcnow()
     db.session.commit()
     
     return jsonify(todo.to_dict())
 
+def _queue_todo_update(todo_id, data):
+    """Write-behind PUT: queue the update and reply with the row plus every update queued for it"""
+    try:
+        values = _todo_values_from_payload(data, creating=False)
+    except BatchError as e:
+        return jsonify({'error': str(e)}), 400
+    values['updated_at'] = datetime.utcnow()
+    queued = todo_updates.add((current_tenant(), todo_id), values)
+    # Read after queueing, so a flush that lands in between is either in the row or in queued.
+    # An update queued for a missing todo is dropped by the flush.
+    todo = tenant_todos().filter(Todo.id == todo_id).first_or_404()
+    return jsonify(_overlay_queued(todo.to_dict(), queued))
+
 @app.route('/api/todos/<int:todo_id>', methods=['DELETE'])
 def delete_todo(todo_id):
-    todo = Todo.query.get_or_404(todo_id)
+    todo = tenant_todos().filter(Todo.id == todo_id).first_or_404()
     db.session.delete(todo)
     db.session.commit()
     
     return '', 204
 
-@app.route('/api/chat', methods=['POST'])
-def chat_with_ai():
+@app.route('/api/todos/batch', methods=['POST'])
+def batch_todos():
     data = request.get_json()
-    user_input = data.get('message', '')
-    
-    # Get current todos for context
-    todos = Todo.query.all()
-    todos_data = [todo.to_dict() for todo in todos]
-    
-    # Process with AI
-    ai_response = AIAssistant.process_natural_language(user_input, todos_data)
-    
-    # Execute the action
+    operations = data.get('operations') if isinstance(data, dict) else None
+
+    if not isinstance(operations, list):
+        return jsonify({'error': "'operations' must be a list"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f"a batch can contain at most {MAX_BATCH_OPERATIONS} operations"}), 400
+
+    results, committed = apply_todo_batch(operations, atomic=bool(data.get('atomic', False)),
+                                          tenant_id=current_tenant())
+
+    # One result per operation, so encode_json_body's orjson path pays off here
+    body = encode_json_body({'committed': committed, 'results': results})
+    return Response(body, status=200 if committed else 400, mimetype=app.json.mimetype)
+
+def _save_chat_changes(commit):
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+
+def _execute_ai_action(ai_response, commit=True):
+    """Apply a parsed chat action and return its result for the response body
+
+    With commit=False the change is only flushed, so several actions can
+    share one transaction. Actions only see the request tenant's todos.
+    """
+    tenant_id = current_tenant()
     result = None
     if ai_response['action'] == 'create':
         todo = Todo(
+            tenant_id=tenant_id,
             title=ai_response['title'],
             description=ai_response.get('description', ''),
             priority=ai_response.get('priority', 'medium'),
-            due_date=datetime.fromisoformat(ai_response['due_date']) if ai_response.get('due_date') else None
+            due_date=parse_due_date(ai_response.get('due_date'))
         )
         db.session.add(todo)
-        db.session.commit()
+        _save_chat_changes(commit)
         result = todo.to_dict()
         
     elif ai_response['action'] == 'update':
-        todo = Todo.query.get(ai_response['id'])
-        if todo:
+        todo = db.session.get(Todo, ai_response['id'])
+        if todo and todo.tenant_id == tenant_id:
             if 'title' in ai_response:
                 todo.title = ai_response['title']
             if 'description' in ai_response:
@@ -488,21 +2194,24 @@ def chat_with_ai():
             if 'priority' in ai_response:
                 todo.priority = ai_response['priority']
             if 'due_date' in ai_response:
-                todo.due_date = datetime.fromisoformat(ai_response['due_date']) if ai_response['due_date'] else None
+                todo.due_date = parse_due_date(ai_response['due_date'])
             
             todo.updated_at = datetime.utcnow()
-            db.session.commit()
+            _save_chat_changes(commit)
             result = todo.to_dict()
         
     elif ai_response['action'] == 'delete':
-        todo = Todo.query.get(ai_response['id'])
-        if todo:
+        todo = db.session.get(Todo, ai_response['id'])
+        if todo and todo.tenant_id == tenant_id:
             db.session.delete(todo)
-            db.session.commit()
+            _save_chat_changes(commit)
             result = {'deleted': True, 'id': ai_response['id']}
     
+    elif ai_response['action'] == 'list' and ai_response.get('due') in DUE_RANGES:
+        result = list_due_todos(ai_response['due'], ai_response.get('filter', 'pending'), tenant_id)
+    
     elif ai_response['action'] == 'list':
-        query = Todo.query
+        query = tenant_todos(tenant_id)
         if ai_response.get('filter') == 'completed':
             query = query.filter_by(completed=True)
         elif ai_response.get('filter') == 'pending':
@@ -511,17 +2220,291 @@ def chat_with_ai():
         todos = query.all()
         result = [todo.to_dict() for todo in todos]
     
-    return jsonify({
+    return result
+
+def list_due_todos(due, status='pending', tenant_id=DEFAULT_TENANT):
+    """A tenant's todos due in a named range (see reminders.DUE_RANGES), soonest first
+
+    A range scan of the (tenant_id, due_date) index; the in-memory due-date
+    index spans every tenant and is left to the reminder scheduler.
+    """
+    start, end = due_range_bounds(due, datetime.now())
+    query = tenant_todos(tenant_id).filter(Todo.due_date.isnot(None))
+    if start is not None:
+        query = query.filter(Todo.due_date >= start)
+    if end is not None:
+        query = query.filter(Todo.due_date < end)
+    if status in ('pending', 'completed'):
+        query = query.filter(Todo.completed == (status == 'completed'))
+    return [todo.to_dict() for todo in query.order_by(Todo.due_date, Todo.id)]
+
+def _run_fallback_job(user_input, tenant_id):
+    """Background half of an async chat message: fallback, then apply the action"""
+    with app.app_context():
+        g.tenant_id = tenant_id
+        ai_response = AIAssistant.resolve_with_fallback(user_input, DatabaseTodoContext())
+        return {
+            'ai_response': ai_response,
+            'result': _execute_ai_action(ai_response)
+        }
+
+MAX_CHAT_BATCH_MESSAGES = 500
+
+def _wants_async_chat(data):
+    return bool(data.get('async')) or 'respond-async' in request.headers.get('Prefer', '')
+
+@app.route('/api/chat', methods=['POST'])
+def chat_with_ai():
+    data = request.get_json()
+    user_input = data.get('message', '')
+    
+    # Process with AI; todo context is only loaded as far as the command needs it
+    todos = DatabaseTodoContext()
+    ai_response = AIAssistant.parse_with_rules(user_input, todos)
+    
+    if ai_response is None:
+        if _wants_async_chat(data):
+            # Hand the LLM round-trip to a background job and answer right away
+            try:
+                job_id = chat_jobs.submit(_run_fallback_job, user_input, current_tenant(), owner=current_tenant())
+            except ChatJobsFull as e:
+                logger.warning("Chat job queue full", extra={'error': e})
+                ai_response = AIAssistant.help_response(user_input.lower().strip())
+            else:
+                return jsonify({'job_id': job_id, 'status': 'pending'}), 202, {
+                    'Location': f"{tenant_api_prefix(current_tenant())}/chat/jobs/{job_id}"
+                }
+        else:
+            ai_response = AIAssistant.resolve_with_fallback(user_input, todos)
+    
+    # A name that fit several todos equally well: say which others it could have meant
+    also_matched = []
+    if ai_response['action'] in ('update', 'delete'):
+        also_matched = todos.other_matches(ai_response['id'])
+    
+    # Execute the action
+    result = _execute_ai_action(ai_response)
+    
+    body = {
         'ai_response': ai_response,
         'result': result
-    })
+    }
+    if result and also_matched:
+        body['also_matched'] = also_matched
+    return jsonify(body)
+
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    data = request.get_json(silent=True) or {}
+    messages = data.get('messages')
+    if not isinstance(messages, list) or not all(isinstance(message, str) for message in messages):
+        return jsonify({'error': "'messages' must be a list of strings"}), 400
+    if len(messages) > MAX_CHAT_BATCH_MESSAGES:
+        return jsonify({'error': f"a batch can contain at most {MAX_CHAT_BATCH_MESSAGES} messages"}), 400
+    
+    # Every line is parsed against the same todo context, as it was before the batch
+    todos = DatabaseTodoContext()
+    ai_responses = [AIAssistant.parse_with_rules(message, todos) for message in messages]
+    
+    # Lines the rules can't handle share a single fallback call
+    unresolved = [index for index, ai_response in enumerate(ai_responses) if ai_response is None]
+    if unresolved:
+        fallback_responses = AIAssistant.resolve_batch_with_fallback(
+            [messages[index] for index in unresolved], todos
+        )
+        for index, ai_response in zip(unresolved, fallback_responses):
+            ai_responses[index] = ai_response
+    
+    # Apply the actions in order, all in one transaction
+    results = []
+    for index, (message, ai_response) in enumerate(zip(messages, ai_responses)):
+        try:
+            result = _execute_ai_action(ai_response, commit=False)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("Chat batch error", extra={'index': index, 'error': e})
+            return jsonify({
+                'committed': False,
+                'error': f"message {index} could not be applied: {e}",
+                'results': results
+            }), 400
+        results.append({'message': message, 'ai_response': ai_response, 'result': result})
+    
+    db.session.commit()
+    return jsonify({'committed': True, 'results': results})
+
+@app.route('/api/chat/jobs/<job_id>', methods=['GET'])
+def get_chat_job(job_id):
+    # Jobs of other tenants are not found
+    job = chat_jobs.get(job_id, owner=current_tenant())
+    if job is None:
+        return jsonify({'error': 'Chat job not found'}), 404
+    return jsonify(job)
+
+# Every API route again under /api/tenants/<tenant_id>, same view and endpoint;
+# the tenant id is moved from the URL values to g before the view runs
+for rule in list(app.url_map.iter_rules()):
+    if rule.rule.startswith('/api/'):
+        app.add_url_rule('/api/tenants/<tenant:tenant_id>' + rule.rule[len('/api'):], rule.endpoint,
+                         app.view_functions[rule.endpoint], methods=rule.methods - {'HEAD', 'OPTIONS'})
+
+# State of the caches, the LLM client and the background queues at scrape time
+metrics_registry.gauge('fallback_cache_entries', 'Entries in the Claude fallback cache',
+                       lambda: fallback_cache.stats()['entries'])
+metrics_registry.gauge('fallback_cache_hit_ratio', 'Share of fallback lookups answered from the cache',
+                       lambda: fallback_cache.stats()['hit_rate'])
+def _parse_cache_lookups():
+    stats = parse_cache.stats()
+    return {('hit',): stats['hits'], ('miss',): stats['misses']}
+
+metrics_registry.gauge('parse_cache_lookups', 'Chat parser plan cache lookups', _parse_cache_lookups, ('result',))
+metrics_registry.gauge('parse_cache_hit_ratio', 'Share of rule-based parses that reused a compiled plan',
+                       lambda: parse_cache.stats()['hit_rate'])
+metrics_registry.gauge('llm_calls', 'Claude API calls, failures, retries and breaker rejections', lambda: {
+    (key,): value for key, value in llm_client.stats().items() if key != 'breaker'
+}, ('kind',))
+metrics_registry.gauge('llm_circuit_open', '1 while the Claude circuit breaker is open',
+                       lambda: int(llm_client.stats()['breaker'] == 'open'))
+metrics_registry.gauge('chat_jobs_pending', 'Chat fallback jobs queued or running',
+                       lambda: chat_jobs.stats()['pending'])
+metrics_registry.gauge('event_subscribers', 'Open server-sent event streams',
+                       lambda: todo_event_hub.stats()['subscribers'])
+metrics_registry.gauge('reminders_scheduled', 'Todos with a reminder timer in the current window',
+                       lambda: reminder_scheduler.stats()['scheduled'])
+def _todo_list_cache_lookups():
+    stats = [cache.stats() for cache in todo_list_caches.values()]
+    return {('hit',): sum(s['hits'] for s in stats), ('miss',): sum(s['misses'] for s in stats)}
+
+metrics_registry.gauge('todo_list_cache_lookups', 'GET /api/todos response cache lookups',
+                       _todo_list_cache_lookups, ('result',))
+metrics_registry.gauge('write_behind_pending', 'Todos with updates queued for the next write-behind flush',
+                       lambda: todo_updates.stats()['pending'])
+metrics_registry.gauge('write_behind_updates', 'Write-behind updates queued, merged into a queued one, and flushed',
+                       lambda: {(key,): value for key, value in todo_updates.stats().items()
+                                if key in ('queued', 'coalesced', 'flushed', 'failures')}, ('kind',))
+metrics_registry.gauge('tenants_cached', 'Tenants with a title index in memory', lambda: len(title_indexes))
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Startup
+# Importing this module only defines the app, its models and routes. The work
+# that touches the outside world (creating the database engine, the schema)
+# happens once, in create_app(), called by whatever serves or scripts the app:
+# wsgi.py, gunicorn.conf.py, python app.py and the command line tools.
+_app_ready = False
+
+def create_app(create_schema=False):
+    """Bind the database to the app, once; create_schema also creates missing tables"""
+    global _app_ready
+    if not _app_ready:
+        db.init_app(app)
+        with app.app_context():
+            # WAL, synchronous=NORMAL, busy timeout and mmap on every SQLite connection
+            storage.configure_engine(db.engine)
+            event.listen(db.engine, 'before_cursor_execute', _start_query_timer)
+            event.listen(db.engine, 'after_cursor_execute', _record_query_time)
+            event.listen(db.engine, 'handle_error', _discard_query_timer)
+        _app_ready = True
+    if create_schema:
+        create_tables()
+    return app
 
-# Initialize database
 def create_tables():
     with app.app_context():
         db.create_all()
+        ensure_tenant_columns()
+        ensure_todo_ids_not_reused()
+        ensure_indexes()
+        ensure_collection_state()
+        with db.engine.begin() as connection:
+            todo_search.install(connection)
+            todo_stats.install(connection)
+
+def ensure_collection_state():
+    """Create the default tenant's collection version row if it does not exist yet"""
+    name = todo_collection(DEFAULT_TENANT)
+    if db.session.get(CollectionState, name) is None:
+        # Databases from before tenants kept the single list's version as 'todos'
+        legacy = db.session.get(CollectionState, TODO_COLLECTION)
+        db.session.add(CollectionState(name=name, version=legacy.version if legacy else 0))
+        if legacy is not None:
+            db.session.delete(legacy)
+        db.session.commit()
+
+# Single-column indexes replaced by the tenant-leading ones
+LEGACY_TODO_INDEXES = ('ix_todo_completed', 'ix_todo_priority', 'ix_todo_due_date', 'ix_todo_updated_at',
+                       'ix_todo_change_todo_id')
 
+def ensure_tenant_columns():
+    """Add tenant_id to tables made before tenants; existing rows go to the default tenant"""
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in (Todo.__table__, TodoChange.__table__):
+            if 'tenant_id' not in {column['name'] for column in inspector.get_columns(table.name)}:
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN tenant_id VARCHAR(40) "
+                    f"NOT NULL DEFAULT '{DEFAULT_TENANT}'"
+                )
+        for name in LEGACY_TODO_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+def ensure_todo_ids_not_reused():
+    """Rebuild a SQLite todo table made without AUTOINCREMENT.
+
+    SQLite otherwise hands out the highest id again once that todo is
+    deleted. The rows keep their ids; ids only seen in the change log are
+    never handed out either. Triggers and indexes go with the old table and
+    are created again by the rest of create_tables().
+    """
+    table = Todo.__table__
+    with db.engine.begin() as connection:
+        if connection.dialect.name != 'sqlite':
+            return
+        storage.hold_write_lock(connection)
+        schema = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).scalar()
+        if schema is None or 'AUTOINCREMENT' in schema.upper():
+            return
+        legacy = f"{table.name}_legacy"
+        for kind in ('trigger', 'index'):
+            names = connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = ? AND tbl_name = ? AND sql IS NOT NULL",
+                (kind, table.name)
+            ).scalars().all()
+            for name in names:
+                connection.exec_driver_sql(f"DROP {kind.upper()} {name}")
+        connection.exec_driver_sql(f"ALTER TABLE {table.name} RENAME TO {legacy}")
+        table.create(connection)
+        columns = ', '.join(column.name for column in table.columns)
+        connection.exec_driver_sql(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {legacy}")
+        connection.exec_driver_sql(f"DROP TABLE {legacy}")
+        top = connection.execute(db.select(db.func.max(
+            db.func.coalesce(db.select(db.func.max(Todo.id)).scalar_subquery(), 0),
+            db.func.coalesce(db.select(db.func.max(TodoChange.todo_id)).scalar_subquery(), 0)
+        ))).scalar()
+        connection.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = ?", (table.name,))
+        connection.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, top))
+
+def ensure_indexes():
+    """Create any model indexes missing from a database made by an older version"""
+    for table in (Todo.__table__, TodoChange.__table__):
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def shutdown_background_work():
+    """Stop this process's background threads, committing queued updates and letting running chat jobs finish"""
+    todo_updates.stop()
+    change_follower.stop()
+    reminder_scheduler.stop()
+    chat_jobs.shutdown(wait=True)
+    llm_client.close()
+    fallback_cache.save()
+
+# Development server; see gunicorn.conf.py for production
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True, port=5001)
+    configure_logging()
+    create_app(create_schema=True)
+    app.run(debug=True, port=int(os.getenv('PORT', '5001')))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Mixed CRUD + chat load test for the Claude fallback path
+Serves the app from a single-threaded server (one sync worker) and points the
+fallback client at a local fake Messages API that answers slowly. While chat
+clients send messages only the fallback can handle, a CRUD client lists todos
+and records its latency, once with synchronous chat and once with async chat
+jobs
+
+Run from the repository root: python -m benchmarks.chat_load_bench
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.results import percentile
+
+
+class FakeMessagesAPI(BaseHTTPRequestHandler):
+    """Answers every Messages API call with a list action after a delay"""
+
+    delay = 1.0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.delay)
+        body = json.dumps({
+            'content': [{'type': 'text', 'text': '{"action": "list", "filter": "pending"}'}]
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_in_thread(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_scenario(base_url, use_async, chat_clients, chat_messages, crud_requests):
+    import requests
+
+    crud_latencies = []
+    chat_latencies = []
+    mode = 'async' if use_async else 'sync'
+
+    def chat_client(client_number):
+        session = requests.Session()
+        for i in range(chat_messages):
+            # Unique wording so the fallback cache never answers
+            message = f"ponder quokka zebra {mode} {client_number}-{i}-{time.time()}"
+            started = time.perf_counter()
+            response = session.post(f"{base_url}/api/chat", json={'message': message, 'async': use_async})
+            if response.status_code == 202:
+                job_url = f"{base_url}{response.headers['Location']}"
+                while session.get(job_url).json()['status'] == 'pending':
+                    time.sleep(0.05)
+            chat_latencies.append(time.perf_counter() - started)
+
+    def crud_client():
+        session = requests.Session()
+        for _ in range(crud_requests):
+            started = time.perf_counter()
+            session.get(f"{base_url}/api/todos", params={'limit': 20})
+            crud_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=chat_client, args=(n,)) for n in range(chat_clients)]
+    for thread in threads:
+        thread.start()
+    # Let the chat messages reach the fallback before measuring CRUD
+    time.sleep(0.1)
+    crud_client()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'mode': mode,
+        'crud_p50_ms': percentile(crud_latencies, 50) * 1000,
+        'crud_p99_ms': percentile(crud_latencies, 99) * 1000,
+        'chat_p50_ms': percentile(chat_latencies, 50) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure CRUD latency under slow chat fallbacks')
+    parser.add_argument('--delay', type=float, default=1.0, help='fake LLM response time in seconds')
+    parser.add_argument('--chat-clients', type=int, default=4)
+    parser.add_argument('--chat-messages', type=int, default=3, help='fallback messages per chat client')
+    parser.add_argument('--crud-requests', type=int, default=200)
+    args = parser.parse_args()
+
+    FakeMessagesAPI.delay = args.delay
+    llm_server = start_in_thread(ThreadingHTTPServer(('127.0.0.1', 0), FakeMessagesAPI))
+    os.environ['ANTHROPIC_BASE_URL'] = f"http://127.0.0.1:{llm_server.server_port}"
+    os.environ.setdefault('ANTHROPIC_API_KEY', 'benchmark')
+
+    import logging
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    app = create_app(create_schema=True)
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # threaded=False: one request at a time, like a single sync worker
+    app_server = start_in_thread(make_server('127.0.0.1', 0, app, threaded=False))
+    base_url = f"http://127.0.0.1:{app_server.server_port}"
+
+    print(f"Fake LLM delay {args.delay}s, {args.chat_clients} chat clients x "
+          f"{args.chat_messages} messages, {args.crud_requests} CRUD requests")
+    for use_async in (False, True):
+        stats = run_scenario(base_url, use_async, args.chat_clients, args.chat_messages, args.crud_requests)
+        print(f"{stats['mode']:>5}: CRUD p50 {stats['crud_p50_ms']:8.1f} ms, "
+              f"p99 {stats['crud_p99_ms']:8.1f} ms | chat p50 {stats['chat_p50_ms']:8.1f} ms")
+
+    app_server.shutdown()
+    llm_server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Load harness for the CRUD and chat routes
+Seeds a scratch database with generated todos, then drives each scenario
+(cached and uncached lists, create, update, delete, rule-parsed chat and a
+mixed workload) through the Flask test client in-process, or against a running
+server with --url. Reports throughput and p50/p95/p99 latency per scenario and
+can save the results as JSON and compare them against an earlier run
+
+Run from the repository root: python -m benchmarks.load_bench --output results.json
+Compare with a baseline:      python -m benchmarks.load_bench --compare results.json
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.results import summarize, save_results, report_regressions
+
+
+def make_sender(url=None):
+    """send(method, path, body) -> status code, via the test client or HTTP"""
+    if url:
+        import requests
+
+        session = requests.Session()
+        return lambda method, path, body=None: session.request(method, url + path, json=body).status_code
+
+    from app import create_app
+
+    client = create_app().test_client()
+    return lambda method, path, body=None: client.open(path, method=method, json=body).status_code
+
+
+class Workload:
+    """The requests each scenario sends, with the ids they can safely touch"""
+
+    def __init__(self, todo_count, chat_messages):
+        self.todo_count = todo_count
+        self.chat_messages = chat_messages
+        self._created = []
+        self._lock = threading.Lock()
+
+    def list_cached(self, send, rng):
+        # The same page every time, served from the response cache after the first
+        return send('GET', '/api/todos?limit=20')
+
+    def list_uncached(self, send, rng):
+        # A different filter each time, so every request reaches the database
+        due_after = (datetime.utcnow() + timedelta(minutes=rng.randint(-40000, 80000))).isoformat()
+        return send('GET', f'/api/todos?limit=20&sort=due_date&completed=false&due_after={due_after}')
+
+    def create(self, send, rng):
+        return send('POST', '/api/todos', {
+            'title': f"Load test todo {rng.random():.8f}",
+            'priority': rng.choice(('low', 'medium', 'high')),
+        })
+
+    def update(self, send, rng):
+        return send('PUT', f'/api/todos/{rng.randint(1, self.todo_count)}', {
+            'completed': rng.random() < 0.5,
+        })
+
+    def delete(self, send, rng):
+        # Delete rows this run created, so the seeded rows stay for the others
+        with self._lock:
+            todo_id = self._created.pop() if self._created else None
+        if todo_id is None:
+            return send('DELETE', f'/api/todos/{rng.randint(1, self.todo_count)}')
+        return send('DELETE', f'/api/todos/{todo_id}')
+
+    def chat(self, send, rng):
+        return send('POST', '/api/chat', {'message': rng.choice(self.chat_messages)})
+
+    def mixed(self, send, rng):
+        # Read-heavy mix, roughly what the web client sends
+        roll = rng.random()
+        if roll < 0.5:
+            return self.list_cached(send, rng)
+        if roll < 0.7:
+            return self.list_uncached(send, rng)
+        if roll < 0.8:
+            return self.create(send, rng)
+        if roll < 0.9:
+            return self.update(send, rng)
+        return self.chat(send, rng)
+
+    def remember_created(self, ids):
+        with self._lock:
+            self._created.extend(ids)
+
+
+SCENARIOS = ('list_cached', 'list_uncached', 'create', 'update', 'delete', 'chat', 'mixed')
+
+
+def run_scenario(workload, scenario, url, requests_total, concurrency, seed):
+    step = getattr(workload, scenario)
+    per_thread = max(1, requests_total // concurrency)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(thread_number):
+        send = make_sender(url)
+        rng = random.Random(seed * 1000 + thread_number)
+        samples = []
+        failed = 0
+        for _ in range(per_thread):
+            started = time.perf_counter()
+            status = step(send, rng)
+            samples.append(time.perf_counter() - started)
+            if status >= 400:
+                failed += 1
+        with lock:
+            latencies.extend(samples)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def created_ids_since(url, after_id):
+    """Ids of todos created by the create scenario, for the delete scenario"""
+    if url:
+        return []
+    from app import db, Todo, create_app
+
+    with create_app().app_context():
+        return list(db.session.execute(db.select(Todo.id).where(Todo.id > after_id)).scalars())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput and latency of the CRUD and chat routes')
+    parser.add_argument('--url', help='benchmark a running server instead of the in-process test client')
+    parser.add_argument('--todos', type=int, default=10000, help='todos to seed (in-process only)')
+    parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='client threads per scenario')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma separated subset to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    todo_count = args.todos
+    directory = None
+    if not args.url:
+        # A scratch database, no real Claude calls and quiet logs
+        directory = tempfile.mkdtemp(prefix='todo-load-bench-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ['ANTHROPIC_API_KEY'] = ''
+        os.environ.setdefault('LOG_LEVEL', 'ERROR')
+        from benchmarks.seed_data import seed_todos
+
+        seed_todos(args.todos, args.seed)
+    else:
+        import requests
+
+        newest = requests.get(f"{args.url}/api/todos", params={'sort': '-id', 'limit': 1}).json()
+        todo_count = newest[0]['id'] if newest else 1
+
+    # parser_bench imports the app, so only after DATABASE_URL is set
+    from benchmarks.parser_bench import load_corpus
+
+    # Only phrasings the rules handle, so chat latency doesn't depend on the LLM
+    chat_messages = [case['input'] for case in load_corpus()['cases'] if case['expected']]
+    workload = Workload(todo_count, chat_messages)
+
+    target = args.url or 'in-process test client'
+    print(f"{target}: {args.todos:,} todos, {args.requests:,} requests x {args.concurrency} threads per scenario")
+    results = {}
+    last_seeded_id = todo_count
+    for scenario in scenarios:
+        if scenario == 'delete':
+            workload.remember_created(created_ids_since(args.url, last_seeded_id))
+        stats = run_scenario(workload, scenario, args.url, args.requests, args.concurrency, args.seed)
+        results[scenario] = stats
+        print(f"{scenario:>13}: {stats['throughput_rps']:8,.0f} req/s | p50 {stats['p50_ms']:7.2f} ms, "
+              f"p95 {stats['p95_ms']:7.2f} ms, p99 {stats['p99_ms']:7.2f} ms | {stats['errors']} errors")
+
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    document = {'results': results}
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        save_results(args.output, 'load_bench', params, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, document, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
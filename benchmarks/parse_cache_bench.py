@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Chat parsing with and without the compiled-parse cache
+Replays a chat log through AIAssistant.parse_with_rules, once with the parse
+cache off and once starting from an empty cache, and checks that both give
+the same action for every message. The log is either a file with one message
+per line (--log) or generated: the phrasings of parser_corpus.json plus
+"complete task N", "delete <title>" and the like, drawn with a Zipf
+distribution in mixed case, and a share of one-off "add ..." messages that
+never repeat
+
+Run from the repository root: python -m benchmarks.parse_cache_bench
+Replay a real log:            python -m benchmarks.parse_cache_bench --log chat.log
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import AIAssistant, TodoSnapshot, parse_cache
+from benchmarks.parser_bench import load_corpus
+from benchmarks.results import summarize, save_results, report_regressions
+
+TITLE_WORDS = ('call', 'email', 'buy', 'book', 'review', 'plan', 'fix', 'pay', 'send', 'clean',
+               'dentist', 'report', 'groceries', 'invoice', 'car', 'tickets', 'slides', 'garden')
+
+
+def vocabulary(corpus):
+    """The repeated commands: every corpus phrasing and some templated ones"""
+    phrasings = [case['input'] for case in corpus['cases']]
+    phrasings += [f'complete task {n}' for n in range(1, 31)]
+    phrasings += [f'delete task {n}' for n in range(1, 31)]
+    for todo in corpus['todos']:
+        title = todo['title'].lower()
+        phrasings += [f'complete {title}', f'mark {title} as done', f'delete {title}', f'remove the {title} task']
+    return list(dict.fromkeys(phrasings))
+
+
+def generate_log(corpus, messages, unique_share, zipf, rng):
+    phrasings = vocabulary(corpus)
+    rng.shuffle(phrasings)
+    weights = [1 / rank ** zipf for rank in range(1, len(phrasings) + 1)]
+    log = []
+    for _ in range(messages):
+        if rng.random() < unique_share:
+            log.append('add ' + ' '.join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(2, 5)))
+                       + f' {rng.randint(1, 10 ** 6)}')
+            continue
+        message = rng.choices(phrasings, weights)[0]
+        # Typed as users do: some capitalized, some with trailing spaces
+        if rng.random() < 0.3:
+            message = message.capitalize()
+        if rng.random() < 0.1:
+            message += ' '
+        log.append(message)
+    return log
+
+
+def replay(log, todos, repeat):
+    """Best of repeat passes; returns (per-message latencies, elapsed, actions) of that pass"""
+    best = None
+    for _ in range(repeat):
+        parse_cache.clear()
+        latencies, actions = [], []
+        started = time.perf_counter()
+        for message in log:
+            message_started = time.perf_counter()
+            actions.append(AIAssistant.parse_with_rules(message, todos))
+            latencies.append(time.perf_counter() - message_started)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best[1]:
+            best = (latencies, elapsed, actions)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rule-based chat parsing: plan cache off vs on, on a replayed log')
+    parser.add_argument('--log', help='chat log to replay, one message per line (default: generated)')
+    parser.add_argument('--messages', type=int, default=20000, help='messages in the generated log')
+    parser.add_argument('--unique-share', type=float, default=0.1, help='share of one-off "add ..." messages')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent of the repeated commands')
+    parser.add_argument('--size', type=int, default=1024, help='parse cache entries')
+    parser.add_argument('--repeat', type=int, default=5, help='passes per mode, best kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    todos = TodoSnapshot(corpus['todos'])
+    if args.log:
+        with open(args.log, encoding='utf-8') as log_file:
+            log = [line.rstrip('\n') for line in log_file if line.strip()]
+    else:
+        log = generate_log(corpus, args.messages, args.unique_share, args.zipf, random.Random(args.seed))
+    print(f"Replaying {len(log):,} messages ({len(set(message.lower().strip() for message in log)):,} distinct)")
+
+    results = {}
+    actions = {}
+    for mode, size in (('uncached', 0), ('cached', args.size)):
+        parse_cache.max_entries = size
+        latencies, elapsed, actions[mode] = replay(log, todos, args.repeat)
+        results[mode] = summarize(latencies, elapsed)
+        per_message = elapsed / len(log) * 1e6
+        extra = ''
+        if size:
+            stats = parse_cache.stats()
+            results[mode]['hit_rate'] = stats['hit_rate']
+            extra = f" | {stats['hit_rate']:.1%} hits, {stats['entries']:,} entries, {stats['evictions']:,} evictions"
+        print(f"{mode:>9}: {per_message:6.2f} µs per message ({results[mode]['throughput_rps']:,.0f} messages/s), "
+              f"p99 {results[mode]['p99_ms'] * 1000:.2f} µs{extra}")
+
+    mismatches = [(message, expected, actual)
+                  for message, expected, actual in zip(log, actions['uncached'], actions['cached'])
+                  if expected != actual]
+    for message, expected, actual in mismatches[:10]:
+        print(f"❌ {message!r}: uncached {expected}, cached {actual}")
+    if not mismatches:
+        print(f"✅ Same action for every message, {results['uncached']['p50_ms'] / results['cached']['p50_ms']:.1f}x "
+              f"faster at p50 and {results['cached']['throughput_rps'] / results['uncached']['throughput_rps']:.1f}x "
+              f"the throughput with the cache")
+
+    document = {'results': results}
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        save_results(args.output, 'parse_cache_bench', params, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, document, args.tolerance):
+        sys.exit(1)
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
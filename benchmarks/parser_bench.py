@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the rule-based chat parser
+Checks every phrasing in parser_corpus.json against its golden result, then
+reports the average parse time per message and the p50/p95/p99 across
+phrasings, optionally saving them as JSON for comparison with a later run
+
+Run from the repository root: python -m benchmarks.parser_bench [--output results.json]
+"""
+
+import os
+import sys
+import json
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import AIAssistant, TodoSnapshot
+from benchmarks.results import percentile, save_results, report_regressions
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus.json')
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding='utf-8') as corpus_file:
+        return json.load(corpus_file)
+
+
+def check_golden(corpus):
+    """Return the cases whose parse differs from the recorded golden result"""
+    mismatches = []
+    todos = TodoSnapshot(corpus['todos'])
+    for case in corpus['cases']:
+        result = AIAssistant._rule_based_parser(case['input'].lower().strip(), todos)
+        if result != case['expected']:
+            mismatches.append((case['input'], case['expected'], result))
+    return mismatches
+
+
+def bench_parser(corpus, repeat=5, number=200):
+    """Best-of-repeat average parse time per message, in microseconds"""
+    # One snapshot for the whole run, so its title index is built once just as
+    # the app keeps its index current instead of rebuilding it
+    todos = TodoSnapshot(corpus['todos'])
+    messages = [case['input'].lower().strip() for case in corpus['cases']]
+
+    def parse_all():
+        for message in messages:
+            AIAssistant._rule_based_parser(message, todos)
+
+    best = min(timeit.repeat(parse_all, repeat=repeat, number=number))
+    return best / (number * len(messages)) * 1e6
+
+
+def bench_phrasings(corpus, repeat=5, number=200):
+    """Best-of-repeat parse time of each phrasing on its own, in microseconds"""
+    todos = TodoSnapshot(corpus['todos'])
+    timings = []
+    for case in corpus['cases']:
+        message = case['input'].lower().strip()
+        best = min(timeit.repeat(lambda: AIAssistant._rule_based_parser(message, todos),
+                                 repeat=repeat, number=number))
+        timings.append(best / number * 1e6)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check and time the rule-based chat parser')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    mismatches = check_golden(corpus)
+    for message, expected, actual in mismatches:
+        print(f"❌ {message!r}: expected {expected}, got {actual}")
+    if mismatches:
+        sys.exit(1)
+    print(f"✅ {len(corpus['cases'])} phrasings match the golden corpus")
+
+    per_message = bench_parser(corpus)
+    print(f"⏱️  {per_message:.2f} µs per message ({1e6 / per_message:,.0f} messages/s)")
+
+    timings = bench_phrasings(corpus)
+    # Same keys as the load harness so results.compare_results works on both
+    results = {'rule_parser': {
+        'requests': len(timings),
+        'throughput_rps': 1e6 / per_message,
+        'p50_ms': percentile(timings, 50) / 1000,
+        'p95_ms': percentile(timings, 95) / 1000,
+        'p99_ms': percentile(timings, 99) / 1000,
+    }}
+    print(f"   per phrasing: p50 {percentile(timings, 50):.2f} µs, p95 {percentile(timings, 95):.2f} µs, "
+          f"p99 {percentile(timings, 99):.2f} µs")
+    if args.output:
+        save_results(args.output, 'parser_bench', {'phrasings': len(timings)}, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, {'results': results}, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Shared helpers for benchmark results
+Latency percentiles, a throughput/latency summary per scenario, and saving
+and comparing JSON result files so a run can be checked against a baseline
+"""
+
+import json
+import platform
+import sys
+from datetime import datetime
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of samples"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Throughput and latency percentiles (ms) for one scenario"""
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000,
+    }
+
+
+def save_results(path, benchmark, params, results):
+    """Write one run's results, with enough context to compare runs later"""
+    document = {
+        'benchmark': benchmark,
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'params': params,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as results_file:
+        json.dump(document, results_file, indent=2, sort_keys=True)
+        results_file.write('\n')
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as results_file:
+        return json.load(results_file)
+
+
+# Metrics where a larger value is worse; throughput is the other way round
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms')
+THROUGHPUT_METRICS = ('throughput_rps',)
+
+
+def compare_results(baseline, current, tolerance=0.2):
+    """Regressions of current against baseline beyond tolerance (0.2 = 20%).
+
+    Returns (scenario, metric, baseline value, current value, relative change)
+    for every scenario present in both runs.
+    """
+    regressions = []
+    for scenario, stats in current['results'].items():
+        old_stats = baseline['results'].get(scenario)
+        if old_stats is None:
+            continue
+        for metric in LATENCY_METRICS + THROUGHPUT_METRICS:
+            old, new = old_stats.get(metric), stats.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if metric in LATENCY_METRICS else change < -tolerance
+            if worse:
+                regressions.append((scenario, metric, old, new, change))
+    return regressions
+
+
+def report_regressions(baseline_path, current, tolerance):
+    """Print the comparison against a baseline file; True if nothing regressed"""
+    regressions = compare_results(load_results(baseline_path), current, tolerance)
+    for scenario, metric, old, new, change in regressions:
+        print(f"❌ {scenario} {metric}: {old:,.4g} -> {new:,.4g} ({change:+.0%})")
+    if not regressions:
+        print(f"✅ No regressions beyond {tolerance:.0%} against {baseline_path}")
+    return not regressions
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Realistic todo data generator
+Fills the configured database (DATABASE_URL) with generated todos using bulk
+inserts, a batch per transaction, fast enough for 10^6 rows. Titles, priorities,
+completion and due dates follow a plausible mix rather than one repeated row
+
+Run from the repository root: python -m benchmarks.seed_data --count 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+VERBS = ('Buy', 'Call', 'Email', 'Finish', 'Review', 'Schedule', 'Clean', 'Fix', 'Write',
+         'Plan', 'Book', 'Pay', 'Update', 'Read', 'Prepare', 'Organize', 'Renew', 'Water')
+OBJECTS = ('groceries', 'dentist', 'project report', 'quarterly budget', 'garage', 'car service',
+           'flight tickets', 'electricity bill', 'resume', 'book club notes', 'team meeting',
+           'birthday party', 'insurance policy', 'kitchen sink', 'blog post', 'tax return',
+           'passport', 'plants', 'presentation slides', 'gym membership')
+DETAILS = ('', '', 'before Friday', 'for mom', 'with Alex', 'for the client', 'this weekend',
+           'again', 'online', 'at the office')
+DESCRIPTIONS = (None, '', 'Follow up if there is no answer', 'Check the notes from last week',
+                'Bring the receipts', 'Ask about the discount', 'Takes about an hour')
+# 30% low, 50% medium, 20% high
+PRIORITIES = ('low',) * 3 + ('medium',) * 5 + ('high',) * 2
+
+
+def generate_todos(count, seed=0, now=None):
+    """Yield count todo rows as dicts ready for a bulk insert"""
+    rng = random.Random(seed)
+    now = now or datetime.utcnow()
+    for _ in range(count):
+        detail = rng.choice(DETAILS)
+        title = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+        if detail:
+            title = f"{title} {detail}"
+        created_at = now - timedelta(seconds=rng.randint(0, 180 * 86400))
+        updated_at = created_at + timedelta(seconds=rng.randint(0, int((now - created_at).total_seconds())))
+        due_date = None
+        if rng.random() < 0.6:
+            due_date = (now + timedelta(days=rng.randint(-30, 60))).replace(
+                hour=rng.choice((9, 12, 17, 23)), minute=0, second=0, microsecond=0)
+        yield {
+            'title': title,
+            'description': rng.choice(DESCRIPTIONS),
+            'completed': rng.random() < 0.3,
+            'priority': rng.choice(PRIORITIES),
+            'due_date': due_date,
+            'created_at': created_at,
+            'updated_at': updated_at,
+        }
+
+
+def seed_todos(count, seed=0, batch_size=10000, reset=False, tenant_id='default'):
+    """Insert count generated todos for a tenant; returns the number of rows inserted.
+
+    Rows go in with executemany in batch_size transactions. Each batch bumps
+    the tenant's collection version so cached list responses are not served
+    stale; the change log is not written, so seed before clients start
+    following it. reset only deletes that tenant's todos.
+    """
+    from app import db, Todo, create_app, _bump_collection_version
+
+    app = create_app(create_schema=True)
+    todos = Todo.__table__
+
+    def insert(rows):
+        db.session.execute(todos.insert(), [dict(row, tenant_id=tenant_id) for row in rows])
+        _bump_collection_version(db.session, tenant_id)
+        db.session.commit()
+        return len(rows)
+
+    inserted = 0
+    with app.app_context():
+        if reset:
+            db.session.execute(todos.delete().where(todos.c.tenant_id == tenant_id))
+            _bump_collection_version(db.session, tenant_id)
+            db.session.commit()
+        batch = []
+        for row in generate_todos(count, seed):
+            batch.append(row)
+            if len(batch) == batch_size:
+                inserted += insert(batch)
+                batch = []
+        if batch:
+            inserted += insert(batch)
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed the database with generated todos')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0, help='random seed, for reproducible data')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--reset', action='store_true', help="delete the tenant's existing todos first")
+    parser.add_argument('--tenant', default='default', help='tenant the todos belong to')
+    args = parser.parse_args()
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    started = time.perf_counter()
+    inserted = seed_todos(args.count, args.seed, args.batch_size, args.reset, args.tenant)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Inserted {inserted:,} todos in {elapsed:.1f}s ({inserted / elapsed:,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Debug server vs production server
+Starts each server in turn on a freshly seeded scratch database (python
+app.py, the single-process Flask development server, and gunicorn with
+gunicorn.conf.py) and drives the same load_bench scenarios over HTTP from
+several client threads. Reports throughput and p50/p95/p99 latency per server
+and scenario, and can save or compare JSON results like the other benchmarks
+
+Run from the repository root: python -m benchmarks.server_bench --concurrency 16
+Pick the servers:             python -m benchmarks.server_bench --servers gunicorn --workers 4
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.results import save_results, report_regressions
+
+SERVERS = {
+    'debug': [sys.executable, 'app.py'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+}
+DEFAULT_SCENARIOS = ('list_cached', 'list_uncached', 'create', 'update', 'chat', 'mixed')
+
+
+def start_server(name, port, env):
+    process = subprocess.Popen(SERVERS[name], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{name} server exited with code {process.returncode}")
+        try:
+            requests.get(f"{url}/metrics", timeout=1)
+            return process, url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{name} server did not start on port {port}")
+
+
+def stop_server(process):
+    # TERM is a graceful shutdown for both
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput and latency of the debug and production servers')
+    parser.add_argument('--servers', default=','.join(SERVERS), help='comma separated subset to run')
+    parser.add_argument('--todos', type=int, default=10000, help='todos to seed')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads per scenario')
+    parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS), help='comma separated subset to run')
+    parser.add_argument('--workers', type=int, help='gunicorn workers (default from gunicorn.conf.py)')
+    parser.add_argument('--threads', type=int, help='threads per gunicorn worker')
+    parser.add_argument('--port', type=int, default=5091)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    servers = [name for name in args.servers.split(',') if name]
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    unknown = set(servers) - set(SERVERS)
+    if unknown:
+        parser.error(f"unknown servers: {', '.join(sorted(unknown))}")
+
+    # A scratch database shared by both servers, no real Claude calls, quiet logs
+    directory = tempfile.mkdtemp(prefix='todo-server-bench-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+               ANTHROPIC_API_KEY='', LOG_LEVEL='ERROR', GUNICORN_ACCESS_LOG='',
+               PORT=str(args.port), REMINDERS_ENABLED='0')
+    if args.workers:
+        env['WEB_CONCURRENCY'] = str(args.workers)
+    if args.threads:
+        env['GUNICORN_THREADS'] = str(args.threads)
+    os.environ.update({key: env[key] for key in ('DATABASE_URL', 'ANTHROPIC_API_KEY', 'LOG_LEVEL')})
+
+    from benchmarks.seed_data import seed_todos
+    # load_bench imports the app lazily, so only after DATABASE_URL is set
+    from benchmarks.load_bench import SCENARIOS, Workload, run_scenario
+    from benchmarks.parser_bench import load_corpus
+
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    chat_messages = [case['input'] for case in load_corpus()['cases'] if case['expected']]
+    workload = Workload(args.todos, chat_messages)
+
+    print(f"{args.todos:,} todos, {args.requests:,} requests x {args.concurrency} threads per scenario")
+    results = {}
+    try:
+        for name in servers:
+            # Fresh rows for every server: chat deletes and updates change them
+            seed_todos(args.todos, args.seed, reset=True)
+            process, url = start_server(name, args.port, env)
+            try:
+                for scenario in scenarios:
+                    stats = run_scenario(workload, scenario, url, args.requests, args.concurrency, args.seed)
+                    results[f"{name}.{scenario}"] = stats
+                    print(f"{name:>8} {scenario:>13}: {stats['throughput_rps']:8,.0f} req/s | "
+                          f"p50 {stats['p50_ms']:7.2f} ms, p95 {stats['p95_ms']:7.2f} ms, "
+                          f"p99 {stats['p99_ms']:7.2f} ms | {stats['errors']} errors")
+            finally:
+                stop_server(process)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    document = {'results': results}
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        save_results(args.output, 'server_bench', params, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, document, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Cold start budget
+Imports the app in fresh interpreters under python -X importtime: "app" (the
+module alone, what every CLI tool and test pays) and "wsgi" (the module plus
+create_app(), what a worker boot pays). Reports the median import time and
+interpreter wall time per target and the heaviest top-level imports, and exits
+1 if a target goes over the budget or pulls in a module that must stay lazy
+(the LLM SDKs and requests are only needed once a fallback call is made)
+
+Run from the repository root: python -m benchmarks.startup_bench
+Tighter budget:               python -m benchmarks.startup_bench --budget-ms 600
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.results import save_results, report_regressions
+
+TARGETS = ('app', 'wsgi')
+# Must not be imported at startup
+LAZY_MODULES = ('openai', 'anthropic', 'requests')
+
+PROBE = """
+import sys
+import {target}
+print(','.join(name for name in {lazy!r} if name in sys.modules))
+"""
+
+
+def parse_importtime(stderr):
+    """(self us, cumulative us, depth, module) for each line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One space, then two more per level of nesting
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def measure(target, env, lazy_modules):
+    """One cold import of target: (import ms, wall ms, top-level imports, lazy modules loaded)"""
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(target=target, lazy=tuple(lazy_modules))],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if process.returncode != 0:
+        raise RuntimeError(f"importing {target} failed:\n{process.stderr[-2000:]}")
+    rows = parse_importtime(process.stderr)
+    # What the target imported is listed between the previous top-level line and its own
+    target_line = next(i for i, row in enumerate(rows) if row[2] == 0 and row[3] == target)
+    first_line = max([i + 1 for i, row in enumerate(rows[:target_line]) if row[2] == 0], default=0)
+    import_us = rows[target_line][1]
+    children = [(cumulative, name) for _, cumulative, depth, name in rows[first_line:target_line] if depth == 1]
+    loaded = [name for name in process.stdout.strip().split(',') if name]
+    return import_us / 1000, wall_ms, children, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start import time of the app, with a budget')
+    parser.add_argument('--targets', default=','.join(TARGETS), help='comma separated modules to import')
+    parser.add_argument('--runs', type=int, default=5, help='cold imports per target (after one warm-up)')
+    parser.add_argument('--budget-ms', type=float, default=1000, help='median import time allowed per target')
+    parser.add_argument('--lazy', default=','.join(LAZY_MODULES),
+                        help='comma separated modules that must not be imported at startup')
+    parser.add_argument('--top', type=int, default=8, help='heaviest imports to list per target')
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    targets = [name for name in args.targets.split(',') if name]
+    lazy_modules = [name for name in args.lazy.split(',') if name]
+
+    # A scratch database and quiet logs; importing must not need a real one
+    directory = tempfile.mkdtemp(prefix='todo-startup-bench-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+               ANTHROPIC_API_KEY='', LOG_LEVEL='ERROR')
+
+    results = {}
+    failures = []
+    try:
+        for target in targets:
+            # Warm-up: bytecode caches and the OS file cache
+            measure(target, env, lazy_modules)
+            runs = [measure(target, env, lazy_modules) for _ in range(args.runs)]
+            import_ms = [run[0] for run in runs]
+            wall_ms = [run[1] for run in runs]
+            median_run = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+            loaded = sorted({name for run in runs for name in run[3]})
+            results[target] = {
+                'p50_ms': statistics.median(import_ms),
+                'max_ms': max(import_ms),
+                'wall_p50_ms': statistics.median(wall_ms),
+                'lazy_modules_loaded': loaded,
+            }
+            stats = results[target]
+            print(f"{target:>6}: import p50 {stats['p50_ms']:7.1f} ms, max {stats['max_ms']:7.1f} ms | "
+                  f"interpreter wall p50 {stats['wall_p50_ms']:7.1f} ms")
+            for cumulative_us, name in sorted(median_run[2], reverse=True)[:args.top]:
+                print(f"        {cumulative_us / 1000:7.1f} ms  {name}")
+            if stats['p50_ms'] > args.budget_ms:
+                failures.append(f"{target} imports in {stats['p50_ms']:.1f} ms, over the {args.budget_ms:g} ms budget")
+            if loaded:
+                failures.append(f"{target} imports {', '.join(loaded)} at startup")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ Every target within {args.budget_ms:g} ms, no eager {', '.join(lazy_modules)} imports")
+
+    document = {'results': results}
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        save_results(args.output, 'startup_bench', params, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, document, args.tolerance):
+        sys.exit(1)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
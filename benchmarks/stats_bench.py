@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Dashboard counts at growing table sizes
+Seeds the database in steps and at each size times three ways of getting the
+same counts: GET /api/todos/stats from the maintained counters, the GROUP BY
+fallback, and what the web client used to do (fetch every todo with
+GET /api/todos and count them). The counter and GROUP BY answers are checked
+against each other. Finally times single-row updates with and without the
+counter triggers, to show what maintaining the counters costs a write
+
+Run from the repository root: python -m benchmarks.stats_bench
+Bigger tables:                python -m benchmarks.stats_bench --sizes 10000,100000,1000000
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.results import summarize, save_results, report_regressions
+from benchmarks.seed_data import seed_todos
+
+SIZES = (1000, 10000, 100000)
+
+
+def timed(fn, runs):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(runs):
+        request_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - request_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def count_client_side(client):
+    """Counts the way the web client got them: every todo, counted after the fetch"""
+    todos = client.get('/api/todos', headers={'Cache-Control': 'no-cache'}).get_json()
+    return len(todos), sum(1 for todo in todos if todo['completed'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cost of dashboard counts: counters vs GROUP BY vs full fetch')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in SIZES),
+                        help='comma separated table sizes to measure at')
+    parser.add_argument('--runs', type=int, default=50, help='requests per method and size')
+    parser.add_argument('--client-runs', type=int, default=5, help='full-list fetches per size')
+    parser.add_argument('--updates', type=int, default=500, help='updates per write-cost phase')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(',') if size)
+    directory = tempfile.mkdtemp(prefix='todo-stats-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+
+    results = {}
+    try:
+        from app import create_app, db, todo_stats
+        app = create_app(create_schema=True)
+        client = app.test_client()
+
+        def stats_from(use_counters):
+            previous, todo_stats._counters = todo_stats._counters, use_counters
+            try:
+                with app.app_context():
+                    return todo_stats.stats(db.session.connection(), 'default', datetime.now())
+            finally:
+                todo_stats._counters = previous
+
+        print(f"{'todos':>9} {'counters p50':>13} {'GROUP BY p50':>13} {'full fetch p50':>15}")
+        seeded = 0
+        for size in sizes:
+            seeded += seed_todos(size - seeded, args.seed + seeded)
+            counters, query = stats_from(True), stats_from(False)
+            for stats in (counters, query):
+                stats.pop('source')
+            if counters != query:
+                raise SystemExit(f"❌ counters disagree with GROUP BY at {size:,} todos:\n{counters}\n{query}")
+
+            results[f'counters/{size}'] = timed(lambda: client.get('/api/todos/stats'), args.runs)
+            results[f'group_by/{size}'] = timed(lambda: stats_from(False), args.runs)
+            results[f'full_fetch/{size}'] = timed(lambda: count_client_side(client), args.client_runs)
+            print(f"{size:>9,} {results[f'counters/{size}']['p50_ms']:11.2f}ms "
+                  f"{results[f'group_by/{size}']['p50_ms']:11.2f}ms "
+                  f"{results[f'full_fetch/{size}']['p50_ms']:13.2f}ms")
+
+        # What the triggers add to a write
+        rng = random.Random(args.seed)
+
+        def update():
+            client.put(f'/api/todos/{rng.randint(1, seeded)}', json={
+                'completed': rng.random() < 0.5, 'priority': rng.choice(('low', 'medium', 'high'))
+            })
+
+        results['update/counters'] = timed(update, args.updates)
+        with app.app_context():
+            with db.engine.begin() as connection:
+                for trigger in ('insert', 'delete', 'update'):
+                    connection.exec_driver_sql(f"DROP TRIGGER {todo_stats.count_table}_{trigger}")
+        results['update/no_counters'] = timed(update, args.updates)
+        print(f"update p50: {results['update/counters']['p50_ms']:.2f}ms with counters, "
+              f"{results['update/no_counters']['p50_ms']:.2f}ms without")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    document = {'results': results}
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        save_results(args.output, 'stats_bench', params, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, document, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Per-tenant request cost
+Seeds a small tenant and measures its list, search, chat and update requests
+through the in-process test client, then seeds a large neighbouring tenant
+and measures the same requests again. With tenant-scoped queries and indexes
+the small tenant's latency should not move with the neighbour's size
+
+Run from the repository root: python -m benchmarks.tenant_bench
+Bigger neighbour:             python -m benchmarks.tenant_bench --neighbour 500000
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.results import summarize, save_results, report_regressions
+from benchmarks.seed_data import seed_todos
+
+SMALL_TENANT = 'small'
+NEIGHBOUR_TENANT = 'neighbour'
+SCENARIOS = ('list', 'search', 'chat_due', 'chat_by_name', 'update')
+SEARCH_WORDS = ('report', 'groceries', 'dentist', 'invoice', 'car', 'plan')
+
+
+def make_requests(client, prefix, todos):
+    """One callable per scenario, each sending a request for the small tenant"""
+    ids = [todo['id'] for todo in todos]
+    titles = [todo['title'] for todo in todos]
+
+    def list_uncached(rng):
+        # A fresh due_after each time, so the list response cache can't answer
+        return client.get(f'{prefix}/todos?limit=20&sort=due_date&completed=false'
+                          f'&due_after=2020-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00')
+
+    return {
+        'list': list_uncached,
+        'search': lambda rng: client.get(f'{prefix}/todos/search?q={rng.choice(SEARCH_WORDS)}'),
+        'chat_due': lambda rng: client.post(f'{prefix}/chat', json={'message': 'show tasks due this week'}),
+        'chat_by_name': lambda rng: client.post(f'{prefix}/chat', json={
+            'message': f'complete {rng.choice(titles).lower()}'
+        }),
+        'update': lambda rng: client.put(f'{prefix}/todos/{rng.choice(ids)}', json={
+            'priority': rng.choice(('low', 'medium', 'high'))
+        }),
+    }
+
+
+def measure(scenarios, requests_total, seed):
+    results = {}
+    for name, send in scenarios.items():
+        rng = random.Random(seed)
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(requests_total):
+            request_started = time.perf_counter()
+            response = send(rng)
+            latencies.append(time.perf_counter() - request_started)
+            errors += response.status_code >= 400
+        results[name] = summarize(latencies, time.perf_counter() - started, errors)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A small tenant's request latency, alone and next to a large one")
+    parser.add_argument('--small', type=int, default=200, help="todos in the measured tenant")
+    parser.add_argument('--neighbour', type=int, default=100000, help="todos in the neighbouring tenant")
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and phase')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma separated subset to run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='todo-tenant-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    os.environ['ANTHROPIC_API_KEY'] = ''
+
+    try:
+        seed_todos(args.small, args.seed, tenant_id=SMALL_TENANT)
+
+        from app import create_app
+        app = create_app(create_schema=True)
+        client = app.test_client()
+        prefix = f'/api/tenants/{SMALL_TENANT}'
+        todos = client.get(f'{prefix}/todos').get_json()
+        wanted = [name for name in args.scenarios.split(',') if name]
+        scenarios = {name: send for name, send in make_requests(client, prefix, todos).items() if name in wanted}
+
+        results = {}
+        for phase in ('alone', 'with_neighbour'):
+            if phase == 'with_neighbour':
+                started = time.perf_counter()
+                seed_todos(args.neighbour, args.seed + 1, tenant_id=NEIGHBOUR_TENANT)
+                print(f"Seeded {args.neighbour:,} neighbouring todos in {time.perf_counter() - started:.1f}s")
+            for name, stats in measure(scenarios, args.requests, args.seed).items():
+                results[f'{phase}/{name}'] = stats
+
+        print(f"{'scenario':>14} {'alone p50':>10} {'neighbour p50':>14} {'ratio':>6}")
+        for name in scenarios:
+            alone, crowded = results[f'alone/{name}'], results[f'with_neighbour/{name}']
+            errors = alone['errors'] + crowded['errors']
+            print(f"{name:>14} {alone['p50_ms']:8.2f}ms {crowded['p50_ms']:12.2f}ms "
+                  f"{crowded['p50_ms'] / alone['p50_ms']:5.2f}x" + (f"  ({errors} errors)" if errors else ''))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    document = {'results': results}
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        save_results(args.output, 'tenant_bench', params, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, document, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
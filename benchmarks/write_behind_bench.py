@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Update throughput under contention, with and without write-behind
+Serves the app with gunicorn and has many client threads send bursts of
+PUT /api/todos/<id> to a small set of hot todos (toggling completion and
+renaming), once committing every update and once with WRITE_BEHIND_ENABLED.
+Each thread owns its own todos, so after the server shuts down (which
+flushes the queue) every todo must hold the last values its thread sent;
+the benchmark checks that and fails on any mismatch
+
+Run from the repository root: python -m benchmarks.write_behind_bench
+More contention:              python -m benchmarks.write_behind_bench --concurrency 32 --hot 20
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.results import summarize, save_results, report_regressions
+from benchmarks.server_bench import start_server, stop_server
+
+MODES = {'commit_each': '0', 'write_behind': '1'}
+_METRIC_RE = re.compile(r'^write_behind_updates\{kind="(\w+)"\} (\S+)$', re.MULTILINE)
+
+
+def run_updates(url, hot_ids, requests_total, concurrency):
+    """Send the updates; returns (latencies, errors, elapsed, last values sent per id)"""
+    per_thread = requests_total // concurrency
+    latencies, errors = [], [0]
+    expected = {}
+    lock = threading.Lock()
+
+    def worker(number):
+        session = requests.Session()
+        own = [todo_id for index, todo_id in enumerate(hot_ids) if index % concurrency == number]
+        if not own:
+            return
+        last = {}
+        mine = []
+        for i in range(per_thread):
+            todo_id = own[i % len(own)]
+            values = {'title': f'todo {todo_id} edit {i}', 'completed': i % 2 == 1}
+            started = time.perf_counter()
+            response = session.put(f'{url}/api/todos/{todo_id}', json=values)
+            mine.append(time.perf_counter() - started)
+            if response.status_code == 200:
+                last[todo_id] = values
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(mine)
+            expected.update(last)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], time.perf_counter() - started, expected
+
+
+def check_rows(database, expected):
+    """Todos whose stored title/completed differ from the last update sent"""
+    connection = sqlite3.connect(database)
+    try:
+        mismatches = []
+        for todo_id, values in expected.items():
+            title, completed = connection.execute(
+                'SELECT title, completed FROM todo WHERE id = ?', (todo_id,)).fetchone()
+            if (title, bool(completed)) != (values['title'], values['completed']):
+                mismatches.append(todo_id)
+        return mismatches
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PUT throughput under contention: commit each vs write-behind')
+    parser.add_argument('--modes', default=','.join(MODES), help='comma separated subset to run')
+    parser.add_argument('--todos', type=int, default=1000, help='todos to seed')
+    parser.add_argument('--hot', type=int, default=64, help='todos the updates go to')
+    parser.add_argument('--requests', type=int, default=4000, help='updates per mode')
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads')
+    parser.add_argument('--threads', type=int, default=16, help='threads of the (single) gunicorn worker')
+    parser.add_argument('--interval', type=float, default=0.05, help='write-behind flush interval (s)')
+    parser.add_argument('--port', type=int, default=5092)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='save results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file; exit 1 on a regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    modes = [name for name in args.modes.split(',') if name]
+    directory = tempfile.mkdtemp(prefix='todo-write-behind-bench-')
+    database = os.path.join(directory, 'bench.db')
+    # One worker: write-behind keeps per-todo order within a process only
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}", ANTHROPIC_API_KEY='', LOG_LEVEL='ERROR',
+               GUNICORN_ACCESS_LOG='', PORT=str(args.port), REMINDERS_ENABLED='0',
+               WEB_CONCURRENCY='1', GUNICORN_THREADS=str(args.threads),
+               WRITE_BEHIND_INTERVAL=str(args.interval))
+    os.environ.update({key: env[key] for key in ('DATABASE_URL', 'ANTHROPIC_API_KEY', 'LOG_LEVEL')})
+    from benchmarks.seed_data import seed_todos
+
+    print(f"{args.requests:,} updates to {args.hot} hot todos from {args.concurrency} threads per mode")
+    results = {}
+    failed = False
+    try:
+        for mode in modes:
+            seed_todos(args.todos, args.seed, reset=True)
+            with sqlite3.connect(database) as connection:
+                hot_ids = [row[0] for row in connection.execute('SELECT id FROM todo ORDER BY id LIMIT ?', (args.hot,))]
+            process, url = start_server('gunicorn', args.port, dict(env, WRITE_BEHIND_ENABLED=MODES[mode]))
+            try:
+                latencies, errors, elapsed, expected = run_updates(url, hot_ids, args.requests, args.concurrency)
+                counts = {kind: float(value) for kind, value in _METRIC_RE.findall(requests.get(f'{url}/metrics').text)}
+            finally:
+                # Graceful stop: the worker flushes whatever is still queued
+                stop_server(process)
+            stats = results[mode] = summarize(latencies, elapsed, errors)
+            mismatches = check_rows(database, expected)
+            stats['lost_updates'] = len(mismatches)
+            extra = ''
+            if counts.get('queued'):
+                stats['coalesced_ratio'] = counts['coalesced'] / counts['queued']
+                extra = f" | {stats['coalesced_ratio']:.0%} merged before commit"
+            print(f"{mode:>13}: {stats['throughput_rps']:8,.0f} updates/s | p50 {stats['p50_ms']:6.2f} ms, "
+                  f"p99 {stats['p99_ms']:6.2f} ms | {errors} errors{extra}")
+            if mismatches:
+                failed = True
+                print(f"❌ {len(mismatches)} todos don't hold their last update, e.g. {mismatches[:5]}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if not failed:
+        print("✅ Every todo holds the last update sent to it")
+    document = {'results': results}
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+        save_results(args.output, 'write_behind_bench', params, results)
+        print(f"Saved results to {args.output}")
+    if args.compare and not report_regressions(args.compare, document, args.tolerance):
+        sys.exit(1)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Concurrent write benchmark for the SQLite storage settings
+Several threads run small write transactions (create a todo, or read one and
+update it, like the POST and PUT routes) against a scratch database, once with
+SQLite's default settings and once with the pragmas and pool from storage.py,
+and report throughput and "database is locked" errors for each
+
+Run from the repository root: python -m benchmarks.write_bench
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.exc import OperationalError
+
+import storage
+from app import Todo
+
+TODOS = Todo.__table__
+
+
+def make_engine(path, tuned):
+    uri = f"sqlite:///{path}"
+    if not tuned:
+        return create_engine(uri)
+    engine = create_engine(uri, **storage.engine_options(uri))
+    storage.apply_sqlite_pragmas(engine)
+    return engine
+
+
+def write_once(engine, rng):
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        if rng.random() < 0.5:
+            connection.execute(TODOS.insert().values(
+                title=f"Benchmark todo {rng.random():.6f}", description='', completed=False,
+                priority='medium', created_at=now, updated_at=now
+            ))
+        else:
+            max_id = connection.execute(select(func.max(TODOS.c.id))).scalar() or 1
+            todo_id = rng.randint(1, max_id)
+            connection.execute(TODOS.update().where(TODOS.c.id == todo_id).values(
+                completed=rng.random() < 0.5, updated_at=now
+            ))
+
+
+def run(tuned, writers, writes_per_writer):
+    directory = tempfile.mkdtemp(prefix='todo-write-bench-')
+    path = os.path.join(directory, 'bench.db')
+    engine = make_engine(path, tuned)
+    TODOS.create(engine)
+
+    done = [0]
+    locked = [0]
+    lock = threading.Lock()
+
+    def writer(seed):
+        rng = random.Random(seed)
+        for _ in range(writes_per_writer):
+            try:
+                write_once(engine, rng)
+                outcome = done
+            except OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                outcome = locked
+            with lock:
+                outcome[0] += 1
+
+    threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+    return done[0] / elapsed, locked[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare SQLite write throughput before and after tuning')
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=250, help='transactions per writer')
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.writes} transactions")
+    for tuned in (False, True):
+        throughput, locked = run(tuned, args.writers, args.writes)
+        label = 'tuned' if tuned else 'default'
+        print(f"{label:>7}: {throughput:8,.0f} commits/s, {locked} 'database is locked' errors")
+
+
+if __name__ == '__main__':
+    main()
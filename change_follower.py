@@ -0,0 +1,74 @@
+"""
+Follows the todo change log so in-process state stays current across processes.
+
+With several worker processes a commit is only seen by the listeners of the
+process that made it. Each worker runs a follower thread that reads the
+change log (seq > last seen) after every local commit and at least every
+interval seconds, and hands the new changes to the same in-process indexes,
+caches and push subscribers, in seq order. Applying a change twice (once
+locally, once from the log) is harmless: every consumer is idempotent.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFollower:
+    """Polls fetch(after_seq) for logged changes and passes them to apply(changes)"""
+
+    def __init__(self, fetch, apply, interval=0.5):
+        self.fetch = fetch      # after_seq -> changes ({'seq', ...}) in seq order, [] when none
+        self.apply = apply
+        self.interval = interval
+        self.last_seq = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, last_seq):
+        """Follow changes after last_seq (once per process)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.last_seq = last_seq
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='change-follower', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        self._stopping = True
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+
+    def poke(self):
+        """Read the log now rather than at the next interval (e.g. after a local commit)"""
+        self._wake.set()
+
+    def catch_up(self):
+        with self._lock:
+            while True:
+                changes = self.fetch(self.last_seq)
+                if not changes:
+                    return
+                self.apply(changes)
+                self.last_seq = changes[-1]['seq']
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                self.catch_up()
+            except Exception as e:
+                logger.warning("Reading the change log failed", extra={'error': e})
@@ -0,0 +1,129 @@
+"""
+Background jobs for chat messages that need the Claude fallback.
+
+The rule-based parser answers most messages inline; a message that falls
+through to the fallback can instead be handed to a small thread pool, so the
+request returns a job id at once and the worker is free for other traffic
+while the LLM round-trip runs. Clients poll the job until it is done.
+
+With several worker processes a poll can reach a process other than the one
+running the job, so job records can also be written to a shared store.
+"""
+
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ChatJobsFull(RuntimeError):
+    """Too many jobs are already waiting"""
+
+
+class ChatJobs:
+    """Runs fallback jobs on a bounded thread pool and keeps their results for a while"""
+
+    def __init__(self, max_workers=4, max_pending=100, ttl=600, clock=time.time, store=None):
+        """store, if given, has save(record), load(job_id) and prune(expires_before)"""
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._clock = clock
+        self.store = store
+        self._lock = threading.Lock()
+        self._executor = None
+        self._jobs = {}      # job id -> job record, oldest first
+        self._pending = 0
+
+    def submit(self, fn, *args, owner=None):
+        """Run fn(*args) in the background and return the new job's id.
+
+        fn returns the job's result dict; an exception marks the job failed.
+        Only get() calls for the same owner (e.g. the tenant) see the job.
+        """
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_pending:
+                raise ChatJobsFull(f"{self._pending} chat jobs are already waiting")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='chat-job')
+            job_id = uuid.uuid4().hex
+            job = self._jobs[job_id] = {
+                'job_id': job_id,
+                'owner': owner,
+                'status': 'pending',
+                'submitted_at': self._clock(),
+                'finished_at': None,
+            }
+            self._pending += 1
+            record = dict(job)
+        if self.store is not None:
+            try:
+                self.store.prune(record['submitted_at'] - self.ttl)
+                self.store.save(record)
+            except Exception:
+                with self._lock:
+                    self._pending -= 1
+                    del self._jobs[job_id]
+                raise
+        self._executor.submit(self._run, job_id, fn, args)
+        return job_id
+
+    def _run(self, job_id, fn, args):
+        try:
+            outcome = {'status': 'done', **fn(*args)}
+        except Exception as e:
+            logger.warning("Chat job failed", extra={'job_id': job_id, 'error': e})
+            outcome = {'status': 'failed', 'error': str(e)}
+        with self._lock:
+            self._pending -= 1
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(outcome, finished_at=self._clock())
+            record = dict(job)
+        if self.store is not None:
+            try:
+                self.store.save(record)
+            except Exception as e:
+                logger.warning("Saving chat job failed", extra={'job_id': job_id, 'error': e})
+
+    def get(self, job_id, owner=None):
+        """Copy of the job record (without its owner), or None if it is
+        unknown, has expired or belongs to another owner"""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job = dict(job)
+        if job is None and self.store is not None:
+            # Submitted to another worker process
+            job = self.store.load(job_id)
+            if job is not None and job['submitted_at'] < self._clock() - self.ttl:
+                job = None
+        if job is None or job.pop('owner', None) != owner:
+            return None
+        return job
+
+    def _prune(self):
+        # Records are kept in submission order, so expired ones come first
+        expires_before = self._clock() - self.ttl
+        for job_id, job in list(self._jobs.items()):
+            if job['submitted_at'] >= expires_before:
+                break
+            if job['status'] != 'pending':
+                del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            return {'jobs': len(self._jobs), 'pending': self._pending}
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -11,7 +11,8 @@ from datetime import datetime, timedelta
 # Add the current directory to the path so we can import our app
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, db, Todo
+from app import create_app, db, Todo
+from structured_logging import configure_logging
 
 def create_sample_todos():
     """Create sample todos for demonstration"""
@@ -61,10 +62,9 @@ def create_sample_todos():
         }
     ]
     
+    # Create tables if they don't exist
+    app = create_app(create_schema=True)
     with app.app_context():
-        # Create tables if they don't exist
-        db.create_all()
-        
         # Check if we already have todos
         existing_todos = Todo.query.count()
         if existing_todos > 0:
@@ -106,4 +106,5 @@ def create_sample_todos():
         print("   - 'What tasks are due this week?'")
 
 if __name__ == '__main__':
+    configure_logging()
     create_sample_todos()
@@ -0,0 +1,135 @@
+"""
+In-process fan-out of committed todo changes to push subscribers.
+
+Each subscriber (an open SSE stream) gets a bounded queue. Publishing never
+blocks: if a subscriber falls so far behind that its queue is full, it is
+marked overflowed and dropped, and its stream tells the client to reload
+instead of buffering without limit. Idle subscribers just wait on their queue,
+so they cost a blocked thread and no CPU. Long-poll callers can wait for the
+next change with wait_for_change. Notices that are not changes (reminders) go
+out through the same queues with no seq.
+
+Subscribers and events belong to a topic (the tenant): events are only
+delivered to the subscribers of their own topic.
+"""
+
+import queue
+import threading
+
+
+class HubFull(RuntimeError):
+    """The hub already has max_subscribers subscribers"""
+
+
+class Subscription:
+    """One subscriber's queue of (seq, op, todo) events and (None, name, data) notices"""
+
+    def __init__(self, hub, max_queue, topic=None):
+        self._hub = hub
+        self.topic = topic
+        self._queue = queue.Queue(maxsize=max_queue)
+        # Publishers (commits, reminders) may offer from several threads at once
+        self._lock = threading.Lock()
+        self.overflowed = False
+
+    def _offer(self, events):
+        with self._lock:
+            if self.overflowed:
+                return
+            try:
+                for event in events:
+                    self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                # Missing events can't be made up for; the client has to reload
+                self.overflowed = True
+        self._hub.unsubscribe(self)
+
+    def get(self, timeout):
+        """Next event, or None if none arrived within timeout (or overflowed)"""
+        if self.overflowed:
+            return None
+        try:
+            event = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return None if self.overflowed else event
+
+    def close(self):
+        self._hub.unsubscribe(self)
+
+
+class EventHub:
+    """Broadcasts (seq, op, todo) change events to every subscriber of a topic"""
+
+    def __init__(self, max_queue=256, max_subscribers=1000):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._subscribers = {}  # topic -> subscriptions
+        self._count = 0
+        self._latest_seqs = {}  # topic -> newest seq published
+        self.latest_seq = 0
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, topic=None):
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise HubFull(f"{self._count} subscribers already connected")
+            subscription = Subscription(self, self.max_queue, topic)
+            self._subscribers.setdefault(topic, set()).add(subscription)
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.topic)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.topic]
+                self._count -= 1
+                if subscription.overflowed:
+                    self.dropped += 1
+
+    def publish(self, events, topic=None):
+        """Hand committed (seq, op, todo) events to the topic's subscribers, in order"""
+        if events:
+            self.publish_built(events[-1][0], len(events), lambda: events, topic)
+
+    def publish_built(self, last_seq, count, build_events, topic=None):
+        """publish() for count events up to last_seq that are only built if the topic has subscribers
+
+        build_events() returns the (seq, op, todo) list; with no one to hand
+        it to, only the seqs advance (which still wakes long-polls).
+        """
+        with self._lock:
+            self.latest_seq = max(self.latest_seq, last_seq)
+            self._latest_seqs[topic] = max(self._latest_seqs.get(topic, 0), last_seq)
+            self.published += count
+            subscribers = list(self._subscribers.get(topic, ()))
+            self._changed.notify_all()
+        if not subscribers:
+            return
+        events = build_events()
+        for subscription in subscribers:
+            subscription._offer(events)
+
+    def notify(self, name, data, topic=None):
+        """Hand a (None, name, data) notice that isn't a change to the topic's subscribers"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for subscription in subscribers:
+            subscription._offer([(None, name, data)])
+
+    def wait_for_change(self, after_seq, timeout, topic=None):
+        """Block until an event of topic newer than after_seq is published or timeout passes"""
+        with self._lock:
+            return self._changed.wait_for(lambda: self._latest_seqs.get(topic, 0) > after_seq, timeout)
+
+    def stats(self):
+        with self._lock:
+            return {'subscribers': self._count, 'topics': len(self._subscribers),
+                    'latest_seq': self.latest_seq, 'published': self.published, 'dropped': self.dropped}
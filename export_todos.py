@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Export script for AI-Powered Todo List
+Streams a tenant's todos to a file (or stdout) as NDJSON or a JSON array
+"""
+
+import sys
+import os
+import argparse
+
+# Add the current directory to the path so we can import our app
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from flask import g
+
+from app import create_app, filtered_todo_query, parse_fields_arg, iter_todo_export, EXPORT_FORMATS, DEFAULT_EXPORT_BATCH_SIZE
+from structured_logging import configure_logging
+
+
+def export_todos(output, fmt='ndjson', batch_size=DEFAULT_EXPORT_BATCH_SIZE, filters=None, tenant_id='default'):
+    """Write the tenant's todos matching filters to output, one batch at a time"""
+    with create_app().app_context():
+        g.tenant_id = tenant_id
+        query = filtered_todo_query(filters or {})
+        fields = parse_fields_arg(filters or {})
+        for chunk in iter_todo_export(query, fmt, batch_size, fields):
+            output.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export todos as NDJSON or JSON')
+    parser.add_argument('-f', '--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+    parser.add_argument('-o', '--output', help='file to write to (default: stdout)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_EXPORT_BATCH_SIZE,
+                        help='rows fetched from the database per batch')
+    parser.add_argument('--completed', help='only export completed (true) or pending (false) todos')
+    parser.add_argument('--priority', help='comma separated priorities to export')
+    parser.add_argument('--tenant', default='default', help='tenant whose todos to export')
+    parser.add_argument('--fields', help='comma separated fields to export (default: all)')
+    args = parser.parse_args()
+
+    filters = {key: value for key, value in (('completed', args.completed), ('priority', args.priority),
+                                             ('fields', args.fields)) if value}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            export_todos(output, args.format, args.batch_size, filters, args.tenant)
+        print(f"✅ Exported todos to {args.output}", file=sys.stderr)
+    else:
+        export_todos(sys.stdout, args.format, args.batch_size, filters, args.tenant)
+
+
+if __name__ == '__main__':
+    configure_logging()
+    main()
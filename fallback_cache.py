@@ -0,0 +1,197 @@
+"""
+Response cache for the Claude fallback of the chat parser.
+
+Parsed actions are cached under the normalized message plus a fingerprint of
+the todo context that was sent with the prompt, so a repeated phrasing is
+answered without another API call. Entries expire after a TTL, the least
+recently used entry is evicted when the cache is full, and entries are dropped
+as soon as a todo they refer to changes. The cache can optionally be persisted
+to a JSON file so it survives restarts; changes are written behind, at most
+once every save_delay seconds and at exit, rather than on every put.
+"""
+
+import os
+import atexit
+import re
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_message(message):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return _WHITESPACE_RE.sub(' ', message.lower()).strip().rstrip('.!?').strip()
+
+
+def context_fingerprint(todos):
+    """Short stable hash of the todo fields that appear in the fallback prompt"""
+    digest = hashlib.sha1()
+    for todo in todos:
+        digest.update(json.dumps(
+            [todo['id'], todo['title'], todo['completed'], todo['priority']]
+        ).encode())
+    return digest.hexdigest()[:16]
+
+
+class FallbackCache:
+    """Bounded LRU + TTL cache mapping (message, context) to a parsed action"""
+
+    def __init__(self, max_entries=1000, ttl=24 * 3600, path=None, save_delay=5.0, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.save_delay = save_delay
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Serializes file writes, so an older snapshot never replaces a newer one
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._save_timer = None
+        self._exit_hook = False
+        # key -> (expires_at, action, todo_ids), least recently used first
+        self._entries = OrderedDict()
+        # todo id -> keys of entries that refer to it
+        self._by_todo = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        if path:
+            self._load()
+
+    @staticmethod
+    def make_key(message, todos, tenant_id=None):
+        key = f"{normalize_message(message)}|{context_fingerprint(todos)}"
+        return key if tenant_id is None else f"{tenant_id}|{key}"
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Callers may mutate the action they get back
+            return dict(entry[1])
+
+    def put(self, key, action, todo_ids=()):
+        """Cache action under key; todo_ids are the todos it depends on"""
+        todo_ids = tuple(sorted({todo_id for todo_id in todo_ids if todo_id is not None}))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl, dict(action), todo_ids)
+            for todo_id in todo_ids:
+                self._by_todo.setdefault(todo_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._schedule_save()
+
+    def invalidate_todos(self, todo_ids):
+        """Drop every entry that refers to one of todo_ids"""
+        with self._lock:
+            keys = set()
+            for todo_id in todo_ids:
+                keys.update(self._by_todo.get(todo_id, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            if keys:
+                self._schedule_save()
+
+    def save(self):
+        """Write the changes not yet on disk to the file now"""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                saved = [[key, expires_at, action, list(todo_ids)]
+                         for key, (expires_at, action, todo_ids) in self._entries.items()]
+            self._write(saved)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for todo_id in entry[2]:
+            keys = self._by_todo.get(todo_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_todo[todo_id]
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as cache_file:
+                saved = json.load(cache_file)
+        except (OSError, ValueError):
+            return
+
+        now = self._clock()
+        for key, expires_at, action, todo_ids in saved:
+            if expires_at > now:
+                self._entries[key] = (expires_at, action, tuple(todo_ids))
+                for todo_id in todo_ids:
+                    self._by_todo.setdefault(todo_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _schedule_save(self):
+        """Called with the lock held after a change: save once save_delay has passed"""
+        if not self.path:
+            return
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+            if not self._exit_hook:
+                atexit.register(self.save)
+                self._exit_hook = True
+
+    def _write(self, saved):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        # Write to a temporary file first so a crash never leaves a torn cache
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.fallback-cache-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as tmp_file:
+                json.dump(saved, tmp_file)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Fallback cache save error", extra={'error': e})
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
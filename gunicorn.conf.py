@@ -0,0 +1,66 @@
+"""
+Production server settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+Preforked workers with threads (gthread, so slow clients, chat fallbacks and
+event streams don't hold a whole process), sized to the CPU count. An open
+event stream keeps its thread for as long as the client stays connected, so
+each worker caps its streams at the threads it doesn't reserve for ordinary
+requests; a stream over the cap gets a 503 and the browser tries again later.
+Serving S subscribers takes about S / (threads - reserved) workers. The app is imported once in the master and forked, so workers share
+its memory and start instantly; tables are created there once, and each
+worker drops the database connections it inherited.
+
+Signals to the master: HUP restarts the workers gracefully with the same
+code (preloaded), USR2 starts a new master with new code (then send WINCH and
+QUIT to the old one), TERM stops after in-flight requests finish.
+"""
+
+import multiprocessing
+import os
+
+# Every worker follows the change log and shares async chat jobs through the
+# database; must be set before the app is imported
+os.environ.setdefault('MULTI_PROCESS', '1')
+
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5001')}")
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+# Threads event streams may never take, so CRUD requests always find one
+request_threads = min(int(os.getenv('GUNICORN_REQUEST_THREADS', '8')), threads - 1)
+os.environ.setdefault('EVENT_MAX_SUBSCRIBERS', str(threads - request_threads))
+preload_app = True
+
+# Event streams idle between heartbeats, so the timeout must exceed SSE_HEARTBEAT
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+# Recycle workers now and then (staggered) to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+
+def on_starting(server):
+    # Once, in the master, instead of in every worker
+    from app import create_app
+
+    create_app(create_schema=True)
+
+
+def post_fork(server, worker):
+    # Pooled connections opened in the master must not be shared with it;
+    # close=False leaves them to the master instead of closing its sockets
+    from app import app, db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    from app import shutdown_background_work
+
+    shutdown_background_work()
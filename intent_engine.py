@@ -0,0 +1,110 @@
+"""
+Precompiled trigger-phrase scanner for the rule-based chat parser.
+
+All trigger phrases are compiled once into a single trie-shaped regex that is
+run over the input in one pass. The scan reports every phrase that occurs
+anywhere in the input (plain substring semantics, so overlapping phrases are
+all found); task IDs are pulled out with precompiled extractors only when a
+command needs them.
+"""
+
+import re
+
+
+def _trie_pattern(phrases):
+    """Build a regex alternation equivalent to phrases that prefers the longest match"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        terminal = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        # A greedy optional group tries the longer phrase first, then this one
+        return '(?:' + '|'.join(branches) + ')' + ('?' if terminal else '')
+
+    return build(trie)
+
+
+# Precompiled task ID extractors ("task 3", or any standalone number)
+TASK_ID_RE = re.compile(r'task (\d+)')
+NUMBER_RE = re.compile(r'\b(\d+)\b')
+
+
+class ScanResult:
+    """Phrases found in one pass over a message, plus lazily extracted task IDs"""
+
+    __slots__ = ('_engine', 'text', 'phrases')
+
+    def __init__(self, engine, text, phrases):
+        self._engine = engine
+        self.text = text
+        self.phrases = phrases
+
+    def __contains__(self, phrase):
+        return phrase in self.phrases
+
+    def has(self, category):
+        """True if any phrase of category occurs in the message"""
+        return not self._engine.vocabulary_sets[category].isdisjoint(self.phrases)
+
+    def matches(self, category):
+        """Phrases of category that occur in the message, in vocabulary order"""
+        return [phrase for phrase in self._engine.vocabulary[category] if phrase in self.phrases]
+
+    def first_category(self, categories):
+        """First of categories (in the given order) with a phrase in the message"""
+        for category in categories:
+            if self.has(category):
+                return category
+        return None
+
+    def position(self, phrase):
+        """Index of the first occurrence of phrase in the message"""
+        return self.text.find(phrase)
+
+    @property
+    def task_id(self):
+        """The number in the first "task <n>", or None"""
+        match = TASK_ID_RE.search(self.text)
+        return int(match.group(1)) if match else None
+
+    @property
+    def number(self):
+        """The first standalone number in the message, or None"""
+        match = NUMBER_RE.search(self.text)
+        return int(match.group(1)) if match else None
+
+
+class IntentEngine:
+    """Scans messages for every phrase of a fixed vocabulary in a single regex pass"""
+
+    def __init__(self, vocabulary):
+        """vocabulary maps a category name to its trigger phrases, in priority order"""
+        self.vocabulary = {category: tuple(phrases) for category, phrases in vocabulary.items()}
+        self.vocabulary_sets = {category: frozenset(phrases) for category, phrases in self.vocabulary.items()}
+        phrases = sorted({phrase for group in self.vocabulary.values() for phrase in group})
+
+        # Only the longest phrase starting at a position is reported by the
+        # regex; the shorter phrases that are its prefixes occur there too.
+        self._implied = {
+            phrase: tuple(other for other in phrases if phrase.startswith(other))
+            for phrase in phrases
+        }
+
+        # The lookahead never consumes input, so every position is tried and
+        # overlapping phrases are all reported.
+        self._scanner = re.compile('(?=(' + _trie_pattern(phrases) + '))')
+
+    def scan(self, text):
+        found = set()
+        for phrase in self._scanner.findall(text):
+            found.update(self._implied[phrase])
+        return ScanResult(self, text, found)
@@ -0,0 +1,248 @@
+"""
+Process-wide client for the Claude fallback of the chat parser.
+
+One long-lived HTTP session (with a connection pool) is shared by every
+request thread. Each call gets an overall deadline, the number of calls in
+flight is capped by a semaphore, transient failures are retried with jittered
+exponential backoff, and a circuit breaker stops calling the API for a while
+after repeated failures so callers fail fast instead of tying up workers.
+
+The client talks to the Messages HTTP API directly, so it can be pointed at a
+local fake server with base_url (ANTHROPIC_BASE_URL).
+"""
+
+import time
+import random
+import threading
+
+DEFAULT_BASE_URL = 'https://api.anthropic.com'
+API_VERSION = '2023-06-01'
+
+# Responses worth retrying: rate limited, server errors, overloaded
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class LLMError(RuntimeError):
+    """The fallback call failed"""
+
+
+class LLMUnavailable(LLMError):
+    """The call was not attempted (breaker open, no capacity or no API key)"""
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures.
+
+    While open every call is rejected; after reset_timeout one trial call is
+    let through (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self):
+        """True if a call may go ahead now"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def cancel_trial(self):
+        """Give back a half-open trial that was allowed but never made"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+
+
+class LLMClient:
+    """Pooled, deadline-bounded Messages API client shared by all threads"""
+
+    def __init__(self, api_key=None, base_url=None, timeout=10.0, deadline=20.0,
+                 max_concurrency=4, max_retries=2, backoff_base=0.25, backoff_max=4.0,
+                 breaker=None, session=None):
+        self.api_key = api_key
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._session = session
+        self._session_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.retries = 0
+        self.busy = 0
+
+    def _get_session(self):
+        # Created on first use so importing the app stays cheap
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def complete(self, prompt, model, max_tokens=300, temperature=0.0):
+        """Send prompt as a single user message and return the reply text.
+
+        Raises LLMUnavailable without calling the API when the breaker is
+        open or every slot stays busy until the deadline, and LLMError when
+        the call itself fails.
+        """
+        if not self.api_key:
+            raise LLMUnavailable("ANTHROPIC_API_KEY is not set")
+
+        started = time.monotonic()
+        expires_at = started + self.deadline
+        if not self.breaker.allow():
+            raise LLMUnavailable("Claude API circuit breaker is open")
+
+        if not self._slots.acquire(timeout=max(expires_at - time.monotonic(), 0)):
+            with self._stats_lock:
+                self.busy += 1
+            # Not the API's fault; just hand back a half-open trial if we held it
+            self.breaker.cancel_trial()
+            raise LLMUnavailable(f"No free Claude API slot within {self.deadline}s")
+
+        with self._stats_lock:
+            self.calls += 1
+        try:
+            text = self._call_with_retries(prompt, model, max_tokens, temperature, expires_at)
+        except Exception:
+            # Anything unexpected counts too, or a half-open trial would stay in flight forever
+            with self._stats_lock:
+                self.failures += 1
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._slots.release()
+
+        self.breaker.record_success()
+        return text
+
+    def _call_with_retries(self, prompt, model, max_tokens, temperature, expires_at):
+        payload = {
+            'model': model,
+            'max_tokens': max_tokens,
+            'temperature': temperature,
+            'messages': [{'role': 'user', 'content': prompt}],
+        }
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                raise LLMError(f"Claude API deadline of {self.deadline}s exceeded")
+            try:
+                return self._post(payload, min(self.timeout, remaining))
+            except _RetryableError as e:
+                if attempt >= self.max_retries:
+                    raise LLMError(str(e)) from e
+                # Full jitter keeps concurrent retries from arriving together
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if time.monotonic() + delay >= expires_at:
+                    raise LLMError(f"{e} (no time left to retry)") from e
+                attempt += 1
+                with self._stats_lock:
+                    self.retries += 1
+                time.sleep(delay)
+
+    def _post(self, payload, timeout):
+        import requests
+
+        try:
+            response = self._get_session().post(
+                f"{self.base_url}/v1/messages",
+                json=payload,
+                headers={
+                    'x-api-key': self.api_key,
+                    'anthropic-version': API_VERSION,
+                },
+                timeout=timeout,
+            )
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            raise _RetryableError(f"Claude API request failed: {e}") from e
+        except requests.RequestException as e:
+            raise LLMError(f"Claude API request failed: {e}") from e
+
+        if response.status_code in RETRYABLE_STATUS:
+            raise _RetryableError(f"Claude API returned {response.status_code}")
+        if response.status_code != 200:
+            raise LLMError(f"Claude API returned {response.status_code}: {response.text[:200]}")
+
+        try:
+            content = response.json()['content']
+            return ''.join(block.get('text', '') for block in content if block.get('type') == 'text')
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise LLMError(f"Unexpected Claude API response: {e}") from e
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'calls': self.calls,
+                'failures': self.failures,
+                'retries': self.retries,
+                'busy': self.busy,
+                'breaker': self.breaker.state,
+                'rejected': self.breaker.rejected,
+            }
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class _RetryableError(Exception):
+    pass
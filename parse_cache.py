@@ -0,0 +1,71 @@
+"""
+Cache of compiled chat parses.
+
+Most chat traffic is the same few hundred commands ("show tasks", "show
+pending", "complete first task"). What the rule-based parser makes of a
+message is mostly fixed by its text: the intent, priority, list filter, a
+task number, "first"/"last", or the name fragment to look up. Only the
+lookup of that position or name depends on the todos at the time.
+
+The parser compiles a message into a plan holding the fixed part, and the
+plans are kept here in a bounded LRU under the lowercased, stripped message,
+so a repeated message skips the scan and goes straight to the lookup (or to
+a copy of the finished action). Plans don't refer to todos or tenants, so
+they never need invalidating; they live as long as the process.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class ParseCache:
+    """Bounded LRU mapping a normalized message to its compiled plan"""
+
+    def __init__(self, max_entries=1024, max_message_length=200):
+        self.max_entries = max_entries
+        # Longer messages are mostly one-off "add ..." titles, not worth an entry
+        self.max_message_length = max_message_length
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # message -> plan, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compile(self, message, compile):
+        """The plan of message, from the cache or compile(message)"""
+        if self.max_entries <= 0 or len(message) > self.max_message_length:
+            return compile(message)
+        with self._lock:
+            plan = self._entries.get(message)
+            if plan is not None:
+                self._entries.move_to_end(message)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        # Compiled outside the lock; two threads may compile the same message, with the same result
+        plan = compile(message)
+        with self._lock:
+            self._entries[message] = plan
+            self._entries.move_to_end(message)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return plan
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._entries)
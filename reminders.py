@@ -0,0 +1,274 @@
+"""
+Due-date index and reminder scheduler.
+
+DueDateIndex keeps every todo that has a due date in a list sorted by
+(due date, id), so "what is due this week" or "what is overdue" is two bisects
+and a slice instead of a table scan. It is loaded once with an indexed range
+query and kept current from committed changes, like the title index.
+
+ReminderScheduler fires an "upcoming" reminder lead time before a pending
+todo is due and an "overdue" reminder when the due date passes. Only todos due
+within the next horizon sit in its min-heap; the window slides forward by
+pulling the next slice from the index. Rescheduled and completed todos leave
+stale heap entries behind, which are skipped when they come up.
+"""
+
+import bisect
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Named due-date ranges the chat parser understands
+DUE_RANGES = ('overdue', 'today', 'tomorrow', 'this_week', 'next_week')
+
+
+def due_range_bounds(name, now):
+    """(start, end) of a named range relative to now; None leaves a side open"""
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    next_week = today + timedelta(days=7 - today.weekday())
+    if name == 'overdue':
+        return None, now
+    if name == 'today':
+        return today, today + timedelta(days=1)
+    if name == 'tomorrow':
+        return today + timedelta(days=1), today + timedelta(days=2)
+    if name == 'this_week':
+        return today, next_week
+    if name == 'next_week':
+        return next_week, next_week + timedelta(days=7)
+    raise ValueError(f"unknown due-date range {name!r}")
+
+
+def parse_due_date(value):
+    """A due date as it is stored: naive, in the server's local time, like datetime.now().
+
+    Takes None, an ISO 8601 string or a datetime. One with a UTC offset is
+    converted to local time first, so it compares with the naive ones.
+    """
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+class DueDateIndex:
+    """Todos with a due date, ordered by (due date, id)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._keys = []     # sorted (due date, id)
+        self._todos = {}    # id -> (due date, completed)
+
+    def __len__(self):
+        return len(self._todos)
+
+    def load(self, rows):
+        """Replace the contents with (id, due date, completed) rows.
+
+        Rows that already come sorted by due date (an ORDER BY on the indexed
+        column) are appended without sorting.
+        """
+        with self._lock:
+            self._keys = []
+            self._todos = {}
+            ordered = True
+            for todo_id, due_date, completed in rows:
+                if due_date is None:
+                    continue
+                key = (due_date, todo_id)
+                if ordered and self._keys and key < self._keys[-1]:
+                    ordered = False
+                self._keys.append(key)
+                self._todos[todo_id] = (due_date, bool(completed))
+            if not ordered:
+                self._keys.sort()
+            self.loaded = True
+
+    def ensure_loaded(self, load_rows):
+        with self._lock:
+            if not self.loaded:
+                self.load(load_rows())
+        return self
+
+    def get(self, todo_id):
+        """(due date, completed) of a todo, or None if it has no due date"""
+        with self._lock:
+            return self._todos.get(todo_id)
+
+    def apply_changes(self, changes):
+        """Apply committed (op, todo) changes; ignored until the index is loaded.
+
+        Update snapshots may carry only the fields that changed. Completed
+        todos stay in the index so a partial update that reopens one still
+        knows its due date.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            for op, todo in changes:
+                todo_id = todo['id']
+                current = self._todos.get(todo_id)
+                if op == 'delete':
+                    self._set(todo_id, None, False)
+                    continue
+                if 'due_date' in todo:
+                    due_date = parse_due_date(todo['due_date'])
+                elif current is not None:
+                    due_date = current[0]
+                else:
+                    continue
+                completed = todo.get('completed', current[1] if current else False)
+                self._set(todo_id, due_date, bool(completed))
+
+    def _set(self, todo_id, due_date, completed):
+        current = self._todos.get(todo_id)
+        if current is not None and current[0] != due_date:
+            index = bisect.bisect_left(self._keys, (current[0], todo_id))
+            if index < len(self._keys) and self._keys[index] == (current[0], todo_id):
+                del self._keys[index]
+        if due_date is None:
+            self._todos.pop(todo_id, None)
+            return
+        if current is None or current[0] != due_date:
+            bisect.insort(self._keys, (due_date, todo_id))
+        self._todos[todo_id] = (due_date, completed)
+
+    def between(self, start=None, end=None, completed=False):
+        """(due date, id) with start <= due < end, in due order.
+
+        completed=False lists pending todos, True completed ones and None both;
+        start or end None leaves that side open.
+        """
+        with self._lock:
+            low = 0 if start is None else bisect.bisect_left(self._keys, (start,))
+            high = len(self._keys) if end is None else bisect.bisect_left(self._keys, (end,))
+            keys = self._keys[low:high]
+            if completed is None:
+                return keys
+            return [key for key in keys if self._todos[key[1]][1] == completed]
+
+
+class ReminderScheduler:
+    """Fires notify(kind, todo_id, due_date) for upcoming and overdue todos"""
+
+    def __init__(self, index, notify, lead=timedelta(hours=1), horizon=timedelta(hours=24),
+                 clock=datetime.now):
+        self.index = index
+        self.notify = notify
+        self.lead = lead
+        self.horizon = horizon
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap = []         # (fire at, id, kind, due date)
+        self._scheduled = {}    # id -> due date its heap entries are for
+        self._window_end = None
+        self._thread = None
+        self._stopping = False
+        self.fired = 0
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        """Schedule todos due from now on and start the timer thread (once)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            now = self._clock()
+            # Everything due from now on, up to now + horizon
+            self._window_end = now - self.lead
+            self._extend_window(now)
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='reminders', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._wakeup.notify_all()
+        if thread is not None:
+            thread.join()
+
+    def reschedule(self, todo_ids):
+        """Bring the heap in line with the index for todos that just changed"""
+        with self._lock:
+            if self._thread is None:
+                return
+            now = self._clock()
+            for todo_id in todo_ids:
+                self._schedule(todo_id, self.index.get(todo_id), now)
+            self._wakeup.notify_all()
+
+    def _schedule(self, todo_id, entry, now):
+        if entry is not None and not entry[1] and self._scheduled.get(todo_id) == entry[0]:
+            return
+        # Todos already past due are never (re)scheduled, so an overdue
+        # reminder fires once even if the todo is edited afterwards
+        if entry is None or entry[1] or not now < entry[0] < self._window_end + self.lead:
+            self._scheduled.pop(todo_id, None)
+            return
+        due_date = entry[0]
+        self._scheduled[todo_id] = due_date
+        heapq.heappush(self._heap, (due_date - self.lead, todo_id, 'upcoming', due_date))
+        heapq.heappush(self._heap, (due_date, todo_id, 'overdue', due_date))
+
+    def _extend_window(self, now):
+        """Slide the window to now + horizon, scheduling the todos that entered it"""
+        start, end = self._window_end + self.lead, now + self.horizon + self.lead
+        if end <= start:
+            return
+        self._window_end = now + self.horizon
+        for due_date, todo_id in self.index.between(start, end):
+            self._schedule(todo_id, (due_date, False), now)
+        if len(self._heap) > 2 * len(self._scheduled) + 64:
+            # Mostly stale entries; rebuild from what is still scheduled
+            self._heap = [item for item in self._heap if self._scheduled.get(item[1]) == item[3]]
+            heapq.heapify(self._heap)
+
+    def _take_due(self, now):
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, todo_id, kind, due_date = heapq.heappop(self._heap)
+            if self._scheduled.get(todo_id) != due_date:
+                continue
+            if kind == 'overdue':
+                del self._scheduled[todo_id]
+            due.append((kind, todo_id, due_date))
+        return due
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+                now = self._clock()
+                if now >= self._window_end - self.horizon / 2:
+                    self._extend_window(now)
+                due = self._take_due(now)
+                if not due:
+                    wake_at = self._window_end - self.horizon / 2
+                    if self._heap:
+                        wake_at = min(wake_at, self._heap[0][0])
+                    self._wakeup.wait(max((wake_at - now).total_seconds(), 0.01))
+                    continue
+            for kind, todo_id, due_date in due:
+                try:
+                    self.notify(kind, todo_id, due_date)
+                    self.fired += 1
+                except Exception as e:
+                    logger.warning("Reminder failed", extra={'todo_id': todo_id, 'error': e})
+
+    def stats(self):
+        with self._lock:
+            return {'running': self._thread is not None, 'scheduled': len(self._scheduled),
+                    'heap': len(self._heap), 'fired': self.fired}
@@ -0,0 +1,56 @@
+"""
+Cache of serialized list responses keyed by collection version.
+
+Entries are stored under (version, request key). Once a request arrives with a
+newer version everything cached for older versions is dropped, so a body is
+never served after the collection has changed and memory stays bounded by the
+number of distinct queries seen since the last write.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class VersionedResponseCache:
+    """LRU of response bodies (and headers) for the current collection version"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()   # request key -> (body, headers)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, key):
+        with self._lock:
+            entry = self._entries.get(key) if version == self._version else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, version, key, body, headers=()):
+        with self._lock:
+            if self._version is not None and version < self._version:
+                # Built from an older version than what is already cached
+                return
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = (body, tuple(headers))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'version': self._version,
+                    'hits': self.hits, 'misses': self.misses}
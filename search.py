@@ -0,0 +1,272 @@
+"""
+Full-text search over todo titles and descriptions.
+
+On SQLite the todo table gets an external-content FTS5 index (todo_fts) that
+triggers keep in step with every insert, delete and title/description update,
+bulk statements included. Results are ranked with bm25, with title hits
+weighted above description hits; the last word of a query also matches as a
+prefix, so search-as-you-type works; and matches come back highlighted.
+Databases without FTS5 fall back to LIKE matching with the same result shape.
+
+Per-row triggers make large inserts several times slower, so while a row
+is in the bulk_table (only ever inside the inserting transaction) the
+insert trigger stands aside, and index_inserted() adds the new rows to the
+index with one statement afterwards.
+
+The chat parser can resolve todo names through the index as well (find_id),
+matching on word prefixes rather than arbitrary substrings.
+
+The index also holds each todo's tenant id, so a tenant's query only walks
+the postings of that tenant's rows; the exact tenant_id comparison on the
+joined row keeps ids that tokenize alike ("a-b", "A_b") apart.
+"""
+
+import re
+
+from sqlalchemy import and_, or_, select, text
+
+# bm25 column weights: a title hit counts ten times a description hit
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 12
+# Shorter words are ignored when resolving chat names word by word
+MIN_WORD_LENGTH = 3
+
+_TERM_RE = re.compile(r'(\w+)(\*?)')
+
+
+def search_terms(query):
+    """(word, is prefix) pairs of a free-text query; the last word is always a prefix"""
+    terms = [(word.lower(), bool(star)) for word, star in _TERM_RE.findall(query)]
+    if terms:
+        terms[-1] = (terms[-1][0], True)
+    return terms
+
+
+def _fts_term(word, prefix):
+    # Quoted, so FTS5 operators and column names in user input are plain words
+    return f'"{word}"*' if prefix else f'"{word}"'
+
+
+def _fts_tenant(tenant_id):
+    quoted = tenant_id.replace('"', '""')
+    return f'tenant_id : "{quoted}"'
+
+
+class TodoSearch:
+    """Search and name lookup over a todo table, via FTS5 where available"""
+
+    def __init__(self, table, fts_table='todo_fts', bulk_table='todo_bulk_insert'):
+        self.table = table
+        self.fts_table = fts_table
+        self.bulk_table = bulk_table
+        self._fts = None    # unknown until install() or the first query
+
+    def _ddl(self):
+        todo, fts = self.table.name, self.fts_table
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"title, description, tenant_id, content='{todo}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            f"CREATE TABLE IF NOT EXISTS {self.bulk_table} (active INTEGER)",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {todo} "
+            f"WHEN NOT EXISTS (SELECT 1 FROM {self.bulk_table}) BEGIN "
+            f"INSERT INTO {fts}(rowid, title, description, tenant_id) "
+            f"VALUES (new.id, new.title, new.description, new.tenant_id); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {todo} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, description, tenant_id) "
+            f"VALUES ('delete', old.id, old.title, old.description, old.tenant_id); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF title, description, tenant_id ON {todo} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, description, tenant_id) "
+            f"VALUES ('delete', old.id, old.title, old.description, old.tenant_id); "
+            f"INSERT INTO {fts}(rowid, title, description, tenant_id) "
+            f"VALUES (new.id, new.title, new.description, new.tenant_id); END",
+        ]
+
+    def _fts_sql(self, connection):
+        return connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': self.fts_table}
+        ).scalar()
+
+    def _fts_exists(self, connection):
+        return self._fts_sql(connection) is not None
+
+    def _drop(self, connection):
+        fts = self.fts_table
+        for trigger in ('insert', 'delete', 'update'):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{trigger}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+
+    def install(self, connection):
+        """Create the FTS index and its triggers if missing; True if FTS is in use.
+
+        A newly created index is filled from the existing rows once, as is
+        one rebuilt because it predates the tenant_id column.
+        """
+        if connection.dialect.name != 'sqlite':
+            self._fts = False
+            return False
+        existing_sql = self._fts_sql(connection)
+        if existing_sql is not None and 'tenant_id' not in existing_sql:
+            self._drop(connection)
+            existing_sql = None
+        existed = existing_sql is not None
+        trigger_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :name"),
+            {'name': f"{self.fts_table}_insert"}
+        ).scalar()
+        if trigger_sql is not None and self.bulk_table not in trigger_sql:
+            # From before bulk inserts could pause it
+            connection.execute(text(f"DROP TRIGGER {self.fts_table}_insert"))
+        try:
+            for statement in self._ddl():
+                connection.execute(text(statement))
+        except Exception:
+            # SQLite built without FTS5
+            self._fts = False
+            return False
+        if not existed:
+            connection.execute(text(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')"))
+        self._fts = True
+        return True
+
+    def index_inserted(self, connection, first_id, last_id):
+        """Index the rows with ids first_id to last_id, inserted while the insert trigger stood aside.
+
+        Bounded on both sides, so a row the trigger already indexed is never added twice.
+        """
+        todo, fts = self.table.name, self.fts_table
+        connection.execute(text(
+            f"INSERT INTO {fts}(rowid, title, description, tenant_id) "
+            f"SELECT id, title, description, tenant_id FROM {todo} WHERE id BETWEEN :first_id AND :last_id"
+        ), {'first_id': first_id, 'last_id': last_id})
+
+    def uses_fts(self, connection):
+        if self._fts is None:
+            self._fts = connection.dialect.name == 'sqlite' and self._fts_exists(connection)
+        return self._fts
+
+    def search(self, connection, query, tenant_id, limit=20, completed=None):
+        """A tenant's best matches for a free-text query, best first.
+
+        Returns dicts with the todo id, a score (higher is better) and the
+        title and description with matches wrapped in <mark> tags.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        if self.uses_fts(connection):
+            return self._search_fts(connection, terms, tenant_id, limit, completed)
+        return self._search_like(connection, terms, tenant_id, limit, completed)
+
+    def _search_fts(self, connection, terms, tenant_id, limit, completed):
+        todo, fts = self.table.name, self.fts_table
+        status = '' if completed is None else f' AND {todo}.completed = :completed'
+        # User terms only ever match titles and descriptions
+        words = ' '.join(_fts_term(word, prefix) for word, prefix in terms)
+        rows = connection.execute(text(
+            f"SELECT {todo}.id, bm25({fts}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}, 0.0) AS rank, "
+            f"highlight({fts}, 0, :start, :end) AS title, "
+            f"snippet({fts}, 1, :start, :end, :ellipsis, {SNIPPET_TOKENS}) AS description "
+            f"FROM {fts} JOIN {todo} ON {todo}.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :match AND {todo}.tenant_id = :tenant_id{status} ORDER BY rank LIMIT :limit"
+        ), {
+            'match': f'{_fts_tenant(tenant_id)} AND {{title description}} : ({words})',
+            'tenant_id': tenant_id,
+            'start': HIGHLIGHT_START, 'end': HIGHLIGHT_END, 'ellipsis': SNIPPET_ELLIPSIS,
+            'completed': completed, 'limit': limit,
+        })
+        return [
+            {'id': row.id, 'score': round(-row.rank, 6),
+             'highlights': {'title': row.title, 'description': row.description}}
+            for row in rows
+        ]
+
+    def _search_like(self, connection, terms, tenant_id, limit, completed):
+        columns = self.table.c
+        conditions = [columns.tenant_id == tenant_id]
+        for word, prefix in terms:
+            pattern = '%' + word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append(or_(columns.title.ilike(pattern, escape='\\'),
+                                  columns.description.ilike(pattern, escape='\\')))
+        if completed is not None:
+            conditions.append(columns.completed == completed)
+        # Score a bounded set of candidates the way bm25's weights would roughly
+        rows = connection.execute(
+            select(columns.id, columns.title, columns.description)
+            .where(and_(*conditions)).order_by(columns.id).limit(limit * 10)
+        )
+        words = [word for word, prefix in terms]
+        hits = []
+        for row in rows:
+            title, description = (row.title or '').lower(), (row.description or '').lower()
+            score = sum(TITLE_WEIGHT * title.count(word) + DESCRIPTION_WEIGHT * description.count(word)
+                        for word in words)
+            hits.append({'id': row.id, 'score': float(score), 'highlights': {
+                'title': _highlight(row.title, words),
+                'description': _highlight(row.description, words),
+            }})
+        hits.sort(key=lambda hit: -hit['score'])
+        return hits[:limit]
+
+    def find_id(self, connection, name, tenant_id, pending_only=False):
+        """Id of the tenant's todo a chat message names, or None.
+
+        Same precedence as the title index (exact title, whole name, every
+        significant word, then two of them; lowest id within a pass), with
+        words matched as prefixes of title words. Only works with FTS.
+        """
+        name = name.lower().strip()
+        words = [word for word, prefix in search_terms(name)]
+        if not words:
+            return None
+
+        # Exact title or the whole name as a phrase; rows come in id order
+        phrase = '"' + ' '.join(words) + '"*'
+        first_containing = None
+        for todo_id, title in self._title_matches(connection, f'title : {phrase}', tenant_id, pending_only):
+            title = (title or '').lower()
+            if title == name:
+                return todo_id
+            if first_containing is None and name in title:
+                first_containing = todo_id
+        if first_containing is not None:
+            return first_containing
+
+        significant = [word for word in words if len(word) >= MIN_WORD_LENGTH]
+        if not significant:
+            return None
+        match = ' AND '.join(f'title : "{word}"*' for word in significant)
+        for todo_id, title in self._title_matches(connection, match, tenant_id, pending_only):
+            return todo_id
+
+        pairs = [
+            f'(title : "{significant[i]}"* AND title : "{significant[j]}"*)'
+            for i in range(len(significant)) for j in range(i + 1, len(significant))
+        ]
+        if not pairs:
+            return None
+        for todo_id, title in self._title_matches(connection, ' OR '.join(pairs), tenant_id, pending_only):
+            return todo_id
+        return None
+
+    def _title_matches(self, connection, match, tenant_id, pending_only):
+        todo, fts = self.table.name, self.fts_table
+        status = f' AND {todo}.completed = 0' if pending_only else ''
+        return connection.execute(text(
+            f"SELECT {todo}.id, {todo}.title FROM {fts} JOIN {todo} ON {todo}.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :match AND {todo}.tenant_id = :tenant_id{status} ORDER BY {fts}.rowid"
+        ), {'match': f'{_fts_tenant(tenant_id)} AND ({match})', 'tenant_id': tenant_id})
+
+
+def _highlight(value, words):
+    """value with every occurrence of words wrapped in the highlight tags"""
+    if not value:
+        return value
+    pattern = re.compile('|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True)),
+                         re.IGNORECASE)
+    return pattern.sub(lambda match: f"{HIGHLIGHT_START}{match.group(0)}{HIGHLIGHT_END}", value)
@@ -1,21 +1,72 @@
-import React, { useState, useEffect } from 'react';
-import { Container, Row, Col, Card, Badge } from 'react-bootstrap';
+import React, { useState, useEffect, useRef } from 'react';
+import { Container, Row, Col, Card, Badge, Alert } from 'react-bootstrap';
 import TodoList from './components/TodoList';
 import ChatInterface from './components/ChatInterface';
 import * as todoService from './services/todoService';
 
+// Update events may carry only the fields that changed
+const applyTodoEvent = (todos, op, todo) => {
+  if (op === 'delete') {
+    return todos.filter(t => t.id !== todo.id);
+  }
+  if (todos.some(t => t.id === todo.id)) {
+    return todos.map(t => t.id === todo.id ? { ...t, ...todo } : t);
+  }
+  // Full snapshots (creates, replayed changes) of todos we haven't seen yet
+  return todo.created_at !== undefined ? [...todos, todo] : todos;
+};
+
+// A burst of pushed changes (imports, batch edits) refreshes the counts once
+const STATS_REFRESH_DELAY_MS = 250;
+
 function App() {
   const [todos, setTodos] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [reminder, setReminder] = useState(null);
+  const [stats, setStats] = useState({ total: 0, completed: 0, pending: 0 });
+  const statsTimer = useRef(null);
 
   useEffect(() => {
     loadTodos();
   }, []);
 
+  useEffect(() => {
+    // Apply changes made elsewhere (other tabs, chat, imports) as they happen
+    return todoService.subscribeToTodoEvents({
+      onChange: (op, todo) => {
+        setTodos((current) => applyTodoEvent(current, op, todo));
+        scheduleStatsRefresh();
+      },
+      onResync: loadTodos,
+      onReminder: setReminder,
+    });
+  }, []);
+
+  useEffect(() => () => clearTimeout(statsTimer.current), []);
+
+  const scheduleStatsRefresh = () => {
+    if (statsTimer.current === null) {
+      statsTimer.current = setTimeout(() => {
+        statsTimer.current = null;
+        loadStats();
+      }, STATS_REFRESH_DELAY_MS);
+    }
+  };
+
+  // Counts come from the server, which keeps them without reading every todo
+  const loadStats = async () => {
+    try {
+      setStats(await todoService.getTodoStats());
+    } catch (error) {
+      console.error('Error loading stats:', error);
+    }
+  };
+
   const loadTodos = async () => {
     try {
       const data = await todoService.getTodos();
       setTodos(data);
+      loadStats();
     } catch (error) {
       console.error('Error loading todos:', error);
     } finally {
@@ -99,6 +150,18 @@ function App() {
         </div>
       </Card>
 
+      {reminder && (
+        <Alert
+          variant={reminder.kind === 'overdue' ? 'danger' : 'warning'}
+          dismissible
+          onClose={() => setReminder(null)}
+        >
+          ⏰ <strong>{reminder.todo.title}</strong>{' '}
+          {reminder.kind === 'overdue' ? 'is overdue' : 'is due soon'}
+          {reminder.todo.due_date && ` (${new Date(reminder.todo.due_date).toLocaleString()})`}
+        </Alert>
+      )}
+
       <Row className="g-4">
         {/* Left Column - Todo List */}
         <Col lg={6} className="d-flex">
@@ -110,13 +173,13 @@ function App() {
               </div>
               <div className="d-flex justify-content-center gap-3">
                 <Badge bg="primary" className="px-2 py-1">
-                  {todos.length} Total
+                  {stats.total} Total
                 </Badge>
                 <Badge bg="warning" className="px-2 py-1">
-                  {todos.filter(t => !t.completed).length} Pending
+                  {stats.pending} Pending
                 </Badge>
                 <Badge bg="success" className="px-2 py-1">
-                  {todos.filter(t => t.completed).length} Done
+                  {stats.completed} Done
                 </Badge>
               </div>
             </Card.Header>
@@ -163,15 +226,15 @@ function App() {
         <Card.Body className="text-center">
           <Row>
             <Col md={4}>
-              <h5 className="text-primary">{todos.length}</h5>
+              <h5 className="text-primary">{stats.total}</h5>
               <small className="text-muted">Total Tasks</small>
             </Col>
             <Col md={4}>
-              <h5 className="text-success">{todos.filter(t => t.completed).length}</h5>
+              <h5 className="text-success">{stats.completed}</h5>
               <small className="text-muted">Completed</small>
             </Col>
             <Col md={4}>
-              <h5 className="text-warning">{todos.filter(t => !t.completed).length}</h5>
+              <h5 className="text-warning">{stats.pending}</h5>
               <small className="text-muted">Pending</small>
             </Col>
           </Row>
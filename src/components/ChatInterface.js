@@ -107,6 +107,12 @@ const ChatInterface = ({ onAction }) => {
         aiMessageContent = "I had trouble understanding that. Could you try rephrasing your request?";
       }
 
+      // The name fit other tasks just as well; let the user catch a wrong pick
+      if (response.also_matched?.length) {
+        const others = response.also_matched.map((todo) => `"${todo.title}"`).join(', ');
+        aiMessageContent += `\n\nThat also matched ${others}. Use the task number if you meant one of those.`;
+      }
+
       const aiMessage = {
         id: Date.now() + 1,
         type: 'ai',
@@ -20,6 +20,17 @@ export const getTodos = async () => {
   }
 };
 
+// { total, completed, pending, by_priority, overdue, due_this_week }, counted by the server
+export const getTodoStats = async () => {
+  try {
+    const response = await api.get('/todos/stats');
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching todo stats:', error);
+    throw error;
+  }
+};
+
 export const createTodo = async (todoData) => {
   try {
     const response = await api.post('/todos', todoData);
@@ -50,9 +61,32 @@ export const deleteTodo = async (id) => {
 };
 
 // AI Chat
+const CHAT_JOB_POLL_INTERVAL_MS = 500;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Messages the rule-based parser can't handle are answered by a background
+// job; poll it until the reply is ready
+const waitForChatJob = async (jobId) => {
+  for (;;) {
+    await sleep(CHAT_JOB_POLL_INTERVAL_MS);
+    const response = await api.get(`/chat/jobs/${jobId}`);
+    const job = response.data;
+    if (job.status === 'done') {
+      return { ai_response: job.ai_response, result: job.result };
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Chat job failed');
+    }
+  }
+};
+
 export const sendChatMessage = async (message) => {
   try {
-    const response = await api.post('/chat', { message });
+    const response = await api.post('/chat', { message, async: true });
+    if (response.status === 202) {
+      return await waitForChatJob(response.data.job_id);
+    }
     return response.data;
   } catch (error) {
     console.error('Error sending chat message:', error);
@@ -60,12 +94,54 @@ export const sendChatMessage = async (message) => {
   }
 };
 
+// Live todo changes pushed by the server (server-sent events). The browser
+// reconnects on its own and the server replays what was missed.
+const STREAM_RETRY_MS = 30000;
+
+export const subscribeToTodoEvents = ({ onChange, onResync, onReminder }) => {
+  let source;
+  let lastEventId = null;
+  let retryTimer = null;
+
+  const connect = () => {
+    const since = lastEventId ? `?since=${lastEventId}` : '';
+    source = new EventSource(`${API_BASE_URL}/todos/events${since}`);
+    ['create', 'update', 'delete'].forEach((op) => {
+      source.addEventListener(op, (event) => {
+        lastEventId = event.lastEventId || lastEventId;
+        onChange(op, JSON.parse(event.data));
+      });
+    });
+    // Sent when this client fell too far behind; reload the whole list
+    source.addEventListener('resync', () => onResync());
+    // { kind: 'upcoming' | 'overdue', todo } when a pending todo is about to be or becomes due
+    if (onReminder) {
+      source.addEventListener('reminder', (event) => onReminder(JSON.parse(event.data)));
+    }
+    // The browser gives up on an error response, such as the 503 a server
+    // with every stream slot taken answers; try again later from where we were
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        retryTimer = setTimeout(connect, STREAM_RETRY_MS);
+      }
+    };
+  };
+
+  connect();
+  return () => {
+    clearTimeout(retryTimer);
+    source.close();
+  };
+};
+
 const todoService = {
   getTodos,
+  getTodoStats,
   createTodo,
   updateTodo,
   deleteTodo,
   sendChatMessage,
+  subscribeToTodoEvents,
 };
 
 export default todoService;
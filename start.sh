@@ -1,6 +1,7 @@
 etassiss#!/bin/bash
 
 # AI-Powered Todo List - Development Startup Script
+# ./start.sh --production runs the backend under gunicorn (gunicorn.conf.py) instead
 
 echo "🤖 Starting AI-Powered Todo List Application..."
 echo "================================================"
@@ -8,15 +9,15 @@ echo "================================================"
 # Check if .env file exists
 if [ ! -f .env ]; then
     echo "⚠️  .env file not found!"
-    echo "📝 Please copy env.example to .env and add your OpenAI API key:"
+    echo "📝 Please copy env.example to .env and add your Anthropic API key:"
     echo "   cp env.example .env"
-    echo "   # Then edit .env with your OPENAI_API_KEY"
+    echo "   # Then edit .env with your ANTHROPIC_API_KEY"
     exit 1
 fi
 
 # Check if Python dependencies are installed
 echo "🐍 Checking Python dependencies..."
-if ! python -c "import flask, openai, flask_sqlalchemy" 2>/dev/null; then
+if ! python -c "import flask, flask_sqlalchemy, requests" 2>/dev/null; then
     echo "📦 Installing Python dependencies..."
     pip install -r requirements.txt
 fi
@@ -34,8 +35,13 @@ echo "Frontend: http://localhost:3000"
 echo "================================================"
 
 # Start backend server in background
-echo "🔧 Starting Flask backend server..."
-python app.py &
+if [ "$1" = "--production" ]; then
+    echo "🔧 Starting gunicorn backend server..."
+    gunicorn -c gunicorn.conf.py wsgi:app &
+else
+    echo "🔧 Starting Flask backend server..."
+    python app.py &
+fi
 BACKEND_PID=$!
 
 # Wait a moment for backend to start
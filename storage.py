@@ -0,0 +1,115 @@
+"""
+Database configuration for the todo app.
+
+The database URI comes from DATABASE_URL (default: SQLite todos.db in the
+instance folder), so the same models run on PostgreSQL as well. SQLite
+connections get pragmas suited to a web app with concurrent writers: WAL
+journal mode so readers don't block the writer, synchronous=NORMAL so a commit
+doesn't wait for a full fsync, a busy timeout instead of immediate "database is
+locked" errors, memory-mapped reads and enforced foreign keys.
+"""
+
+import os
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = 'sqlite:///todos.db'
+
+# PRAGMA name -> (environment variable, default)
+SQLITE_PRAGMA_SETTINGS = {
+    'journal_mode': ('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': ('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': ('SQLITE_BUSY_TIMEOUT', '5000'),       # milliseconds
+    'mmap_size': ('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    'temp_store': ('SQLITE_TEMP_STORE', 'MEMORY'),
+    'foreign_keys': ('SQLITE_FOREIGN_KEYS', 'ON'),
+}
+
+
+def database_uri():
+    """The configured database URI (DATABASE_URL)"""
+    uri = os.getenv('DATABASE_URL', DEFAULT_DATABASE_URI)
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def is_sqlite_memory(uri):
+    return is_sqlite(uri) and (uri in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in uri)
+
+
+def engine_options(uri):
+    """SQLAlchemy engine options (pool sizing) for uri, from the environment"""
+    if is_sqlite_memory(uri):
+        # Flask-SQLAlchemy shares one in-memory connection; nothing to size
+        return {}
+
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    }
+    if not is_sqlite(uri):
+        # Server connections can be dropped by the server or a proxy
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    return options
+
+
+def sqlite_pragmas():
+    """PRAGMA name -> value to run on every new SQLite connection"""
+    pragmas = {}
+    for name, (env_name, default) in SQLITE_PRAGMA_SETTINGS.items():
+        value = os.getenv(env_name, default)
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, pragmas=None):
+    """Run pragmas on every connection engine opens (no-op for other databases)"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas() if pragmas is None else pragmas
+    if engine.url.database in (None, '', ':memory:'):
+        # WAL needs a file; the other pragmas still apply
+        pragmas = {name: value for name, value in pragmas.items() if name != 'journal_mode'}
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def hold_write_lock(connection):
+    """Make sure a SQLite transaction holds the write lock before it reads what it is about to write.
+
+    The driver only begins a transaction right before the first write, so
+    reads made earlier see a state another connection can still change. If
+    nothing has been written yet, BEGIN IMMEDIATE takes the lock now (waiting
+    up to the busy timeout). No-op for other databases.
+    """
+    if connection.dialect.name != 'sqlite':
+        return
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+
+def configure_app(app):
+    """Fill in the database settings of a Flask app from the environment"""
+    uri = database_uri()
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+
+
+def configure_engine(engine):
+    """Per-connection setup for an engine created from configure_app's settings"""
+    apply_sqlite_pragmas(engine)
@@ -0,0 +1,47 @@
+"""
+Structured log lines for the app's entry points.
+
+Every record becomes one line of key=value fields (logfmt): time, level,
+logger and msg, then whatever the call passed in extra=, so logs can be
+filtered by field instead of by message text. Importing the app configures
+nothing; the entry points (wsgi.py, python app.py, the CLI tools) call
+configure_logging(), which leaves an already configured root logger alone.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _format_value(value):
+    text = str(value)
+    if text and not any(char in text for char in ' "=\n'):
+        return text
+    return json.dumps(text)
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Formats a record as time=... level=... logger=... msg=... plus its extra= fields"""
+
+    def format(self, record):
+        fields = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        fields.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            fields['exc'] = self.formatException(record.exc_info)
+        return ' '.join(f"{key}={_format_value(value)}" for key, value in fields.items())
+
+
+def configure_logging(level=None):
+    """Log to stderr as key=value lines at level (default LOG_LEVEL, else INFO)"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(KeyValueFormatter())
+    logging.basicConfig(level=(level or os.getenv('LOG_LEVEL', 'INFO')).upper(), handlers=[handler])
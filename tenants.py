@@ -0,0 +1,61 @@
+"""
+Tenants: the users or lists that share one instance.
+
+Every todo belongs to one tenant, and every route is available both under
+/api/... (the default tenant, what single-user installs and the web client
+use) and under /api/tenants/<tenant_id>/.... In-process state that used to be
+built over the whole table (title indexes, response caches) is kept per
+tenant in a PerTenant map, so a request only ever pays for its own tenant's
+todos.
+"""
+
+import threading
+from collections import OrderedDict
+
+DEFAULT_TENANT = 'default'
+# Letters, digits, '_', '.' and '-'; at most 40 characters so derived names
+# (collection_state rows) fit their columns
+TENANT_ID_PATTERN = r'[A-Za-z0-9][A-Za-z0-9_.-]{0,39}'
+
+
+class PerTenant:
+    """One object per tenant, made on first use by factory(), least recently used dropped first.
+
+    Only fit for state that can be rebuilt (indexes, caches): an evicted
+    tenant just gets a fresh object next time.
+    """
+
+    def __init__(self, factory, max_tenants=1000):
+        self.factory = factory
+        self.max_tenants = max_tenants
+        self._lock = threading.Lock()
+        self._items = OrderedDict()     # tenant id -> object, least recently used first
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, tenant_id):
+        with self._lock:
+            item = self._items.get(tenant_id)
+            if item is None:
+                item = self._items[tenant_id] = self.factory()
+                while len(self._items) > self.max_tenants:
+                    self._items.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._items.move_to_end(tenant_id)
+            return item
+
+    def peek(self, tenant_id):
+        """The tenant's object if it exists; doesn't create one or count as a use"""
+        with self._lock:
+            return self._items.get(tenant_id)
+
+    def values(self):
+        with self._lock:
+            return list(self._items.values())
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,53 @@
+"""
+Shared fixtures: one app on a throwaway SQLite database for the whole run.
+
+The environment is set before app is imported, so the app never touches
+todos.db, never calls the Claude API and runs no reminder timer. Each test
+works in a tenant of its own, so tests don't see each other's todos.
+"""
+
+import os
+import sys
+import uuid
+import shutil
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_directory = tempfile.mkdtemp(prefix='todo-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_directory, 'todos.db')}"
+os.environ['ANTHROPIC_API_KEY'] = ''
+os.environ['REMINDERS_ENABLED'] = '0'
+os.environ['MULTI_PROCESS'] = '0'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+
+    yield create_app(create_schema=True)
+    shutil.rmtree(_directory, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def new_tenant():
+    return f"t-{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def tenant():
+    """A tenant id no other test uses"""
+    return new_tenant()
+
+
+@pytest.fixture
+def api(tenant):
+    """URL prefix of the test's tenant"""
+    return f"/api/tenants/{tenant}"
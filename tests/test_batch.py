@@ -0,0 +1,79 @@
+import sqlite3
+
+from sqlalchemy import event
+
+
+def _create_operations(titles):
+    return [{'op': 'create', 'data': {'title': title}} for title in titles]
+
+
+def test_batch_create_returns_its_own_ids(client, api):
+    titles = [f'Bulk todo {i}' for i in range(5)]
+    response = client.post(f'{api}/todos/batch', json={'operations': _create_operations(titles)})
+    assert response.status_code == 200
+
+    ids = [result['id'] for result in response.get_json()['results']]
+    todos = {todo['id']: todo['title'] for todo in client.get(f'{api}/todos').get_json()}
+    assert [todos[todo_id] for todo_id in ids] == titles
+
+
+def test_batch_create_ids_skip_those_of_deleted_todos(client, api):
+    # AUTOINCREMENT never hands out a deleted todo's id again, even the highest
+    top = client.post(f'{api}/todos', json={'title': 'Deleted'}).get_json()['id']
+    client.delete(f'{api}/todos/{top}')
+
+    response = client.post(f'{api}/todos/batch', json={'operations': _create_operations(['One', 'Two'])})
+    ids = [result['id'] for result in response.get_json()['results']]
+    assert ids[0] > top
+    assert {todo['id']: todo['title'] for todo in client.get(f'{api}/todos').get_json()} == dict(zip(ids, ['One', 'Two']))
+
+
+def test_batch_create_blocks_other_writers_before_reading_ids(app, client, api):
+    from app import db
+
+    # Another connection tries to insert right after the batch reads the last
+    # id; it must find the write lock already taken
+    blocked = []
+
+    def insert_from_elsewhere(conn, cursor, statement, parameters, context, executemany):
+        if 'sqlite_sequence' not in statement or blocked:
+            return
+        other = sqlite3.connect(db.engine.url.database, timeout=0)
+        try:
+            other.execute("INSERT INTO todo (tenant_id, title) VALUES ('elsewhere', 'Not in the batch')")
+            other.commit()
+        except sqlite3.OperationalError as e:
+            blocked.append(str(e))
+        finally:
+            other.close()
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', insert_from_elsewhere)
+    try:
+        response = client.post(f'{api}/todos/batch', json={'operations': _create_operations(['One', 'Two'])})
+    finally:
+        event.remove(engine, 'before_cursor_execute', insert_from_elsewhere)
+
+    assert blocked and 'locked' in blocked[0]
+    ids = [result['id'] for result in response.get_json()['results']]
+    assert sorted(todo['id'] for todo in client.get(f'{api}/todos').get_json()) == ids
+
+
+def test_rolled_back_atomic_batch_reports_no_new_ids(client, api):
+    response = client.post(f'{api}/todos/batch', json={'atomic': True, 'operations': [
+        {'op': 'create', 'data': {'title': 'Never saved'}},
+        {'op': 'update', 'id': 10 ** 9, 'data': {'completed': True}},
+    ]})
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['committed'] is False
+    assert [(result['status'], 'id' in result) for result in body['results']] == [(424, False), (404, True)]
+    assert client.get(f'{api}/todos').get_json() == []
+
+    invalid = client.post(f'{api}/todos/batch', json={'atomic': True, 'operations': [
+        {'op': 'create', 'data': {'title': 'Valid'}},
+        {'op': 'create', 'data': {}},
+    ]}).get_json()
+    assert [result['status'] for result in invalid['results']] == [424, 400]
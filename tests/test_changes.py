@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from conftest import new_tenant
+
+
+def _seqs(app, tenant):
+    from app import db, TodoChange
+
+    with app.app_context():
+        return db.session.execute(
+            db.select(TodoChange.seq).where(TodoChange.tenant_id == tenant).order_by(TodoChange.seq)
+        ).scalars().all()
+
+
+def test_log_across_tenants_keeps_each_tenants_change_of_a_shared_id(app, client, tenant):
+    from app import db, TodoChange, list_todo_changes, latest_change_seq
+
+    # As in a database from before ids stopped being reused
+    other = new_tenant()
+    with app.app_context():
+        since = latest_change_seq()
+    todo_id = client.post(f'/api/tenants/{other}/todos', json={'title': 'Reused id'}).get_json()['id']
+    with app.app_context():
+        db.session.add(TodoChange(tenant_id=tenant, todo_id=todo_id, op='delete', changed_at=datetime.utcnow()))
+        db.session.commit()
+    client.put(f'/api/tenants/{other}/todos/{todo_id}', json={'completed': True})
+
+    with app.app_context():
+        changes, has_more = list_todo_changes(since, 100)
+    ours = [(change['tenant_id'], change['op'], change['todo'] and change['todo']['title'])
+            for change in changes if change['tenant_id'] in (tenant, other)]
+    assert ours == [(tenant, 'delete', None), (other, 'update', 'Reused id')]
+
+
+def test_compaction_leaves_the_feed_unchanged(app, client, tenant, api):
+    from app import prune_todo_changes
+
+    cursor = int(client.get(f'{api}/todos').headers['X-Changes-Cursor'])
+    kept = client.post(f'{api}/todos', json={'title': 'Kept'}).get_json()['id']
+    client.put(f'{api}/todos/{kept}', json={'title': 'Kept, renamed'})
+    client.put(f'{api}/todos/{kept}', json={'completed': True})
+    gone = client.post(f'{api}/todos', json={'title': 'Gone'}).get_json()['id']
+    client.delete(f'{api}/todos/{gone}')
+
+    cursors = [cursor] + _seqs(app, tenant)
+    before = [client.get(f'{api}/todos/changes?since={since}').get_json() for since in cursors]
+    prune_todo_changes()
+    after = [client.get(f'{api}/todos/changes?since={since}').get_json() for since in cursors]
+
+    assert after == before
+    assert len(_seqs(app, tenant)) == 2
+
+
+def test_cursors_older_than_retention_are_told_to_reload(app, client, api):
+    from app import db, CollectionState, CHANGE_LOG_HORIZON, prune_todo_changes
+
+    client.post(f'{api}/todos', json={'title': 'Old news'})
+    client.post(f'{api}/todos', json={'title': 'Older news'})
+    newest = int(client.get(f'{api}/todos').headers['X-Changes-Cursor'])
+    try:
+        # Everything is past retention; the newest entry stays regardless
+        prune_todo_changes(timedelta(hours=1), now=datetime.utcnow() + timedelta(hours=2))
+
+        expired = client.get(f'{api}/todos/changes?since={newest - 2}')
+        assert expired.status_code == 410 and expired.get_json()['resync'] is True
+        assert client.get(f'{api}/todos/changes?since={newest - 1}').status_code == 200
+
+        stream = client.get(f'{api}/todos/events', headers={'Last-Event-ID': str(newest - 2)})
+        assert 'event: resync' in stream.get_data(as_text=True)
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(CollectionState, CHANGE_LOG_HORIZON))
+            db.session.commit()
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+import app as app_module
+
+
+class StubClient:
+    """Answers every prompt with the same reply and counts the calls"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def complete(self, prompt, **kwargs):
+        self.calls += 1
+        return json.dumps(self.reply)
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    def install(reply):
+        stub = StubClient(reply)
+        monkeypatch.setattr(app_module, 'llm_client', stub)
+        return stub
+    return install
+
+
+def _version(app, tenant):
+    with app.app_context():
+        return app_module.get_collection_version(tenant)[0]
+
+
+def test_rule_parsed_lines_are_applied_in_one_commit(app, client, tenant, api, stub_llm):
+    stub = stub_llm([])
+    passport = client.post(f'{api}/todos', json={'title': 'Renew passport'}).get_json()['id']
+    version = _version(app, tenant)
+
+    response = client.post(f'{api}/chat/batch', json={'messages': [
+        'add buy milk', 'complete renew passport', 'add call mom with high priority',
+    ]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['committed'] is True
+    assert [result['ai_response']['action'] for result in body['results']] == ['create', 'update', 'create']
+    assert body['results'][1]['result']['id'] == passport
+    assert _version(app, tenant) == version + 1
+    todos = {todo['title']: todo for todo in client.get(f'{api}/todos').get_json()}
+    assert todos['Renew passport']['completed'] and todos['Call mom']['priority'] == 'high'
+    assert stub.calls == 0
+
+
+def test_unresolved_lines_share_one_fallback_call_and_keep_their_places(client, api, stub_llm):
+    stub = stub_llm([
+        {'action': 'create', 'title': 'Garden', 'priority': 'low'},
+        {'action': 'create', 'title': 'Dentist', 'priority': 'high'},
+    ])
+    messages = ['sort out the garden at some point', 'add buy milk', 'ring the dentist soon']
+
+    body = client.post(f'{api}/chat/batch', json={'messages': messages}).get_json()
+
+    assert stub.calls == 1
+    assert [result['message'] for result in body['results']] == messages
+    assert [result['result']['title'] for result in body['results']] == ['Garden', 'Buy milk', 'Dentist']
+    ids = [result['result']['id'] for result in body['results']]
+    assert ids == sorted(ids)
+
+
+def test_a_line_that_cannot_be_applied_rolls_back_the_batch(client, api, stub_llm):
+    # A create without a title can't be applied
+    stub_llm([{'action': 'create'}])
+
+    response = client.post(f'{api}/chat/batch', json={'messages': ['add buy milk', 'sort out the garden']})
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['committed'] is False and body['error'].startswith('message 1 ')
+    assert [result['message'] for result in body['results']] == ['add buy milk']
+    assert client.get(f'{api}/todos').get_json() == []
+
+
+@pytest.mark.parametrize('payload', [{}, {'messages': 'add milk'}, {'messages': ['add milk', 3]}])
+def test_messages_must_be_a_list_of_strings(client, api, payload):
+    assert client.post(f'{api}/chat/batch', json=payload).status_code == 400
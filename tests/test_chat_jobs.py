@@ -0,0 +1,101 @@
+import json
+import time
+
+import pytest
+
+import app as app_module
+from llm_client import LLMError
+
+
+class StubClient:
+    """Answers every prompt with reply (or raises it, if it is an exception) and counts the calls"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def complete(self, prompt, **kwargs):
+        self.calls += 1
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return json.dumps(self.reply)
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    def install(reply):
+        stub = StubClient(reply)
+        monkeypatch.setattr(app_module, 'llm_client', stub)
+        return stub
+    return install
+
+
+def _submit(client, api, message):
+    response = client.post(f'{api}/chat', json={'message': message, 'async': True})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['status'] == 'pending'
+    assert response.headers['Location'] == f"{api}/chat/jobs/{body['job_id']}"
+    return response.headers['Location']
+
+
+def _poll(client, location, timeout=5):
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(location)
+        assert response.status_code == 200
+        job = response.get_json()
+        if job['status'] != 'pending' or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+
+def test_async_fallback_answers_202_then_the_job_applies_the_action(client, api, stub_llm):
+    stub = stub_llm({'action': 'create', 'title': 'Plan the garden', 'priority': 'low'})
+
+    job = _poll(client, _submit(client, api, 'sort out the garden at some point'))
+
+    assert job['status'] == 'done' and job['finished_at'] is not None
+    assert job['ai_response']['title'] == 'Plan the garden'
+    assert job['result']['title'] == 'Plan the garden'
+    assert [todo['title'] for todo in client.get(f'{api}/todos').get_json()] == ['Plan the garden']
+    assert stub.calls == 1
+
+
+def test_rule_parsed_messages_are_answered_inline_even_when_async_is_asked(client, api, stub_llm):
+    stub = stub_llm({'action': 'response', 'message': 'unused'})
+
+    response = client.post(f'{api}/chat', json={'message': 'add water the plants', 'async': True})
+
+    assert response.status_code == 200
+    assert response.get_json()['result']['title'] == 'Water the plants'
+    assert stub.calls == 0
+
+
+def test_an_unusable_fallback_reply_fails_the_job(client, api, stub_llm):
+    # A create without a title can't be applied
+    stub_llm({'action': 'create'})
+
+    job = _poll(client, _submit(client, api, 'sort out the garden at some point'))
+
+    assert job['status'] == 'failed' and 'title' in job['error']
+    assert client.get(f'{api}/todos').get_json() == []
+
+
+def test_an_unavailable_llm_finishes_the_job_with_the_help_message(client, api, stub_llm):
+    stub_llm(LLMError('overloaded'))
+
+    job = _poll(client, _submit(client, api, 'sort out the garden at some point'))
+
+    assert job['status'] == 'done'
+    assert job['ai_response']['action'] == 'response' and job['result'] is None
+
+
+def test_unknown_and_other_tenants_jobs_are_not_found(client, api, stub_llm):
+    stub_llm({'action': 'response', 'message': 'Hello'})
+    location = _submit(client, api, 'sort out the garden at some point')
+    _poll(client, location)
+
+    assert client.get(f'{api}/chat/jobs/no-such-job').status_code == 404
+    job_id = location.rsplit('/', 1)[1]
+    assert client.get(f'/api/chat/jobs/{job_id}').status_code == 404
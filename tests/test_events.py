@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import app as app_module
+
+
+def _counting_fetches(monkeypatch):
+    fetches = []
+    fetch = app_module._fetch_logged_changes
+
+    def counted(after_seq):
+        fetches.append(after_seq)
+        return fetch(after_seq)
+
+    monkeypatch.setattr(app_module, '_fetch_logged_changes', counted)
+    return fetches
+
+
+def test_commits_in_seq_order_are_published_without_reading_the_log(monkeypatch, client, tenant, api):
+    client.get(f'{api}/todos')
+    subscription = app_module.todo_event_hub.subscribe(topic=tenant)
+    fetches = _counting_fetches(monkeypatch)
+    try:
+        todo_id = client.post(f'{api}/todos', json={'title': 'Pushed'}).get_json()['id']
+        client.put(f'{api}/todos/{todo_id}', json={'completed': True})
+
+        events = [subscription.get(timeout=1) for _ in range(2)]
+        assert [(op, todo['id']) for seq, op, todo in events] == [('create', todo_id), ('update', todo_id)]
+        assert fetches == []
+    finally:
+        subscription.close()
+
+
+def test_a_gap_in_seqs_is_filled_from_the_log(app, monkeypatch, client, tenant, api):
+    from app import db, TodoChange
+
+    client.get(f'{api}/todos')
+    subscription = app_module.todo_event_hub.subscribe(topic=tenant)
+    fetches = _counting_fetches(monkeypatch)
+    try:
+        # Logged by a commit that hasn't published yet
+        todo_id = client.post(f'{api}/todos', json={'title': 'Pushed'}).get_json()['id']
+        with app.app_context():
+            db.session.add(TodoChange(tenant_id=tenant, todo_id=todo_id, op='update', changed_at=datetime.utcnow()))
+            db.session.commit()
+        client.put(f'{api}/todos/{todo_id}', json={'completed': True})
+
+        # The log holds each todo's latest change only, which covers the gap
+        events = [subscription.get(timeout=1) for _ in range(2)]
+        assert [(op, todo['completed']) for seq, op, todo in events] == [('create', False), ('update', True)]
+        assert fetches
+    finally:
+        subscription.close()
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from sqlalchemy.orm import Query
+
+from export_todos import export_todos
+
+TITLES = ['One', 'Två', 'Three', 'Four', 'Five']
+
+
+class ChunkRecorder:
+    """File-like output that keeps each write separately"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, chunk):
+        self.chunks.append(chunk)
+
+    def getvalue(self):
+        return ''.join(self.chunks)
+
+
+@pytest.fixture
+def todos(client, api):
+    ids = [client.post(f'{api}/todos', json={'title': title}).get_json()['id'] for title in TITLES]
+    client.put(f'{api}/todos/{ids[1]}', json={'completed': True})
+    return client.get(f'{api}/todos').get_json()
+
+
+@pytest.fixture
+def streamed_only(monkeypatch):
+    """Batch sizes passed to Query.yield_per; loading the whole result with .all() fails the test"""
+    batch_sizes = []
+    yield_per = Query.yield_per
+
+    def recorded_yield_per(self, count):
+        batch_sizes.append(count)
+        return yield_per(self, count)
+
+    def load_everything(self):
+        raise AssertionError('the export loaded every row at once')
+
+    monkeypatch.setattr(Query, 'yield_per', recorded_yield_per)
+    monkeypatch.setattr(Query, 'all', load_everything)
+    return batch_sizes
+
+
+def test_ndjson_export_writes_a_line_per_todo_a_batch_at_a_time(tenant, todos, streamed_only):
+    output = ChunkRecorder()
+    export_todos(output, 'ndjson', batch_size=2, tenant_id=tenant)
+
+    assert streamed_only == [2]
+    assert [chunk.count('\n') for chunk in output.chunks] == [2, 2, 1]
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == todos
+
+
+def test_json_export_writes_one_array(tenant, todos, streamed_only):
+    output = ChunkRecorder()
+    export_todos(output, 'json', batch_size=2, tenant_id=tenant)
+
+    assert streamed_only == [2]
+    assert output.getvalue().endswith(']\n')
+    assert json.loads(output.getvalue()) == todos
+
+
+def test_export_filters_and_fields(tenant, todos, streamed_only):
+    output = ChunkRecorder()
+    export_todos(output, 'ndjson', filters={'completed': 'true', 'fields': 'id,title'}, tenant_id=tenant)
+
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {'id': todos[1]['id'], 'title': 'Två'}]
@@ -0,0 +1,74 @@
+import json
+
+from fallback_cache import FallbackCache
+
+
+class StubClient:
+    """Answers every prompt with the same reply and counts the calls"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def complete(self, prompt, **kwargs):
+        self.calls += 1
+        return json.dumps(self.reply)
+
+
+def _context(client, api, tenant):
+    from app import TodoSnapshot
+
+    return TodoSnapshot(client.get(f'{api}/todos').get_json(), tenant_id=tenant)
+
+
+def test_fallback_replies_are_cached_until_a_todo_they_refer_to_changes(client, tenant, api):
+    from app import AIAssistant
+
+    todo_id = client.post(f'{api}/todos', json={'title': 'Renew passport'}).get_json()['id']
+    stub = StubClient({'action': 'complete', 'id': todo_id})
+
+    def ask(message):
+        return AIAssistant._claude_fallback(message, _context(client, api, tenant), client=stub)
+
+    assert ask('tick off that passport thing') == {'action': 'complete', 'id': todo_id}
+    assert ask('Tick off that passport thing!') == {'action': 'complete', 'id': todo_id}
+    assert stub.calls == 1
+
+    assert ask('something else entirely')['action'] == 'complete'
+    assert stub.calls == 2
+
+    # The change listener drops replies that refer to the todo
+    client.put(f'{api}/todos/{todo_id}', json={'priority': 'high'})
+    ask('tick off that passport thing')
+    assert stub.calls == 3
+
+
+def test_cache_counts_hits_misses_and_invalidations():
+    now = [1000.0]
+    cache = FallbackCache(ttl=60, clock=lambda: now[0])
+    key = FallbackCache.make_key('Buy milk', [])
+
+    assert cache.get(key) is None
+    cache.put(key, {'action': 'create', 'title': 'milk'}, todo_ids=[7])
+    assert cache.get(key) == {'action': 'create', 'title': 'milk'}
+    cache.invalidate_todos([7])
+    assert cache.get(key) is None
+
+    cache.put(key, {'action': 'create', 'title': 'milk'})
+    now[0] += 61
+    assert cache.get(key) is None
+    assert {k: v for k, v in cache.stats().items() if k != 'hit_rate'} == {
+        'entries': 0, 'hits': 1, 'misses': 3, 'evictions': 0, 'invalidations': 1}
+
+
+def test_changes_are_saved_together_after_the_delay(tmp_path):
+    path = tmp_path / 'fallback_cache.json'
+    cache = FallbackCache(path=str(path), save_delay=3600)
+    for i in range(3):
+        cache.put(f'key {i}', {'action': 'delete', 'id': i}, todo_ids=[i])
+    cache.invalidate_todos([0])
+    assert not path.exists()
+
+    cache.save()
+    assert [entry[0] for entry in json.loads(path.read_text())] == ['key 1', 'key 2']
+    assert FallbackCache(path=str(path)).get('key 2') == {'action': 'delete', 'id': 2}
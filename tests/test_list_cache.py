@@ -0,0 +1,66 @@
+from conftest import new_tenant
+from response_cache import VersionedResponseCache
+
+
+def test_matching_etag_gets_304_until_the_list_changes(client, api):
+    todo_id = client.post(f'{api}/todos', json={'title': 'Cached'}).get_json()['id']
+    etags = [client.get(f'{api}/todos').headers['ETag']]
+    not_modified = client.get(f'{api}/todos', headers={'If-None-Match': etags[0]})
+    assert not_modified.status_code == 304 and not_modified.data == b''
+
+    for write in (lambda: client.post(f'{api}/todos', json={'title': 'Another'}),
+                  lambda: client.put(f'{api}/todos/{todo_id}', json={'completed': True}),
+                  lambda: client.delete(f'{api}/todos/{todo_id}')):
+        write()
+        response = client.get(f'{api}/todos', headers={'If-None-Match': etags[-1]})
+        assert response.status_code == 200
+        etags.append(response.headers['ETag'])
+    assert len(set(etags)) == 4
+    assert [todo['title'] for todo in response.get_json()] == ['Another']
+
+
+def test_each_query_string_has_its_own_etag_and_body(client, api):
+    client.post(f'{api}/todos', json={'title': 'Open'})
+    done = client.post(f'{api}/todos', json={'title': 'Done'}).get_json()['id']
+    client.put(f'{api}/todos/{done}', json={'completed': True})
+
+    everything = client.get(f'{api}/todos')
+    pending = client.get(f'{api}/todos', query_string={'completed': 'false'})
+    assert everything.headers['ETag'] != pending.headers['ETag']
+    assert [todo['title'] for todo in pending.get_json()] == ['Open']
+    # Served from the cache a second time, still per query
+    assert client.get(f'{api}/todos', query_string={'completed': 'false'}).data == pending.data
+    assert client.get(f'{api}/todos').data == everything.data
+
+
+def test_cached_bodies_stay_with_their_tenant(client):
+    first, second = (f'/api/tenants/{new_tenant()}' for _ in range(2))
+    client.post(f'{first}/todos', json={'title': 'First tenant'})
+    client.post(f'{second}/todos', json={'title': 'Second tenant'})
+
+    # Same collection version and query in both, so the same ETag
+    first_list = client.get(f'{first}/todos')
+    second_list = client.get(f'{second}/todos')
+    assert first_list.headers['ETag'] == second_list.headers['ETag']
+    assert [todo['title'] for todo in first_list.get_json()] == ['First tenant']
+    assert [todo['title'] for todo in second_list.get_json()] == ['Second tenant']
+
+
+def test_cache_keeps_only_the_newest_version():
+    cache = VersionedResponseCache(max_entries=2)
+    cache.put(1, b'', b'[1]')
+    cache.put(1, b'a=1', b'[1a]')
+    assert cache.get(1, b'') == (b'[1]', ())
+
+    cache.put(2, b'', b'[2]')
+    assert cache.get(1, b'a=1') is None and cache.get(2, b'') == (b'[2]', ())
+    # A body built from an older version never replaces a newer one
+    cache.put(1, b'a=1', b'[stale]')
+    assert cache.get(2, b'a=1') is None
+
+    cache.put(2, b'a=1', b'[2a]')
+    cache.get(2, b'')
+    cache.put(2, b'a=2', b'[2b]')
+    # Least recently used goes first
+    assert cache.get(2, b'a=1') is None and cache.get(2, b'') == (b'[2]', ())
+    assert cache.stats()['entries'] == 2
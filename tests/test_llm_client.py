@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+
+from llm_client import CircuitBreaker, LLMClient, LLMError, LLMUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='ok'):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return {'content': [{'type': 'text', 'text': self.text}]}
+
+
+class FakeSession:
+    """Plays back outcomes: a status code to answer with, or an exception to raise"""
+
+    def __init__(self, *outcomes, gate=None):
+        self.outcomes = list(outcomes)
+        self.gate = gate
+        self.posts = 0
+
+    def post(self, url, json, headers, timeout):
+        self.posts += 1
+        if self.gate is not None:
+            # Hangs until the test lets it go
+            self.gate.wait()
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+def _client(session, clock=None, **kwargs):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock or FakeClock())
+    return LLMClient(api_key='test-key', session=session, breaker=breaker, max_retries=0,
+                     backoff_base=0, **kwargs)
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock.now = 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    assert breaker.rejected == 2
+
+
+def test_client_fails_fast_while_the_breaker_is_open():
+    clock = FakeClock()
+    session = FakeSession(500)
+    client = _client(session, clock)
+
+    for _ in range(2):
+        with pytest.raises(LLMError):
+            client.complete('hi', model='test')
+    with pytest.raises(LLMUnavailable):
+        client.complete('hi', model='test')
+    assert session.posts == 2
+
+    clock.now = 30
+    session.outcomes = [200]
+    assert client.complete('hi', model='test') == 'ok'
+    assert client.stats()['breaker'] == CircuitBreaker.CLOSED
+
+
+def test_an_unexpected_error_settles_the_half_open_trial():
+    clock = FakeClock()
+    client = _client(FakeSession(KeyError('surprise')), clock)
+    for _ in range(2):
+        with pytest.raises(KeyError):
+            client.complete('hi', model='test')
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 30
+    with pytest.raises(KeyError):
+        client.complete('hi', model='test')
+    # The failed trial re-opened the breaker instead of staying in flight
+    assert client.breaker.state == CircuitBreaker.OPEN
+    clock.now = 60
+    assert client.breaker.allow()
+
+
+def test_a_hung_call_makes_others_give_up_without_tripping_the_breaker():
+    gate = threading.Event()
+    client = _client(FakeSession(200, gate=gate), max_concurrency=1, deadline=0.05)
+    hung = threading.Thread(target=client.complete, args=('hi',), kwargs={'model': 'test'})
+    hung.start()
+    try:
+        while client._session.posts == 0:
+            gate.wait(0.001)
+        with pytest.raises(LLMUnavailable):
+            client.complete('hi', model='test')
+    finally:
+        gate.set()
+        hung.join()
+
+    stats = client.stats()
+    assert (stats['busy'], stats['failures'], stats['breaker']) == (1, 0, CircuitBreaker.CLOSED)
@@ -0,0 +1,27 @@
+import logging
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from structured_logging import KeyValueFormatter
+
+
+def test_failed_statements_dont_leave_their_timer_behind(app):
+    from app import db
+
+    with app.app_context(), db.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql("SELECT * FROM no_such_table")
+        assert connection.info['query_started'] == []
+        connection.exec_driver_sql("SELECT 1")
+        assert connection.info['query_started'] == []
+
+
+def test_records_are_formatted_as_key_value_fields():
+    record = logging.getLogger('app').makeRecord(
+        'app', logging.WARNING, __file__, 1, 'Chat job failed', (), None,
+        extra={'job_id': 'abc123', 'error': 'model said "no"'})
+
+    line = KeyValueFormatter().format(record)
+    assert line.startswith('time=')
+    assert line.endswith('level=WARNING logger=app msg="Chat job failed" job_id=abc123 error="model said \\"no\\""')
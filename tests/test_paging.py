@@ -0,0 +1,73 @@
+import pytest
+
+DUE = ['2026-11-02T09:00:00', None, '2026-11-01T09:00:00', None, '2026-11-02T09:00:00']
+
+
+def _create(client, api, due_dates=DUE):
+    return [client.post(f'{api}/todos', json={'title': f'Todo {i}', 'due_date': due}).get_json()['id']
+            for i, due in enumerate(due_dates)]
+
+
+def _pages(client, api, **query):
+    """Ids page by page, following X-Next-Cursor until a page comes without one"""
+    pages = []
+    while True:
+        response = client.get(f'{api}/todos', query_string=query)
+        assert response.status_code == 200
+        pages.append([todo['id'] for todo in response.get_json()])
+        if 'X-Next-Cursor' not in response.headers:
+            return pages
+        query['cursor'] = response.headers['X-Next-Cursor']
+
+
+def test_due_date_pages_put_nulls_first_ascending_and_last_descending(client, api):
+    ids = _create(client, api)
+
+    # Page boundaries fall between the NULLs and the dates, and inside a tie
+    assert _pages(client, api, sort='due_date', limit=2) == [[ids[1], ids[3]], [ids[2], ids[0]], [ids[4]]]
+    assert _pages(client, api, sort='-due_date', limit=2) == [[ids[4], ids[0]], [ids[2], ids[3]], [ids[1]]]
+    assert _pages(client, api, sort='-due_date', limit=3) == [[ids[4], ids[0], ids[2]], [ids[3], ids[1]]]
+
+
+def test_an_exactly_full_last_page_has_no_next_cursor(client, api):
+    ids = _create(client, api, [None] * 4)
+
+    assert _pages(client, api, limit=2) == [ids[:2], ids[2:]]
+    assert _pages(client, api, sort='-id', limit=4) == [ids[::-1]]
+    assert 'X-Next-Cursor' not in client.get(f'{api}/todos').headers
+
+
+def test_filters_apply_to_every_page(client, api):
+    ids = _create(client, api)
+    client.put(f'{api}/todos/{ids[0]}', json={'completed': True})
+    client.put(f'{api}/todos/{ids[3]}', json={'priority': 'high'})
+
+    assert _pages(client, api, completed='false', limit=2) == [ids[1:3], ids[3:]]
+    assert _pages(client, api, priority='high, low') == [[ids[3]]]
+    assert _pages(client, api, due_after='2026-11-02', sort='-due_date') == [[ids[4], ids[0]]]
+
+
+@pytest.mark.parametrize('query', [
+    {'cursor': 'not a cursor'},
+    {'cursor': 'WyJpZCJd'},  # valid base64 of a JSON list that is too short
+    {'limit': 'ten'},
+    {'limit': '0'},
+    {'limit': '1001'},
+    {'sort': 'title'},
+    {'completed': 'maybe'},
+    {'due_before': 'next week'},
+    {'fields': 'id,colour'},
+])
+def test_malformed_list_queries_are_rejected(client, api, query):
+    response = client.get(f'{api}/todos', query_string=query)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_a_cursor_only_works_for_its_own_sort_order(client, api):
+    _create(client, api)
+    cursor = client.get(f'{api}/todos', query_string={'sort': 'due_date', 'limit': 1}).headers['X-Next-Cursor']
+
+    response = client.get(f'{api}/todos', query_string={'sort': 'created_at', 'cursor': cursor})
+    assert response.status_code == 400
+    assert 'different sort order' in response.get_json()['error']
@@ -0,0 +1,59 @@
+from parse_cache import ParseCache
+
+
+class CountingCompiler:
+    def __init__(self):
+        self.compiled = []
+
+    def __call__(self, message):
+        self.compiled.append(message)
+        return [('result', {'action': 'list', 'message': message})]
+
+
+def test_hits_misses_and_least_recently_used_eviction():
+    cache = ParseCache(max_entries=2)
+    compile = CountingCompiler()
+
+    for message in ('show tasks', 'show pending', 'show tasks', 'show completed', 'show tasks', 'show pending'):
+        cache.get_or_compile(message, compile)
+
+    # 'show pending' was the least recently used when 'show completed' came in
+    assert compile.compiled == ['show tasks', 'show pending', 'show completed', 'show pending']
+    assert {key: value for key, value in cache.stats().items() if key != 'hit_rate'} == {
+        'entries': 2, 'hits': 2, 'misses': 4, 'evictions': 2}
+
+
+def test_long_messages_and_a_zero_size_cache_are_never_stored():
+    compile = CountingCompiler()
+    cache = ParseCache(max_entries=8, max_message_length=10)
+    cache.get_or_compile('add ' + 'x' * 20, compile)
+    cache.get_or_compile('add ' + 'x' * 20, compile)
+    assert len(cache) == 0 and len(compile.compiled) == 2
+
+    disabled = ParseCache(max_entries=0)
+    disabled.get_or_compile('show tasks', compile)
+    assert len(disabled) == 0 and disabled.stats()['misses'] == 0
+
+
+def test_a_cached_plan_looks_its_todo_up_again_each_time(client, api):
+    from app import parse_cache
+
+    first = client.post(f'{api}/todos', json={'title': 'Water plants'}).get_json()['id']
+    reply = client.post(f'{api}/chat', json={'message': 'delete water plants'}).get_json()
+    assert reply['result'] == {'deleted': True, 'id': first}
+
+    second = client.post(f'{api}/todos', json={'title': 'Water plants'}).get_json()['id']
+    hits = parse_cache.stats()['hits']
+    reply = client.post(f'{api}/chat', json={'message': 'delete water plants'}).get_json()
+
+    # Same plan, but the name resolves to the todo that exists now
+    assert parse_cache.stats()['hits'] == hits + 1
+    assert reply['result'] == {'deleted': True, 'id': second}
+
+
+def test_finished_actions_are_handed_out_as_copies(client, api):
+    from app import AIAssistant
+
+    action = AIAssistant.parse_with_rules('add buy milk', [])
+    action['title'] = 'Changed by the caller'
+    assert AIAssistant.parse_with_rules('add buy milk', [])['title'] == 'Buy milk'
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.parser_bench import load_corpus
+
+CORPUS = load_corpus()
+
+
+@pytest.mark.parametrize('case', CORPUS['cases'], ids=[case['input'] for case in CORPUS['cases']])
+def test_golden_parse(app, case):
+    from app import AIAssistant
+
+    with app.app_context():
+        result = AIAssistant.process_natural_language(case['input'], CORPUS['todos'])
+
+    if case['expected'] is None:
+        # No rule matches; with no API key the fallback answers with the usage help
+        assert result['action'] == 'response' and f"I understood '{case['input'].lower()}'" in result['message']
+    else:
+        assert result == case['expected']
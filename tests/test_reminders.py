@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+
+
+AWARE_DUE = '2026-10-19T10:00:00+00:00'
+LOCAL_DUE = datetime(2026, 10, 19, 10, tzinfo=timezone.utc).astimezone().replace(tzinfo=None).isoformat()
+
+
+def test_due_dates_with_an_offset_are_stored_in_local_time(app, client, api):
+    from app import get_due_index
+
+    with app.app_context():
+        get_due_index()
+
+    created = client.post(f'{api}/todos', json={'title': 'Call the bank', 'due_date': AWARE_DUE})
+    assert created.status_code == 201
+    assert created.get_json()['due_date'] == LOCAL_DUE
+
+    todo_id = created.get_json()['id']
+    updated = client.put(f'{api}/todos/{todo_id}', json={'due_date': '2026-10-19T12:00:00+02:00'})
+    assert updated.status_code == 200
+    assert updated.get_json()['due_date'] == LOCAL_DUE
+
+    batch = client.post(f'{api}/todos/batch', json={'operations': [
+        {'op': 'create', 'data': {'title': 'Pay rent', 'due_date': AWARE_DUE}},
+    ]})
+    assert batch.status_code == 200
+    due = {todo['title']: todo['due_date'] for todo in client.get(f'{api}/todos').get_json()}
+    assert due == {'Call the bank': LOCAL_DUE, 'Pay rent': LOCAL_DUE}
+
+    assert client.get(f'{api}/todos', query_string={'due_after': AWARE_DUE}).status_code == 200
@@ -0,0 +1,43 @@
+from sqlalchemy import text
+
+
+def _fts_rows(connection, todo_id):
+    return connection.execute(text("SELECT count(*) FROM todo_fts WHERE rowid = :id"), {'id': todo_id}).scalar()
+
+
+def test_index_inserted_skips_rows_the_trigger_indexed(app, tenant):
+    from app import db, todo_search
+
+    with app.app_context(), db.engine.begin() as connection:
+        # A row committed by another writer just before the bulk insert, indexed by its trigger
+        connection.execute(text("INSERT INTO todo (tenant_id, title) VALUES (:tenant, 'Written elsewhere')"),
+                           {'tenant': tenant})
+        other_id = connection.execute(text("SELECT max(id) FROM todo")).scalar()
+
+        connection.execute(text(f"INSERT INTO {todo_search.bulk_table} (active) VALUES (1)"))
+        for title in ('Bulk one', 'Bulk two'):
+            connection.execute(text("INSERT INTO todo (tenant_id, title) VALUES (:tenant, :title)"),
+                               {'tenant': tenant, 'title': title})
+        connection.execute(text(f"DELETE FROM {todo_search.bulk_table}"))
+        first_id, last_id = other_id + 1, other_id + 2
+        todo_search.index_inserted(connection, first_id, last_id)
+
+        assert [_fts_rows(connection, todo_id) for todo_id in (other_id, first_id, last_id)] == [1, 1, 1]
+        connection.execute(text("DELETE FROM todo WHERE tenant_id = :tenant"), {'tenant': tenant})
+
+
+def test_bulk_and_single_inserts_are_found_once(app, client, api):
+    from app import db
+
+    client.post(f'{api}/todos', json={'title': 'Water the plants'})
+    client.post(f'{api}/todos/batch', json={'operations': [
+        {'op': 'create', 'data': {'title': f'Water the garden {i}'}} for i in range(3)
+    ]})
+    client.post(f'{api}/todos', json={'title': 'Water the lawn'})
+
+    results = client.get(f'{api}/todos/search?q=water').get_json()['results']
+    ids = [result['todo']['id'] for result in results]
+    assert len(ids) == 5 and len(set(ids)) == 5
+
+    with app.app_context(), db.engine.begin() as connection:
+        connection.execute(text("INSERT INTO todo_fts(todo_fts) VALUES ('integrity-check')"))
@@ -0,0 +1,33 @@
+import pytest
+from flask import jsonify
+
+import todo_serializer
+
+TODOS = [
+    {'title': 'Plain ASCII', 'due_date': None},
+    {'title': 'Café crème – naïve', 'description': 'Ünïcödé', 'due_date': '2026-11-02T09:30:00'},
+    {'title': 'Emoji 🎉 and DEL \x7f', 'due_date': '2026-11-03T18:45:12.250000', 'priority': 'high'},
+    {'title': 'Finished', 'description': None, 'due_date': None},
+]
+
+
+@pytest.mark.parametrize('use_orjson', [True, False], ids=['orjson', 'stdlib'])
+def test_list_body_is_byte_identical_to_jsonify(monkeypatch, app, client, tenant, api, use_orjson):
+    from app import Todo
+
+    if use_orjson and todo_serializer.orjson is None:
+        pytest.skip('orjson is not installed')
+    if not use_orjson:
+        monkeypatch.setattr(todo_serializer, 'orjson', None)
+
+    ids = [client.post(f'{api}/todos', json=todo).get_json()['id'] for todo in TODOS]
+    client.put(f'{api}/todos/{ids[-1]}', json={'completed': True})
+
+    body = client.get(f'{api}/todos').data
+    # Only the ASCII row: the one orjson encodes itself instead of handing back to json
+    ascii_body = client.get(f'{api}/todos', query_string={'limit': 1}).data
+    with app.test_request_context():
+        todos = Todo.query.filter(Todo.tenant_id == tenant).order_by(Todo.id).all()
+        assert [todo.completed for todo in todos] == [False, False, False, True]
+        assert body == jsonify([todo.to_dict() for todo in todos]).data
+        assert ascii_body == jsonify([todos[0].to_dict()]).data
@@ -0,0 +1,17 @@
+import os
+
+from benchmarks.startup_bench import LAZY_MODULES, measure
+
+# Generous next to the benchmark's measurements, so only a real regression fails
+BUDGET_MS = 1000
+
+
+def test_app_imports_within_budget_without_lazy_modules(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}",
+               ANTHROPIC_API_KEY='', LOG_LEVEL='ERROR')
+
+    measure('app', env, LAZY_MODULES)  # warm-up: bytecode caches
+    runs = [measure('app', env, LAZY_MODULES) for _ in range(3)]
+
+    assert sorted(run[0] for run in runs)[1] < BUDGET_MS
+    assert [run[3] for run in runs] == [[], [], []]
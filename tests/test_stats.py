@@ -0,0 +1,40 @@
+from sqlalchemy import text
+
+
+def _count(connection, tenant):
+    return connection.execute(text("SELECT coalesce(sum(n), 0) FROM todo_count WHERE tenant_id = :tenant"),
+                              {'tenant': tenant}).scalar()
+
+
+def test_count_inserted_skips_rows_the_trigger_counted(app, tenant):
+    from app import db, todo_stats
+
+    other_tenant = tenant + '-other'
+    with app.app_context(), db.engine.begin() as connection:
+        # Another tenant's row committed just before the bulk insert, counted by its trigger
+        connection.execute(text("INSERT INTO todo (tenant_id, title) VALUES (:tenant, 'Written elsewhere')"),
+                           {'tenant': other_tenant})
+        other_id = connection.execute(text("SELECT max(id) FROM todo")).scalar()
+
+        connection.execute(text(f"INSERT INTO {todo_stats.bulk_table} (active) VALUES (1)"))
+        for title in ('Bulk one', 'Bulk two'):
+            connection.execute(text("INSERT INTO todo (tenant_id, title) VALUES (:tenant, :title)"),
+                               {'tenant': tenant, 'title': title})
+        connection.execute(text(f"DELETE FROM {todo_stats.bulk_table}"))
+        todo_stats.count_inserted(connection, other_id + 1, other_id + 2)
+
+        assert (_count(connection, other_tenant), _count(connection, tenant)) == (1, 2)
+
+
+def test_stats_match_the_todos_after_bulk_and_single_writes(client, api):
+    client.post(f'{api}/todos', json={'title': 'Single', 'priority': 'high'})
+    response = client.post(f'{api}/todos/batch', json={'operations': [
+        {'op': 'create', 'data': {'title': f'Bulk {i}', 'priority': ('low', 'medium')[i % 2]}} for i in range(4)
+    ]})
+    first_id = response.get_json()['results'][0]['id']
+    client.put(f'{api}/todos/{first_id}', json={'completed': True})
+
+    stats = client.get(f'{api}/todos/stats').get_json()
+    assert (stats['total'], stats['completed'], stats['pending']) == (5, 1, 4)
+    assert stats['by_priority']['low'] == {'total': 2, 'completed': 1, 'pending': 1}
+    assert stats['by_priority']['high']['total'] == 1
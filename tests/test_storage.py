@@ -0,0 +1,42 @@
+from sqlalchemy import create_engine
+
+import storage
+
+
+def _pragmas(engine, names):
+    with engine.connect() as connection:
+        return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def test_a_fresh_connection_gets_the_tuned_pragmas(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    storage.configure_engine(engine)
+
+    assert _pragmas(engine, ('journal_mode', 'synchronous', 'busy_timeout', 'foreign_keys', 'temp_store')) == {
+        'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'foreign_keys': 1, 'temp_store': 2}
+    engine.dispose()
+
+
+def test_pragmas_come_from_the_environment(monkeypatch, tmp_path):
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '1234')
+    monkeypatch.setenv('SQLITE_FOREIGN_KEYS', '')
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    storage.configure_engine(engine)
+
+    assert _pragmas(engine, ('busy_timeout', 'foreign_keys')) == {'busy_timeout': 1234, 'foreign_keys': 0}
+    engine.dispose()
+
+
+def test_the_app_engine_uses_them(app):
+    from app import db
+
+    with app.app_context():
+        assert _pragmas(db.engine, ('journal_mode', 'busy_timeout', 'foreign_keys')) == {
+            'journal_mode': 'wal', 'busy_timeout': 5000, 'foreign_keys': 1}
+
+
+def test_server_databases_get_pool_pre_ping_and_recycling():
+    assert storage.engine_options('sqlite:///:memory:') == {}
+    assert 'pool_pre_ping' not in storage.engine_options('sqlite:///todos.db')
+    options = storage.engine_options('postgresql://todo@localhost/todos')
+    assert options['pool_pre_ping'] and options['pool_recycle'] == 1800
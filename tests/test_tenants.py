@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from conftest import new_tenant
+
+
+def _changes_since(client, api, cursor):
+    return client.get(f'{api}/todos/changes?since={cursor}').get_json()['changes']
+
+
+def test_deleted_ids_are_not_handed_to_another_tenant(client, api):
+    other_api = f'/api/tenants/{new_tenant()}'
+    cursor = client.get(f'{api}/todos').headers['X-Changes-Cursor']
+
+    todo_id = client.post(f'{api}/todos', json={'title': 'Private plan'}).get_json()['id']
+    client.delete(f'{api}/todos/{todo_id}')
+    other_id = client.post(f'{other_api}/todos', json={'title': 'Someone else', 'description': 'secret'}).get_json()['id']
+
+    assert other_id != todo_id
+    changes = _changes_since(client, api, cursor)
+    assert [(change['id'], change['op'], change['todo']) for change in changes] == [(todo_id, 'delete', None)]
+
+
+def test_change_feed_never_joins_another_tenants_todo(app, client, tenant, api):
+    from app import db, TodoChange
+
+    # As in a database from before ids stopped being reused: the tenant's log
+    # names an id that now belongs to another tenant's todo
+    other = new_tenant()
+    other_id = client.post(f'/api/tenants/{other}/todos', json={'title': 'Someone else',
+                                                                 'description': 'secret'}).get_json()['id']
+    cursor = client.get(f'{api}/todos').headers['X-Changes-Cursor']
+    with app.app_context():
+        db.session.add(TodoChange(tenant_id=tenant, todo_id=other_id, op='delete', changed_at=datetime.utcnow()))
+        db.session.commit()
+
+    changes = _changes_since(client, api, cursor)
+    assert [(change['id'], change['op'], change['todo']) for change in changes] == [(other_id, 'delete', None)]
+    other_changes = _changes_since(client, f'/api/tenants/{other}', 0)
+    assert [change['todo']['title'] for change in other_changes] == ['Someone else']
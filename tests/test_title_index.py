@@ -0,0 +1,33 @@
+from title_index import TitleIndex
+
+
+def _index(titles):
+    return TitleIndex.from_todos([{'id': todo_id, 'title': title, 'completed': False}
+                                  for todo_id, title in enumerate(titles, start=1)])
+
+
+def test_candidates_rank_by_pass_then_similarity():
+    index = _index([
+        'Buy bread',                      # 1: shares a trigram only
+        'Buy milk and eggs tomorrow',     # 2: substring, less similar
+        'Milk to buy',                    # 3: every word
+        'Buy milk',                       # 4: exact
+        'Buy milk now',                   # 5: substring, more similar
+    ])
+
+    ranked = index.candidates('buy milk', limit=5)
+    assert [todo_id for todo_id, score in ranked] == [4, 5, 2, 3, 1]
+    assert [int(score) for todo_id, score in ranked] == [4, 3, 3, 2, 0]
+
+
+def test_chat_names_the_other_todos_an_ambiguous_name_matched(client, api):
+    electricity = client.post(f'{api}/todos', json={'title': 'Pay electricity bill'}).get_json()['id']
+    water = client.post(f'{api}/todos', json={'title': 'Pay water bill'}).get_json()['id']
+    client.post(f'{api}/todos', json={'title': 'Walk the dog'})
+
+    body = client.post(f'{api}/chat', json={'message': 'complete pay bill'}).get_json()
+    assert body['ai_response'] == {'action': 'update', 'id': electricity, 'completed': True}
+    assert body['also_matched'] == [{'id': water, 'title': 'Pay water bill'}]
+
+    body = client.post(f'{api}/chat', json={'message': 'delete walk the dog'}).get_json()
+    assert body['result']['deleted'] and 'also_matched' not in body
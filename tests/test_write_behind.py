@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from write_behind import WriteBehindQueue
+
+
+def test_flushed_counts_only_the_todos_written():
+    rows = {1: {}, 2: {}}
+
+    def apply(updates):
+        if 'boom' in updates.get(2, {}):
+            raise ValueError('bad update')
+        written = [key for key in updates if key in rows]
+        for key in written:
+            rows[key].update(updates[key])
+        return len(written)
+
+    queue = WriteBehindQueue(apply, max_attempts=1)
+    queue.add(1, {'title': 'a'})
+    queue.add(2, {'boom': True})
+    queue.add(3, {'title': 'deleted meanwhile'})
+
+    assert queue.flush() == 1
+    stats = queue.stats()
+    assert (stats['flushed'], stats['dropped'], stats['pending']) == (1, 1, 0)
+
+
+def test_reads_show_a_queued_update_before_it_is_flushed(app, client, tenant, api):
+    from app import todo_updates
+
+    todo_id = client.post(f'{api}/todos', json={'title': 'Draft'}).get_json()['id']
+    app.config['WRITE_BEHIND_ENABLED'] = True
+    # Nothing flushes on its own while the test looks
+    interval, todo_updates.interval = todo_updates.interval, 3600
+    try:
+        flushed = todo_updates.stats()['flushed']
+        assert client.put(f'{api}/todos/{todo_id}', json={'title': 'Final'}).get_json()['title'] == 'Final'
+
+        assert client.get(f'{api}/todos/{todo_id}').get_json()['title'] == 'Final'
+        listed = client.get(f'{api}/todos?fields=title')
+        assert listed.get_json() == [{'title': 'Final'}] and 'ETag' not in listed.headers
+        assert todo_updates.stats()['flushed'] == flushed
+
+        todo_updates.add((tenant, todo_id + 10 ** 6), {'title': 'Gone', 'updated_at': datetime.utcnow()})
+        todo_updates.flush()
+        assert todo_updates.stats()['flushed'] == flushed + 1
+        assert client.get(f'{api}/todos').get_json()[0]['title'] == 'Final'
+    finally:
+        app.config['WRITE_BEHIND_ENABLED'] = False
+        todo_updates.stop()
+        todo_updates.interval = interval
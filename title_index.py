@@ -0,0 +1,287 @@
+"""
+In-memory title index for name-based todo lookups in the chat parser.
+
+Titles are kept lowercased, with an exact-title map, an inverted token index
+and trigram postings, so "complete groceries" resolves without scanning every
+todo. Lookups follow the same precedence as the original linear matcher:
+exact title, then substring, then all significant words, then at least two
+words, with the lowest id winning within a pass. candidates() ranks every
+todo a name could mean, so chat can say which others a command matched.
+"""
+
+import threading
+
+# Shorter words are ignored by word-by-word matching
+MIN_WORD_LENGTH = 3
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TitleIndex:
+    """Maps normalized todo titles to ids for exact, substring and word lookups"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.loaded = False
+        self._titles = {}       # id -> lowercased title
+        self._pending = set()   # ids of todos that are not completed
+        self._exact = {}        # lowercased title -> ids
+        self._tokens = {}       # whitespace token -> ids
+        self._trigrams = {}     # trigram -> ids
+        self._ordered = {}      # trigram -> sorted ids, rebuilt lazily after writes
+        self._all_ordered = None
+
+    @classmethod
+    def from_todos(cls, todos):
+        """Build an index from todo dicts (as returned by Todo.to_dict)"""
+        index = cls()
+        index.load((todo['id'], todo['title'], todo['completed']) for todo in todos)
+        return index
+
+    def __len__(self):
+        return len(self._titles)
+
+    def load(self, rows):
+        """Replace the contents of the index with (id, title, completed) rows"""
+        with self._lock:
+            self.clear()
+            for todo_id, title, completed in rows:
+                self._add(todo_id, title, completed)
+            self.loaded = True
+
+    def clear(self):
+        with self._lock:
+            self.loaded = False
+            self._titles.clear()
+            self._pending.clear()
+            self._exact.clear()
+            self._tokens.clear()
+            self._trigrams.clear()
+            self._ordered.clear()
+            self._all_ordered = None
+
+    def add(self, todo_id, title, completed):
+        """Insert or update a todo"""
+        with self._lock:
+            self._add(todo_id, title, completed)
+
+    def remove(self, todo_id):
+        with self._lock:
+            self._remove(todo_id)
+
+    def ensure_loaded(self, load_rows):
+        """Load from load_rows() unless the index is already loaded.
+
+        The lock is held while loading, so changes applied concurrently wait
+        and land after the load instead of being lost.
+        """
+        with self._lock:
+            if not self.loaded:
+                self.load(load_rows())
+        return self
+
+    def apply_changes(self, changes):
+        """Apply committed (op, todo) changes; ignored until the index is loaded.
+
+        Update snapshots may carry only the fields that changed; one with a
+        title for a todo the index doesn't know (created in another process)
+        adds it.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            for op, todo in changes:
+                todo_id = todo['id']
+                if op == 'delete':
+                    self._remove(todo_id)
+                elif op == 'create' or todo_id in self._titles or 'title' in todo:
+                    title = todo.get('title', self._titles.get(todo_id))
+                    completed = todo.get('completed', todo_id not in self._pending)
+                    self._add(todo_id, title, completed)
+
+    def _add(self, todo_id, title, completed):
+        normalized = (title or '').lower()
+        if self._titles.get(todo_id) != normalized:
+            self._remove(todo_id)
+            self._titles[todo_id] = normalized
+            self._exact.setdefault(normalized, set()).add(todo_id)
+            for token in set(normalized.split()):
+                self._tokens.setdefault(token, set()).add(todo_id)
+            for trigram in _trigrams(normalized):
+                self._trigrams.setdefault(trigram, set()).add(todo_id)
+                self._ordered.pop(trigram, None)
+            self._all_ordered = None
+
+        if completed:
+            self._pending.discard(todo_id)
+        else:
+            self._pending.add(todo_id)
+
+    def _remove(self, todo_id):
+        normalized = self._titles.pop(todo_id, None)
+        self._pending.discard(todo_id)
+        if normalized is None:
+            return
+        self._discard(self._exact, normalized, todo_id)
+        for token in set(normalized.split()):
+            self._discard(self._tokens, token, todo_id)
+        for trigram in _trigrams(normalized):
+            self._discard(self._trigrams, trigram, todo_id)
+            self._ordered.pop(trigram, None)
+        self._all_ordered = None
+
+    @staticmethod
+    def _discard(postings, key, todo_id):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(todo_id)
+            if not ids:
+                del postings[key]
+
+    def _containing(self, fragment, pending_only):
+        """Ids whose title contains fragment as a substring"""
+        if len(fragment) < 3:
+            scope = self._pending if pending_only else self._titles
+            return {todo_id for todo_id in scope if fragment in self._titles[todo_id]}
+
+        postings = []
+        for trigram in _trigrams(fragment):
+            ids = self._trigrams.get(trigram)
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+
+        candidates = postings[0] & self._pending if pending_only else set(postings[0])
+        for ids in postings[1:]:
+            candidates.intersection_update(ids)
+            if not candidates:
+                return candidates
+        # Trigrams can all be present without forming the fragment
+        return {todo_id for todo_id in candidates if fragment in self._titles[todo_id]}
+
+    def _first_containing(self, fragments, pending_only):
+        """Lowest id whose title contains every fragment, or None.
+
+        Walks the shortest trigram posting of the fragments in id order and
+        stops at the first title that really contains them all, so common
+        words resolve after a handful of checks.
+        """
+        rarest = None
+        for fragment in fragments:
+            for trigram in _trigrams(fragment):
+                ids = self._trigrams.get(trigram)
+                if not ids:
+                    return None
+                if rarest is None or len(ids) < len(self._trigrams[rarest]):
+                    rarest = trigram
+
+        if rarest is None:
+            # Every fragment is shorter than a trigram
+            if self._all_ordered is None:
+                self._all_ordered = sorted(self._titles)
+            ordered = self._all_ordered
+        else:
+            ordered = self._ordered.get(rarest)
+            if ordered is None:
+                ordered = self._ordered[rarest] = sorted(self._trigrams[rarest])
+
+        for todo_id in ordered:
+            if pending_only and todo_id not in self._pending:
+                continue
+            title = self._titles[todo_id]
+            if all(fragment in title for fragment in fragments):
+                return todo_id
+        return None
+
+    def find(self, name, pending_only=False):
+        """Id of the todo name refers to, or None, using the original match precedence"""
+        name = name.lower()
+        with self._lock:
+            # First pass: exact match
+            ids = self._exact.get(name)
+            if ids:
+                ids = ids & self._pending if pending_only else ids
+                if ids:
+                    return min(ids)
+
+            # Second pass: the whole name is a substring of the title
+            todo_id = self._first_containing([name], pending_only)
+            if todo_id is not None:
+                return todo_id
+
+            # Third pass: every significant word is a substring of the title
+            words = [word for word in name.split() if len(word) >= MIN_WORD_LENGTH]
+            if not words:
+                return None
+            todo_id = self._first_containing(words, pending_only)
+            if todo_id is not None:
+                return todo_id
+
+            # Fourth pass: at least two of the words are in the title
+            found = [
+                self._first_containing([words[i], words[j]], pending_only)
+                for i in range(len(words)) for j in range(i + 1, len(words))
+            ]
+            found = [todo_id for todo_id in found if todo_id is not None]
+            return min(found) if found else None
+
+    @staticmethod
+    def _matching_at_least(matches, count):
+        seen = {}
+        for ids in matches:
+            for todo_id in ids:
+                seen[todo_id] = seen.get(todo_id, 0) + 1
+        return {todo_id for todo_id, hits in seen.items() if hits >= count}
+
+    def candidates(self, name, pending_only=False, limit=5):
+        """Rank todos by how well their title matches name.
+
+        Returns up to limit (id, score) pairs, best first. The integer part of
+        the score is the pass that matched (4 exact, 3 substring, 2 all words,
+        1 two or more words, 0 trigram similarity only); the fraction breaks
+        ties by trigram similarity and whole-word matches.
+        """
+        name = name.lower()
+        words = [word for word in name.split() if len(word) >= MIN_WORD_LENGTH]
+        name_trigrams = _trigrams(name)
+
+        with self._lock:
+            matches = [self._containing(word, pending_only) for word in words]
+            substring_ids = self._containing(name, pending_only)
+            all_word_ids = set.intersection(*matches) if matches else set()
+            partial_ids = self._matching_at_least(matches, 2) if len(words) >= 2 else set()
+
+            similar_ids = set()
+            for trigram in name_trigrams:
+                similar_ids.update(self._trigrams.get(trigram, ()))
+            if pending_only:
+                similar_ids &= self._pending
+
+            ranked = []
+            for todo_id in substring_ids | all_word_ids | partial_ids | similar_ids:
+                title = self._titles[todo_id]
+                if title == name:
+                    level = 4
+                elif todo_id in substring_ids:
+                    level = 3
+                elif todo_id in all_word_ids:
+                    level = 2
+                elif todo_id in partial_ids:
+                    level = 1
+                else:
+                    level = 0
+
+                title_trigrams = _trigrams(title)
+                union = len(name_trigrams | title_trigrams)
+                similarity = len(name_trigrams & title_trigrams) / union if union else 0.0
+                whole_words = sum(1 for word in words if todo_id in self._tokens.get(word, ()))
+                word_share = whole_words / len(words) if words else 0.0
+
+                score = level + (similarity + word_share) / 2 * 0.99
+                ranked.append((todo_id, round(score, 4)))
+
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
@@ -0,0 +1,220 @@
+"""
+Aggregate counts of each tenant's todos, for dashboards.
+
+On SQLite two counter tables are kept in step with the todo table by
+triggers, so every write updates them in its own transaction, bulk
+statements and seeding included:
+
+- todo_count:     todos per (tenant, completed, priority)
+- todo_due_count: todos with a due date per (tenant, completed, due day)
+
+Bulk inserts pause the insert trigger the way they pause the search index's
+(a row in the bulk table, inside the inserting transaction) and add their
+rows with count_inserted(), one grouped statement per counter table.
+
+Status and priority counts are then a read of a handful of rows, and the
+due-date counts a sum over day buckets, however many todos there are.
+Overdue also counts today's todos already past due from the
+(tenant_id, due_date) index. Other databases, or one where the counters
+are not installed, get the same answer from GROUP BY queries.
+"""
+
+from sqlalchemy import and_, func, select, text
+
+from reminders import due_range_bounds
+
+PRIORITIES = ('low', 'medium', 'high')
+
+
+def _count_bucket(row):
+    return f"{row}.tenant_id, coalesce({row}.completed, 0), coalesce({row}.priority, '')"
+
+
+class TodoStats:
+    """Counts by status, priority and due date over a todo table"""
+
+    def __init__(self, table, count_table='todo_count', due_table='todo_due_count', bulk_table='todo_bulk_insert'):
+        self.table = table
+        self.count_table = count_table
+        self.due_table = due_table
+        self.bulk_table = bulk_table
+        self._counters = None   # unknown until install() or the first query
+
+    def _add(self, row, step):
+        """Statements adding step to the buckets of row ('new' or 'old')"""
+        counts, due = self.count_table, self.due_table
+        completed = f"coalesce({row}.completed, 0)"
+        if step > 0:
+            return (
+                f"INSERT INTO {counts} (tenant_id, completed, priority, n) VALUES ({_count_bucket(row)}, 1) "
+                f"ON CONFLICT (tenant_id, completed, priority) DO UPDATE SET n = n + 1; "
+                f"INSERT INTO {due} (tenant_id, completed, due_day, n) "
+                f"SELECT {row}.tenant_id, {completed}, date({row}.due_date), 1 WHERE {row}.due_date IS NOT NULL "
+                f"ON CONFLICT (tenant_id, completed, due_day) DO UPDATE SET n = n + 1; "
+            )
+        due_bucket = (f"tenant_id = {row}.tenant_id AND completed = {completed} "
+                      f"AND due_day = date({row}.due_date)")
+        return (
+            f"UPDATE {counts} SET n = n - 1 WHERE tenant_id = {row}.tenant_id AND completed = {completed} "
+            f"AND priority = coalesce({row}.priority, ''); "
+            f"UPDATE {due} SET n = n - 1 WHERE {due_bucket}; "
+            # Past days would otherwise pile up as empty buckets
+            f"DELETE FROM {due} WHERE {due_bucket} AND n <= 0; "
+        )
+
+    def _ddl(self):
+        todo, counts, due = self.table.name, self.count_table, self.due_table
+        return [
+            f"CREATE TABLE IF NOT EXISTS {counts} (tenant_id TEXT NOT NULL, completed INTEGER NOT NULL, "
+            f"priority TEXT NOT NULL, n INTEGER NOT NULL, "
+            f"PRIMARY KEY (tenant_id, completed, priority)) WITHOUT ROWID",
+            f"CREATE TABLE IF NOT EXISTS {due} (tenant_id TEXT NOT NULL, completed INTEGER NOT NULL, "
+            f"due_day TEXT NOT NULL, n INTEGER NOT NULL, "
+            f"PRIMARY KEY (tenant_id, completed, due_day)) WITHOUT ROWID",
+            f"CREATE TABLE IF NOT EXISTS {self.bulk_table} (active INTEGER)",
+            f"CREATE TRIGGER IF NOT EXISTS {counts}_insert AFTER INSERT ON {todo} "
+            f"WHEN NOT EXISTS (SELECT 1 FROM {self.bulk_table}) BEGIN "
+            f"{self._add('new', 1)}END",
+            f"CREATE TRIGGER IF NOT EXISTS {counts}_delete AFTER DELETE ON {todo} BEGIN "
+            f"{self._add('old', -1)}END",
+            f"CREATE TRIGGER IF NOT EXISTS {counts}_update "
+            f"AFTER UPDATE OF tenant_id, completed, priority, due_date ON {todo} BEGIN "
+            f"{self._add('old', -1)}{self._add('new', 1)}END",
+        ]
+
+    def _counters_exist(self, connection):
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"),
+            {'name': f"{self.count_table}_insert"}
+        ).first() is not None
+
+    def install(self, connection):
+        """Create the counter tables and triggers if missing; True if counters are in use.
+
+        Newly created counters are filled from the existing rows in the same
+        transaction, so no write can fall between the backfill and the triggers.
+        """
+        if connection.dialect.name != 'sqlite':
+            self._counters = False
+            return False
+        existed = self._counters_exist(connection)
+        trigger_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :name"),
+            {'name': f"{self.count_table}_insert"}
+        ).scalar()
+        if trigger_sql is not None and self.bulk_table not in trigger_sql:
+            # From before bulk inserts could pause it
+            connection.execute(text(f"DROP TRIGGER {self.count_table}_insert"))
+        for statement in self._ddl():
+            connection.execute(text(statement))
+        if not existed:
+            self.rebuild(connection)
+        self._counters = True
+        return True
+
+    def rebuild(self, connection):
+        """Recount every bucket from the todo table"""
+        counts, due = self.count_table, self.due_table
+        connection.execute(text(f"DELETE FROM {counts}"))
+        connection.execute(text(f"DELETE FROM {due}"))
+        self._count_rows(connection, 'true', {})
+
+    def count_inserted(self, connection, first_id, last_id):
+        """Add the rows with ids first_id to last_id, inserted while the insert trigger stood aside.
+
+        Bounded on both sides, so a row the trigger already counted is never counted twice.
+        """
+        self._count_rows(connection, 'id BETWEEN :first_id AND :last_id', {'first_id': first_id, 'last_id': last_id})
+
+    def _count_rows(self, connection, where, params):
+        todo, counts, due = self.table.name, self.count_table, self.due_table
+        connection.execute(text(
+            f"INSERT INTO {counts} (tenant_id, completed, priority, n) "
+            f"SELECT {_count_bucket(todo)}, count(*) FROM {todo} WHERE {where} GROUP BY 1, 2, 3 "
+            f"ON CONFLICT (tenant_id, completed, priority) DO UPDATE SET n = n + excluded.n"
+        ), params)
+        connection.execute(text(
+            f"INSERT INTO {due} (tenant_id, completed, due_day, n) "
+            f"SELECT tenant_id, coalesce(completed, 0), date(due_date), count(*) FROM {todo} "
+            f"WHERE {where} AND due_date IS NOT NULL GROUP BY 1, 2, 3 "
+            f"ON CONFLICT (tenant_id, completed, due_day) DO UPDATE SET n = n + excluded.n"
+        ), params)
+
+    def uses_counters(self, connection):
+        if self._counters is None:
+            self._counters = connection.dialect.name == 'sqlite' and self._counters_exist(connection)
+        return self._counters
+
+    def stats(self, connection, tenant_id, now):
+        """A tenant's todo counts as of now (a naive local datetime, like due dates).
+
+        Returns total, completed and pending counts, the same three per
+        priority, and the pending todos that are overdue and due this week
+        (today until the end of Sunday, as in the chat's "due this week").
+        """
+        if self.uses_counters(connection):
+            buckets, overdue, due_this_week = self._from_counters(connection, tenant_id, now)
+            source = 'counters'
+        else:
+            buckets, overdue, due_this_week = self._from_query(connection, tenant_id, now)
+            source = 'query'
+
+        by_priority = {priority: {'total': 0, 'completed': 0, 'pending': 0} for priority in PRIORITIES}
+        for completed, priority, count in buckets:
+            counts = by_priority.setdefault(priority, {'total': 0, 'completed': 0, 'pending': 0})
+            counts['total'] += count
+            counts['completed' if completed else 'pending'] += count
+        completed_total = sum(counts['completed'] for counts in by_priority.values())
+        pending_total = sum(counts['pending'] for counts in by_priority.values())
+        return {
+            'total': completed_total + pending_total,
+            'completed': completed_total,
+            'pending': pending_total,
+            'by_priority': by_priority,
+            'overdue': overdue,
+            'due_this_week': due_this_week,
+            'source': source,
+        }
+
+    def _from_counters(self, connection, tenant_id, now):
+        counts, due, todo = self.count_table, self.due_table, self.table
+        buckets = connection.execute(text(
+            f"SELECT completed, priority, n FROM {counts} WHERE tenant_id = :tenant_id AND n > 0"
+        ), {'tenant_id': tenant_id}).all()
+
+        def pending_due(start_day, end_day):
+            return connection.execute(text(
+                f"SELECT coalesce(sum(n), 0) FROM {due} WHERE tenant_id = :tenant_id AND completed = 0 "
+                f"AND due_day >= :start AND due_day < :end"
+            ), {'tenant_id': tenant_id, 'start': start_day, 'end': end_day}).scalar()
+
+        week_start, week_end = due_range_bounds('this_week', now)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        # Whole days before today from the buckets, today's todos up to now from the index
+        overdue = pending_due('', today.date().isoformat()) + connection.execute(
+            select(func.count()).select_from(todo).where(
+                todo.c.tenant_id == tenant_id, todo.c.completed.isnot(True),
+                todo.c.due_date >= today, todo.c.due_date < now
+            )
+        ).scalar()
+        due_this_week = pending_due(week_start.date().isoformat(), week_end.date().isoformat())
+        return [(bool(completed), priority, n) for completed, priority, n in buckets], overdue, due_this_week
+
+    def _from_query(self, connection, tenant_id, now):
+        columns = self.table.c
+        completed = func.coalesce(columns.completed, False)
+        priority = func.coalesce(columns.priority, '')
+        tenant = columns.tenant_id == tenant_id
+        buckets = connection.execute(
+            select(completed, priority, func.count()).where(tenant).group_by(completed, priority)
+        ).all()
+
+        def count_pending(*conditions):
+            return connection.execute(
+                select(func.count()).select_from(self.table).where(tenant, columns.completed.isnot(True), *conditions)
+            ).scalar()
+
+        week_start, week_end = due_range_bounds('this_week', now)
+        overdue = count_pending(columns.due_date < now)
+        due_this_week = count_pending(and_(columns.due_date >= week_start, columns.due_date < week_end))
+        return [(bool(done), name, n) for done, name, n in buckets], overdue, due_this_week
@@ -0,0 +1,186 @@
+"""
+Write-behind queue for todo updates.
+
+A burst of PUT /api/todos/<id> calls (toggling completion, editing titles)
+would otherwise take the SQLite write lock and commit once per request. In
+write-behind mode an update is only validated and queued: updates to the
+same todo are merged field by field (the last write of each field wins),
+and a flusher thread applies everything queued in one transaction every
+interval seconds, or as soon as max_pending todos are waiting.
+
+If a flush fails, each todo is retried on its own so one bad update can't
+hold back the rest. A todo whose update still fails is requeued, and after
+max_attempts failed flushes in a row it is dropped and kept in
+dead_letters (the most recent ones) for inspection.
+
+Until an update is flushed, overlay() and overlays() give the queued fields
+of a todo so reads can show them (read-your-writes within the process)
+without waiting for a commit. Whatever is queued is flushed on stop(), which
+runs at shutdown.
+"""
+
+import atexit
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Coalesces updates by key and hands them to apply(updates) in batches"""
+
+    def __init__(self, apply, interval=0.05, max_pending=500, max_attempts=3, dead_letter_size=100):
+        self.apply = apply          # {key: {field: value}} -> todos written, in one transaction; raises on failure
+        self.interval = interval
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.dead_letters = deque(maxlen=dead_letter_size)   # (key, fields, error) of dropped updates
+        self._attempts = {}         # key -> failed flushes in a row
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}          # key -> merged fields, waiting for the next flush
+        self._flushing = {}         # key -> fields being written by the flush in progress
+        self._thread = None
+        self._stopping = False
+        self._exit_hook = False
+        self.queued = 0             # updates accepted
+        self.coalesced = 0          # updates merged into one already queued for the same todo
+        self.flushes = 0
+        self.flushed = 0            # todos written (after coalescing; not those already deleted)
+        self.failures = 0
+        self.dropped = 0            # todos whose updates were given up on
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def add(self, key, values):
+        """Queue an update; returns the todo's queued fields so far, merged"""
+        with self._lock:
+            if key in self._pending:
+                self.coalesced += 1
+            merged = self._pending.setdefault(key, {})
+            merged.update(values)
+            self.queued += 1
+            full = len(self._pending) >= self.max_pending
+            overlay = dict(self._flushing.get(key, {}), **merged)
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                self._thread.start()
+                if not self._exit_hook:
+                    atexit.register(self.stop)
+                    self._exit_hook = True
+        if full:
+            # Flush in the caller, which holds back writers while the database catches up
+            self.flush()
+        return overlay
+
+    def overlay(self, key):
+        """Queued fields of key not yet committed, or None"""
+        with self._lock:
+            if key not in self._pending and key not in self._flushing:
+                return None
+            return dict(self._flushing.get(key, {}), **self._pending.get(key, {}))
+
+    def overlays(self, match):
+        """{key: queued fields} of every key for which match(key) is true"""
+        with self._lock:
+            merged = {key: dict(values) for key, values in self._flushing.items() if match(key)}
+            for key, values in self._pending.items():
+                if match(key):
+                    merged.setdefault(key, {}).update(values)
+            return merged
+
+    def has_pending(self, match=None):
+        """True while anything (or any key for which match(key) is true) is queued or being flushed"""
+        with self._lock:
+            if match is None:
+                return bool(self._pending or self._flushing)
+            return any(match(key) for key in self._pending) or any(match(key) for key in self._flushing)
+
+    def flush(self):
+        """Write everything queued now; returns the number of todos committed once the attempt is over"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+                batch = self._flushing
+            try:
+                written = self.apply(batch)
+                failed = {}
+            except Exception as e:
+                logger.warning("Write-behind flush failed, retrying todos one by one", extra={'todos': len(batch), 'error': e})
+                failed, written = self._apply_each(batch) if len(batch) > 1 else ({key: e for key in batch}, 0)
+            with self._lock:
+                requeue = {}
+                for key, error in failed.items():
+                    attempts = self._attempts.get(key, 0) + 1
+                    if attempts < self.max_attempts:
+                        self._attempts[key] = attempts
+                        requeue[key] = batch[key]
+                        continue
+                    self._attempts.pop(key, None)
+                    self.dead_letters.append((key, batch[key], str(error)))
+                    self.dropped += 1
+                    logger.error("Write-behind update dropped",
+                                 extra={'key': key, 'attempts': attempts, 'error': error})
+                for key in batch:
+                    if key not in failed:
+                        self._attempts.pop(key, None)
+                # Updates queued since the flush began are newer
+                for key, values in self._pending.items():
+                    requeue.setdefault(key, {}).update(values)
+                self._pending, self._flushing = requeue, {}
+                if failed:
+                    self.failures += 1
+                if written:
+                    self.flushes += 1
+                    self.flushed += written
+            return written
+
+    def _apply_each(self, batch):
+        """Apply each key of a failed batch alone; returns ({key: error} of those that failed again, todos written)"""
+        failed = {}
+        written = 0
+        for key, values in batch.items():
+            try:
+                written += self.apply({key: values})
+            except Exception as e:
+                failed[key] = e
+        return failed, written
+
+    def stop(self):
+        """Stop the flusher and write whatever is still queued"""
+        thread, self._thread = self._thread, None
+        self._stopping = True
+        self._wake.set()
+        if thread is not None:
+            thread.join()
+        self.flush()
+        self._stopping = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending) + len(self._flushing),
+                'queued': self.queued,
+                'flushes': self.flushes,
+                'flushed': self.flushed,
+                'coalesced': self.coalesced,
+                'failures': self.failures,
+                'dropped': self.dropped,
+            }
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Write-behind flusher error", extra={'error': e})
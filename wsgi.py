@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production servers
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import create_app
+from structured_logging import configure_logging
+
+configure_logging()
+app = create_app()
+
+application = app